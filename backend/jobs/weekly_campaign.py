@@ -0,0 +1,300 @@
+# backend/jobs/weekly_campaign.py
+# 주간 캠페인 야간 배치: user_information의 모든 매장에 대해 광고 문구 + 포스터 텍스트를 미리 생성.
+# - 매장 행을 email 순으로 페이지 단위로 읽어 chunk(기본 200개 매장)마다 JSONL 배치 파일 작성
+#     광고 문구    → /v1/responses        (create_text_model._make_prompt + Structured Outputs)
+#     포스터 텍스트 → /v1/chat/completions (poster_service.build_text_prompt)
+# - --mode batch : OpenAI Batch API(또는 OPENAI_BASE_URL의 대역 서버)에 제출 후 완료까지 폴링
+#   --mode local : 같은 JSONL을 이 프로세스에서 직접 실행(rate_limiter 공유)
+# - 진행 상태는 campaign_service 테이블에 기록 → 중단 후 같은 명령으로 재실행하면 이어서 처리
+#   만료/취소/실패한 배치에서 결과를 못 받은 항목은 'failed'로 남기고, 다음 실행에서 그 custom_id만
+#   모은 재시도 배치로 다시 제출(항목당 최대 --max-attempts회)
+# - 결과는 campaign_results에 저장되어 GET /campaign/history가 바로 반환
+#
+# 실행: python -m backend.jobs.weekly_campaign [--mode local] [--run-id 2026-W42]
+import argparse
+import io
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.models import create_text_model as text_model
+from backend.models.poster_text_model import PosterTextRequest
+from backend.services import campaign_service as store
+from backend.services.poster_service import build_text_prompt, parse_text_output
+from utils import model_capabilities, token_budget
+from utils.copy_parser import COPIES_SCHEMA, parse_copies
+from utils.openai_utils import _extract_text, client, limited_call
+from utils.rate_limiter import estimate_tokens
+
+logger = logging.getLogger("weekly_campaign")
+
+BATCH_DIR = os.path.join("data", "campaign")
+RESPONSES = "/v1/responses"
+CHAT = "/v1/chat/completions"
+_ENDPOINT_TAG = {RESPONSES: "responses", CHAT: "chat"}
+_ENDPOINT_KIND = {RESPONSES: "adcopy", CHAT: "poster_text"}
+_DONE_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+# ---------- 요청 본문 ----------
+def _adcopy_body(row, args) -> Dict[str, Any]:
+    email, store_name, category, _, _ = row
+    product = f"{store_name} ({category})" if category else store_name
+    body = {
+        "model": args.copy_model,
+        "input": text_model._make_prompt(product, args.tone, args.length, args.num_copies),
+        "max_output_tokens": token_budget.output_budget(args.copy_model, args.length, args.num_copies),
+        "text": {"format": {"type": "json_schema", **COPIES_SCHEMA}},
+    }
+    model_capabilities.strip_unsupported(body)  # 배치는 줄 단위 재시도가 없으므로 미리 제거
+    return body
+
+
+def _poster_body(row, args) -> Dict[str, Any]:
+    email, store_name, category, phone, address = row
+    req = PosterTextRequest(
+        email=email, store_name=store_name or "", category=category, phone=phone, address=address,
+        ad_type="브랜드", brand_desc=f"{store_name} {category or ''} 매장의 이번 주 추천", vibe=args.vibe,
+    )
+    body = {
+        "model": args.poster_model,
+        "messages": [{"role": "user", "content": build_text_prompt(req)}],
+        "temperature": 0.7,
+    }
+    model_capabilities.strip_unsupported(body)
+    return body
+
+
+def _parse(kind: str, body: Dict[str, Any], args) -> Dict[str, Any]:
+    if kind == "adcopy":
+        token_budget.record(body.get("model") or args.copy_model, args.length, args.num_copies, body)
+        text = _extract_text(body)
+        return {"copies": parse_copies(text)[: args.num_copies], "model": body.get("model")}
+    content = ((body.get("choices") or [{}])[0].get("message") or {}).get("content") or ""
+    return {**parse_text_output(content).model_dump(), "model": body.get("model")}
+
+
+def _split_custom_id(cid: str) -> Tuple[str, str]:
+    kind, _, email = cid.partition(":")
+    return kind, email
+
+
+# ---------- 배치 파일 작성 ----------
+def prepare_chunk(run_id: str, rows: List[tuple], args) -> int:
+    batch_no = store.next_batch_no(run_id)
+    out_dir = os.path.join(BATCH_DIR, run_id)
+    os.makedirs(out_dir, exist_ok=True)
+    for endpoint, kind, build in ((RESPONSES, "adcopy", _adcopy_body), (CHAT, "poster_text", _poster_body)):
+        path = os.path.join(out_dir, f"batch_{batch_no:04d}_{_ENDPOINT_TAG[endpoint]}.jsonl")
+        items = []
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                cid = f"{kind}:{row[0]}"
+                line = {"custom_id": cid, "method": "POST", "url": endpoint, "body": build(row, args)}
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+                items.append((cid, row[0], kind))
+        store.record_batch(run_id, batch_no, endpoint, path, items)
+    logger.info("prepared batch %d (%d stores)", batch_no, len(rows))
+    return batch_no
+
+
+# ---------- 실행: Batch API ----------
+def _run_remote(run_id: str, batch: Dict[str, Any], args) -> None:
+    batch_id = batch["batch_id"]
+    if not batch_id:
+        with open(batch["input_path"], "rb") as f:
+            data = f.read()
+        name = os.path.basename(batch["input_path"])
+        uploaded = limited_call(lambda: client.files.create(file=(name, data), purpose="batch"), model="batch")
+        created = limited_call(
+            lambda: client.batches.create(input_file_id=uploaded.id, endpoint=batch["endpoint"],
+                                          completion_window="24h"),
+            model="batch",
+        )
+        batch_id = created.id
+        store.update_batch(run_id, batch["batch_no"], batch["endpoint"], status="submitted", batch_id=batch_id)
+        logger.info("submitted batch %d %s → %s", batch["batch_no"], batch["endpoint"], batch_id)
+
+    while True:
+        info = limited_call(lambda: client.batches.retrieve(batch_id), model="batch")
+        if info.status in _DONE_STATES:
+            break
+        time.sleep(args.poll_interval)
+
+    pending = store.pending_custom_ids(run_id, batch["batch_no"])
+    results = []
+    for file_id in (info.output_file_id, info.error_file_id):
+        if not file_id:
+            continue
+        raw = limited_call(lambda: client.files.content(file_id), model="batch").text
+        for line in io.StringIO(raw):
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            cid = rec.get("custom_id")
+            if cid not in pending:
+                continue
+            kind, email = _split_custom_id(cid)
+            resp = rec.get("response") or {}
+            if rec.get("error") or resp.get("status_code") != 200:
+                results.append((cid, email, kind, {}, False))
+                continue
+            results.append((cid, email, kind, _parse(kind, resp.get("body") or {}, args), True))
+    store.save_results(run_id, results)
+    # 결과 줄이 없는 항목(만료/취소 등) → failed. 다음 실행에서 재시도 배치로 다시 처리된다
+    missing = store.fail_pending(run_id, batch["batch_no"], _ENDPOINT_KIND[batch["endpoint"]])
+    final = "done" if info.status == "completed" else "failed"
+    store.update_batch(run_id, batch["batch_no"], batch["endpoint"], status=final)
+    logger.info("batch %d %s %s: %d results, %d without output",
+                batch["batch_no"], batch["endpoint"], info.status, len(results), missing)
+
+
+# ---------- 실행: 로컬 ----------
+def _call_local(endpoint: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    model = body.get("model", "")
+    if endpoint == RESPONSES:
+        tokens = estimate_tokens(body["input"], body.get("max_output_tokens", 0))
+        resp = limited_call(lambda: client.responses.create(**body), model=model, tokens=tokens)
+    else:
+        tokens = estimate_tokens(body["messages"], 500)
+        resp = limited_call(lambda: client.chat.completions.create(**body), model=model, tokens=tokens)
+    return resp.model_dump()
+
+
+def _run_local(run_id: str, batch: Dict[str, Any], args) -> None:
+    pending = store.pending_custom_ids(run_id, batch["batch_no"])
+    with open(batch["input_path"], "r", encoding="utf-8") as f:
+        lines = [json.loads(l) for l in f if l.strip()]
+    lines = [l for l in lines if l["custom_id"] in pending]
+
+    def _one(line):
+        kind, email = _split_custom_id(line["custom_id"])
+        try:
+            body = _call_local(batch["endpoint"], line["body"])
+            return line["custom_id"], email, kind, _parse(kind, body, args), True
+        except Exception as e:
+            logger.warning("local item %s failed: %s", line["custom_id"], e)
+            return line["custom_id"], email, kind, {}, False
+
+    # checkpoint 단위로 저장 → 중간에 죽어도 끝난 항목은 다시 호출하지 않음
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for i in range(0, len(lines), args.checkpoint_every):
+            store.save_results(run_id, list(pool.map(_one, lines[i:i + args.checkpoint_every])))
+    store.update_batch(run_id, batch["batch_no"], batch["endpoint"], status="done")
+    logger.info("local batch %d %s: %d items", batch["batch_no"], batch["endpoint"], len(lines))
+
+
+def _run(run_id: str, batch: Dict[str, Any], args) -> None:
+    if args.mode == "local":
+        _run_local(run_id, batch, args)
+    else:
+        _run_remote(run_id, batch, args)
+
+
+# ---------- 재시도 배치 ----------
+def prepare_retry(run_id: str, args) -> Optional[int]:
+    """
+    실패했거나 결과 없이 끝난 항목만 모아 새 batch_no로 배치 파일을 만든다.
+    요청 본문은 원래 배치 파일의 줄을 그대로 다시 쓴다(custom_id 동일). 대상이 없으면 None.
+    """
+    items = store.retryable_items(run_id, args.max_attempts)
+    if not items:
+        return None
+    paths = store.batch_input_paths(run_id)
+    batch_no = store.next_batch_no(run_id)
+    out_dir = os.path.join(BATCH_DIR, run_id)
+    os.makedirs(out_dir, exist_ok=True)
+    requeued = 0
+    for endpoint, kind in _ENDPOINT_KIND.items():
+        wanted = {cid: old_no for cid, _, k, old_no in items if k == kind}
+        lines = []
+        for src in sorted({paths.get((old_no, endpoint)) for old_no in wanted.values()} - {None}):
+            if not os.path.exists(src):
+                logger.warning("retry source %s is missing; skipping its items", src)
+                continue
+            with open(src, "r", encoding="utf-8") as f:
+                lines.extend(l for l in f if l.strip() and json.loads(l)["custom_id"] in wanted)
+        if not lines:
+            continue
+        path = os.path.join(out_dir, f"batch_{batch_no:04d}_{_ENDPOINT_TAG[endpoint]}_retry.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        store.requeue_batch(run_id, batch_no, endpoint, path, [json.loads(l)["custom_id"] for l in lines])
+        requeued += len(lines)
+    if not requeued:
+        return None
+    logger.info("prepared retry batch %d (%d items)", batch_no, requeued)
+    return batch_no
+
+
+# ---------- 진입점 ----------
+def run(args) -> Dict[str, int]:
+    run_id = args.run_id or store.current_run_id()
+
+    # 1) 이전 실행에서 끝나지 않은 배치부터 마무리(제출된 배치는 재제출하지 않고 폴링만)
+    for batch in store.unfinished_batches(run_id):
+        _run(run_id, batch, args)
+
+    def _run_batch_no(batch_no: int) -> None:
+        for batch in store.unfinished_batches(run_id):
+            if batch["batch_no"] == batch_no:
+                _run(run_id, batch, args)
+
+    # 2) 실패/결과 없이 끝난 항목만 다시 배치로
+    retry_no = prepare_retry(run_id, args)
+    if retry_no is not None:
+        _run_batch_no(retry_no)
+
+    # 3) 아직 배치에 들어가지 않은 매장을 chunk 단위로 작성 → 실행
+    def _flush(rows: List[tuple]) -> None:
+        _run_batch_no(prepare_chunk(run_id, rows, args))
+
+    known = store.known_emails(run_id)
+    chunk: List[tuple] = []
+    taken = 0
+    for row in store.iter_stores():
+        if row[0] in known:
+            continue
+        if args.limit and taken >= args.limit:
+            break
+        chunk.append(row)
+        taken += 1
+        if len(chunk) >= args.chunk_size:
+            _flush(chunk)
+            chunk = []
+    if chunk:
+        _flush(chunk)
+
+    summary = store.run_summary(run_id)
+    logger.info("run %s finished: %s", run_id, summary)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="주간 캠페인(광고 문구 + 포스터 텍스트) 야간 배치 생성")
+    ap.add_argument("--run-id", default=None, help="실행 id (기본: 이번 ISO 주차, 예 2026-W42)")
+    ap.add_argument("--mode", choices=("batch", "local"), default="batch")
+    ap.add_argument("--chunk-size", type=int, default=200, help="배치 파일 1개당 매장 수")
+    ap.add_argument("--limit", type=int, default=0, help="이번 실행에서 처리할 최대 매장 수(0=전체)")
+    ap.add_argument("--poll-interval", type=float, default=30.0, help="Batch API 상태 확인 간격(초)")
+    ap.add_argument("--workers", type=int, default=8, help="local 모드 동시 호출 수")
+    ap.add_argument("--checkpoint-every", type=int, default=20, help="local 모드 결과 저장 단위")
+    ap.add_argument("--max-attempts", type=int, default=3, help="항목당 최대 시도 횟수(실패 항목 재배치 상한)")
+    ap.add_argument("--copy-model", default="gpt-4.1-mini")
+    ap.add_argument("--poster-model", default="gpt-4.1-mini")
+    ap.add_argument("--tone", default="친근하고 따뜻한")
+    ap.add_argument("--length", default="short", choices=("short", "medium", "long"))
+    ap.add_argument("--num-copies", type=int, default=5)
+    ap.add_argument("--vibe", default="따뜻하고 활기찬")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(json.dumps(run(args), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
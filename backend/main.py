@@ -4,7 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from urllib.parse import urlparse
-import os, sqlite3
+import os, sqlite3, threading
 from dotenv import load_dotenv
 
 # --- 환경 변수 로드 ---
@@ -54,7 +54,7 @@ os.makedirs(IMAGES_DIR, exist_ok=True)
 app.mount("/images", StaticFiles(directory=IMAGES_DIR), name="images")
 
 # --- 라우터 등록 ---
-from backend.routers import poster, mascot, homepage, cardnews, userinfo, adcopy
+from backend.routers import poster, mascot, homepage, cardnews, userinfo, adcopy, metrics, campaign
 from backend import auth
 app.include_router(auth.router)
 app.include_router(poster.router)
@@ -62,4 +62,14 @@ app.include_router(mascot.router)
 app.include_router(homepage.router)
 app.include_router(cardnews.router)
 app.include_router(userinfo.router)
-app.include_router(adcopy.router)
\ No newline at end of file
+app.include_router(adcopy.router)
+app.include_router(metrics.router)
+app.include_router(campaign.router)
+
+# --- 이미지 합성 프로세스 풀 미리 띄우기 (첫 /poster/variants 요청이 워커 시작을 기다리지 않도록) ---
+from utils import render_pool
+
+@app.on_event("startup")
+def warm_render_pool():
+    if os.getenv("RENDER_POOL_WARM", "1") not in ("0", "false", "False"):
+        threading.Thread(target=render_pool.warm, daemon=True).start()
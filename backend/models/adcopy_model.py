@@ -1,6 +1,6 @@
 # backend/models/adcopy_model.py
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 class AdcopyTextRequest(BaseModel):
     product: str
@@ -8,11 +8,30 @@ class AdcopyTextRequest(BaseModel):
     length: str = "short"      # "short" | "medium" |"long"
     num_copies: int = 3
     model: str = "gpt-4.1-mini"
+    no_cache: bool = False     # True면 응답 캐시를 건너뛰고 새로 생성
 
 class AdcopyTextResponse(BaseModel):
     copies: List[str]
     raw_output: Optional[str] = None  # 디버그용(원하면 숨겨도 됨)
+    meta: Optional[Dict[str, Any]] = None  # 호출 횟수/보충(top-up) 횟수/추가 출력 토큰 등
 
 class AdcopyImageResponse(BaseModel):
     copies: List[str]
-    raw_output: Optional[str] = None
\ No newline at end of file
+    raw_output: Optional[str] = None
+    meta: Optional[Dict[str, Any]] = None
+
+class AdcopyBatchRequest(BaseModel):
+    items: List[AdcopyTextRequest]
+    max_parallel: Optional[int] = None   # 동시 생성 수(None이면 서버 기본값, 서버 상한을 넘을 수 없음)
+
+class AdcopyBatchItemResult(BaseModel):
+    index: int                           # items 내 위치
+    product: str
+    ok: bool
+    result: Optional[AdcopyTextResponse] = None
+    error: Optional[str] = None
+
+class AdcopyBatchResponse(BaseModel):
+    results: List[AdcopyBatchItemResult]  # index 순
+    succeeded: int
+    failed: int
@@ -1,5 +1,5 @@
-﻿from pydantic import BaseModel
-from typing import Tuple
+﻿from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Tuple
 
 
 class CardNewsTextRequest(BaseModel):
@@ -13,4 +13,34 @@ class CardNewsTextRequest(BaseModel):
 
 class CardNewsImgRequest(BaseModel):
     prompt: str
-    size: Tuple[int, int]
\ No newline at end of file
+    size: Tuple[int, int]
+
+
+class CardNewsBackground(BaseModel):
+    """배경 지정: 단색 / 그라디언트(위→아래) / 업로드 이미지(asset id)."""
+    method: Literal["solid", "gradient", "image"] = "gradient"
+    color: str = Field("#F5F6FA", description="단색 배경 색상")
+    grad_start: str = Field("#F5F6FA", description="그라디언트 시작(위) 색상")
+    grad_end: str = Field("#DAE0EE", description="그라디언트 끝(아래) 색상")
+    image_id: Optional[str] = Field(None, description="method=image일 때 /cardnews/assets 업로드로 받은 id")
+
+class CardNewsRenderRequest(BaseModel):
+    """카드뉴스 페이지 합성 요청. 페이지마다 배경 + 오버레이(순환) + 가운데 정렬 텍스트."""
+    title: str = Field("무제 카드뉴스", description="히스토리 저장 시 제목")
+    pages: List[str] = Field(..., min_length=1, max_length=10, description="페이지별 텍스트(\"제목\n본문\")")
+    width: int = Field(1080, ge=256, le=2048)
+    height: int = Field(1080, ge=256, le=2048)
+    background: CardNewsBackground = Field(default_factory=CardNewsBackground)
+    overlay_ids: List[str] = Field(default_factory=list, max_length=10, description="오버레이 asset id 목록(페이지 순서대로 순환)")
+    overlay_opacity: int = Field(100, ge=0, le=100)
+    font_name: Optional[str] = Field(None, description="data/fonts 내 파일명")
+    font_size: int = Field(48, ge=8, le=200)
+    font_color: str = Field("#141414")
+    output: Literal["assets", "zip"] = Field("assets", description="assets: 페이지별 asset id(JSON) / zip: ZIP 스트리밍")
+    save: bool = Field(False, description="True면 결과 ZIP을 히스토리에 저장(같은 내용은 중복 저장하지 않음)")
+
+class CardNewsImagesRequest(BaseModel):
+    """페이지별 오버레이 이미지 일괄 생성(동시 요청, 완성되는 대로 SSE로 전달)."""
+    prompts: List[str] = Field(..., min_length=1, max_length=10, description="페이지 순서대로의 이미지 프롬프트")
+    model: str = Field("dall-e-3")
+    size: str = Field("1024x1024")
@@ -1,20 +1,16 @@
-# 텍스트 입력(브랜드/상품/톤/길이/개수/모델)을 받아 OpenAI에 질의 → 모델 원문(raw_output)과 파싱된 문구 목록 반환. 재시도 로직 포함.
+# 텍스트 입력(브랜드/상품/톤/길이/개수/모델)을 받아 OpenAI에 질의 → 모델 원문(raw_output)과 파싱된 문구 목록 반환.
+# 문구가 모자라거나 출력이 잘리면, 이미 받은 문구는 유지하고 모자란 개수만 추가 요청(top-up).
 
 # backend/models/create_text_model.py
-from utils.openai_utils import call_openai_model, parse_copies
+from utils.openai_utils import (
+    call_openai_model, acall_openai_model, astream_openai_model, parse_copies,
+    new_call_meta, add_topup_meta,
+)
+from utils import token_budget
+from utils.copy_parser import CopyParser, COPIES_SCHEMA, merge_copies
 
-def _max_tokens(length: str, model: str) -> int:
-    """
-    길이에 따라 여유 토큰을 다르게 부여.
-    gpt-5 계열은 동일 길이라도 조금 더 여유.
-    """
-    is_gpt5 = model.startswith("gpt-5")
-    if length == "long":
-        return 1300 if is_gpt5 else 900
-    elif length == "medium":
-        return 900 if is_gpt5 else 600
-    else: # short
-        return 600 if is_gpt5 else 350
+# 부족한 문구를 보충하는 추가 호출 최대 횟수
+MAX_TOPUPS = 2
 
 def _make_prompt(product: str, tone: str, length: str, num_copies: int) -> str:
     # 길이 규칙을 문장/자수로 명시
@@ -46,37 +42,145 @@ def _make_prompt(product: str, tone: str, length: str, num_copies: int) -> str:
         "- 각 문구는 큰따옴표 안에만 작성\n"
     )
 
-def generate_ad_copies(product: str, tone: str, length: str, num_copies: int, model: str):
+def _topup_prompt(product: str, tone: str, length: str, existing, missing: int) -> str:
+    """모자란 개수만 요청하는 보충 프롬프트(기존 문구와 중복 금지)."""
+    return (
+        _make_prompt(product, tone, length, missing)
+        + "- 아래 이미 작성된 문구와 내용/표현이 겹치지 않게 작성\n"
+        + "".join(f"  · {c}\n" for c in existing)
+    )
+
+def generate_ad_copies(product: str, tone: str, length: str, num_copies: int, model: str, use_cache: bool = True):
     prompt = _make_prompt(product, tone, length, num_copies)
 
-    max_tok = _max_tokens(length, model)
-    raw, _ = call_openai_model(
+    max_tok = token_budget.output_budget(model, length, num_copies)
+    raw, resp = call_openai_model(
         model=model,
         prompt=prompt,
         max_tokens=max_tok,
         temperature=None,
         top_p=None,
-        force_json=False,
+        json_schema=COPIES_SCHEMA,
+        use_cache=use_cache,
     )
-    copies = parse_copies(raw)
+    copies = parse_copies(raw)[:num_copies]
+    meta = new_call_meta(resp)
+    token_budget.record(model, length, num_copies, resp)
+    raws = [raw]
 
-    need_retry_for_incomplete = isinstance(raw, str) and ("incomplete_details" in raw and "max_output_tokens" in raw)
-    if need_retry_for_incomplete or len(copies) < num_copies:
-        prompt2 = prompt + "\n중요: JSON만 반환하세요."
-        max_tok2 = int(max_tok * 1.6)
-        raw2, _ = call_openai_model(
+    # 모자라거나 잘린 경우: 받은 문구는 유지하고 모자란 개수만 보충
+    while len(copies) < num_copies and meta["topups"] < MAX_TOPUPS:
+        missing = num_copies - len(copies)
+        raw2, resp2 = call_openai_model(
             model=model,
-            prompt=prompt2,
-            max_tokens=max_tok2,
+            prompt=_topup_prompt(product, tone, length, copies, missing),
+            max_tokens=token_budget.output_budget(model, length, missing),
             temperature=None,
             top_p=None,
-            force_json=False,
+            json_schema=COPIES_SCHEMA,
+            use_cache=use_cache,
         )
-        copies2 = parse_copies(raw2)
-        if need_retry_for_incomplete or len(copies2) >= len(copies):
-            raw, copies = raw2, copies2
+        add_topup_meta(meta, resp2)
+        token_budget.record(model, length, missing, resp2)
+        raws.append(raw2)
+        copies = merge_copies(copies, parse_copies(raw2), num_copies)
+
+    return {"raw_output": "\n".join(raws), "copies": copies, "meta": meta}
+
+
+async def agenerate_ad_copies(product: str, tone: str, length: str, num_copies: int, model: str, use_cache: bool = True):
+    """generate_ad_copies의 async 버전(async 라우터에서 이벤트 루프를 막지 않음)."""
+    prompt = _make_prompt(product, tone, length, num_copies)
+
+    max_tok = token_budget.output_budget(model, length, num_copies)
+    raw, resp = await acall_openai_model(
+        model=model,
+        prompt=prompt,
+        max_tokens=max_tok,
+        temperature=None,
+        top_p=None,
+        json_schema=COPIES_SCHEMA,
+        use_cache=use_cache,
+        hedge_route="adcopy.text",
+    )
+    copies = parse_copies(raw)[:num_copies]
+    meta = new_call_meta(resp)
+    token_budget.record(model, length, num_copies, resp)
+    raws = [raw]
 
-    if len(copies) > num_copies:
-        copies = copies[:num_copies]
+    while len(copies) < num_copies and meta["topups"] < MAX_TOPUPS:
+        missing = num_copies - len(copies)
+        raw2, resp2 = await acall_openai_model(
+            model=model,
+            prompt=_topup_prompt(product, tone, length, copies, missing),
+            max_tokens=token_budget.output_budget(model, length, missing),
+            temperature=None,
+            top_p=None,
+            json_schema=COPIES_SCHEMA,
+            use_cache=use_cache,
+        )
+        add_topup_meta(meta, resp2)
+        token_budget.record(model, length, missing, resp2)
+        raws.append(raw2)
+        copies = merge_copies(copies, parse_copies(raw2), num_copies)
+
+    return {"raw_output": "\n".join(raws), "copies": copies, "meta": meta}
+
+
+async def astream_ad_copies(product: str, tone: str, length: str, num_copies: int, model: str, use_cache: bool = True):
+    """
+    스트리밍 버전. 문구 하나가 완성될 때마다 ("copy", 문구)를, 마지막에 ("done", 결과 dict)를 yield.
+    스트림 중 JSON 배열에서 못 얻은 문구는 파서의 폴백 조각으로 보충하고,
+    그래도 모자라면 모자란 개수만 추가 요청한다.
+    """
+    prompt = _make_prompt(product, tone, length, num_copies)
+    max_tok = token_budget.output_budget(model, length, num_copies)
+    parser = CopyParser()
+    parts, copies = [], []
+    stream_result = {}
+    async for delta in astream_openai_model(
+        model=model,
+        prompt=prompt,
+        max_tokens=max_tok,
+        temperature=None,
+        top_p=None,
+        json_schema=COPIES_SCHEMA,
+        use_cache=use_cache,
+        result=stream_result,
+    ):
+        parts.append(delta)
+        for c in parser.feed(delta):
+            if len(copies) < num_copies:
+                copies.append(c)
+                yield "copy", c
+
+    raw = "".join(parts).strip()
+    raws = [raw]
+    resp = stream_result.get("response")
+    meta = new_call_meta(resp, cached=stream_result.get("cached", False))
+    token_budget.record(model, length, num_copies, resp)
+    if len(copies) < num_copies:
+        # 스트림 중 못 얻은 문구는 같은 패스에서 모아 둔 폴백 조각으로 보충(재파싱 없음)
+        for c in merge_copies(copies, parser.finish(), num_copies)[len(copies):]:
+            copies.append(c)
+            yield "copy", c
+
+    while len(copies) < num_copies and meta["topups"] < MAX_TOPUPS:
+        missing = num_copies - len(copies)
+        raw2, resp2 = await acall_openai_model(
+            model=model,
+            prompt=_topup_prompt(product, tone, length, copies, missing),
+            max_tokens=token_budget.output_budget(model, length, missing),
+            temperature=None,
+            top_p=None,
+            json_schema=COPIES_SCHEMA,
+            use_cache=use_cache,
+        )
+        add_topup_meta(meta, resp2)
+        token_budget.record(model, length, missing, resp2)
+        raws.append(raw2)
+        for c in merge_copies(copies, parse_copies(raw2), num_copies)[len(copies):]:
+            copies.append(c)
+            yield "copy", c
 
-    return {"raw_output": raw, "copies": copies}
\ No newline at end of file
+    yield "done", {"raw_output": "\n".join(raws), "copies": copies, "meta": meta}
@@ -3,17 +3,18 @@
 
 # backend/models/image_text_model.py
 # 업로드된 이미지(바이트) + 옵션을 받아 OpenAI Vision/Responses API에 질의 → raw_output + 파싱된 문구 반환.
+# 문구가 모자라면 모자란 개수만 보충 요청. 이때 이미지는 다시 보내지 않고 previous_response_id로 맥락을 잇는다.
 
-from utils.openai_utils import call_openai_with_image, parse_copies
+from utils.openai_utils import (
+    call_openai_model, acall_openai_model,
+    call_openai_with_image, acall_openai_with_image, astream_openai_with_image, parse_copies,
+    new_call_meta, add_topup_meta,
+)
+from utils import token_budget
+from utils.copy_parser import CopyParser, COPIES_SCHEMA, merge_copies
 
-def _max_tokens(length: str, model: str) -> int:
-    is_gpt5 = model.startswith("gpt-5")
-    if length == "long":
-        return 1300 if is_gpt5 else 900
-    elif length == "medium":
-        return 900 if is_gpt5 else 600
-    else:
-        return 600 if is_gpt5 else 350
+# 부족한 문구를 보충하는 추가 호출 최대 횟수
+MAX_TOPUPS = 2
 
 def _make_prompt(tone: str, length: str, num_copies: int) -> str:
     if length == "long":
@@ -45,39 +46,147 @@ def _make_prompt(tone: str, length: str, num_copies: int) -> str:
     )
 
 
-def generate_ad_from_image(image_bytes: bytes, tone: str, length: str, num_copies: int, model: str):
+def _topup_prompt(tone: str, length: str, existing, missing: int) -> str:
+    """모자란 개수만 요청하는 보충 프롬프트(기존 문구와 중복 금지)."""
+    return (
+        _make_prompt(tone, length, missing)
+        + "- 아래 이미 작성된 문구와 내용/표현이 겹치지 않게 작성\n"
+        + "".join(f"  · {c}\n" for c in existing)
+    )
+
+def _topup(model, image_bytes, prompt, max_tokens, prev_id, use_cache):
+    # 이전 응답 id가 있으면 이미지 재전송 없이 대화 맥락으로 이어서 요청
+    if prev_id:
+        return call_openai_model(model=model, prompt=prompt, max_tokens=max_tokens, temperature=None,
+                                 top_p=None, json_schema=COPIES_SCHEMA, previous_response_id=prev_id,
+                                 use_cache=use_cache)
+    return call_openai_with_image(model=model, text_prompt=prompt, image_bytes=image_bytes,
+                                  max_tokens=max_tokens, temperature=None, top_p=None,
+                                  json_schema=COPIES_SCHEMA, use_cache=use_cache)
+
+async def _atopup(model, image_bytes, prompt, max_tokens, prev_id, use_cache):
+    if prev_id:
+        return await acall_openai_model(model=model, prompt=prompt, max_tokens=max_tokens, temperature=None,
+                                        top_p=None, json_schema=COPIES_SCHEMA, previous_response_id=prev_id,
+                                        use_cache=use_cache)
+    return await acall_openai_with_image(model=model, text_prompt=prompt, image_bytes=image_bytes,
+                                         max_tokens=max_tokens, temperature=None, top_p=None,
+                                         json_schema=COPIES_SCHEMA, use_cache=use_cache)
+
+
+def generate_ad_from_image(image_bytes: bytes, tone: str, length: str, num_copies: int, model: str, use_cache: bool = True):
+    prompt = _make_prompt(tone, length, num_copies)
+
+    max_tok = token_budget.output_budget(model, length, num_copies)
+    raw, resp = call_openai_with_image(
+        model=model,
+        text_prompt=prompt,
+        image_bytes=image_bytes,
+        max_tokens=max_tok,
+        temperature=None,
+        top_p=None,
+        json_schema=COPIES_SCHEMA,
+        use_cache=use_cache,
+    )
+    copies = parse_copies(raw)[:num_copies]
+    meta = new_call_meta(resp)
+    token_budget.record(model, length, num_copies, resp)
+    raws = [raw]
+    prev_id = getattr(resp, "id", None)
+
+    while len(copies) < num_copies and meta["topups"] < MAX_TOPUPS:
+        missing = num_copies - len(copies)
+        raw2, resp2 = _topup(model, image_bytes, _topup_prompt(tone, length, copies, missing),
+                             token_budget.output_budget(model, length, missing), prev_id, use_cache)
+        add_topup_meta(meta, resp2)
+        token_budget.record(model, length, missing, resp2)
+        raws.append(raw2)
+        prev_id = getattr(resp2, "id", None) or prev_id
+        copies = merge_copies(copies, parse_copies(raw2), num_copies)
+
+    return {"raw_output": "\n".join(raws), "copies": copies, "meta": meta}
+
+
+async def agenerate_ad_from_image(image_bytes: bytes, tone: str, length: str, num_copies: int, model: str, use_cache: bool = True):
+    """generate_ad_from_image의 async 버전(async 라우터에서 이벤트 루프를 막지 않음)."""
     prompt = _make_prompt(tone, length, num_copies)
 
-    max_tok = _max_tokens(length, model)
-    raw, _ = call_openai_with_image(
+    max_tok = token_budget.output_budget(model, length, num_copies)
+    raw, resp = await acall_openai_with_image(
         model=model,
         text_prompt=prompt,
         image_bytes=image_bytes,
         max_tokens=max_tok,
         temperature=None,
         top_p=None,
-        force_json=False,
+        json_schema=COPIES_SCHEMA,
+        use_cache=use_cache,
     )
-    copies = parse_copies(raw)
-
-    need_retry_for_incomplete = isinstance(raw, str) and ("incomplete_details" in raw and "max_output_tokens" in raw)
-    if need_retry_for_incomplete or len(copies) < num_copies:
-        prompt2 = prompt + "\n중요: 반드시 JSON만 반환하세요."
-        max_tok2 = int(max_tok * 1.6)
-        raw2, _ = call_openai_with_image(
-            model=model,
-            text_prompt=prompt2,
-            image_bytes=image_bytes,
-            max_tokens=max_tok2,
-            temperature=None,
-            top_p=None,
-            force_json=False,
-        )
-        copies2 = parse_copies(raw2)
-        if need_retry_for_incomplete or len(copies2) >= len(copies):
-            raw, copies = raw2, copies2
-
-    if len(copies) > num_copies:
-        copies = copies[:num_copies]
-
-    return {"raw_output": raw, "copies": copies}
\ No newline at end of file
+    copies = parse_copies(raw)[:num_copies]
+    meta = new_call_meta(resp)
+    token_budget.record(model, length, num_copies, resp)
+    raws = [raw]
+    prev_id = getattr(resp, "id", None)
+
+    while len(copies) < num_copies and meta["topups"] < MAX_TOPUPS:
+        missing = num_copies - len(copies)
+        raw2, resp2 = await _atopup(model, image_bytes, _topup_prompt(tone, length, copies, missing),
+                                    token_budget.output_budget(model, length, missing), prev_id, use_cache)
+        add_topup_meta(meta, resp2)
+        token_budget.record(model, length, missing, resp2)
+        raws.append(raw2)
+        prev_id = getattr(resp2, "id", None) or prev_id
+        copies = merge_copies(copies, parse_copies(raw2), num_copies)
+
+    return {"raw_output": "\n".join(raws), "copies": copies, "meta": meta}
+
+
+async def astream_ad_from_image(image_bytes: bytes, tone: str, length: str, num_copies: int, model: str, use_cache: bool = True):
+    """스트리밍 버전. ("copy", 문구) … ("done", 결과 dict) 순으로 yield."""
+    prompt = _make_prompt(tone, length, num_copies)
+    max_tok = token_budget.output_budget(model, length, num_copies)
+    parser = CopyParser()
+    parts, copies = [], []
+    stream_result = {}
+    async for delta in astream_openai_with_image(
+        model=model,
+        text_prompt=prompt,
+        image_bytes=image_bytes,
+        max_tokens=max_tok,
+        temperature=None,
+        top_p=None,
+        json_schema=COPIES_SCHEMA,
+        use_cache=use_cache,
+        result=stream_result,
+    ):
+        parts.append(delta)
+        for c in parser.feed(delta):
+            if len(copies) < num_copies:
+                copies.append(c)
+                yield "copy", c
+
+    raw = "".join(parts).strip()
+    raws = [raw]
+    resp = stream_result.get("response")
+    meta = new_call_meta(resp, cached=stream_result.get("cached", False))
+    token_budget.record(model, length, num_copies, resp)
+    # 보충 호출은 스트림 응답 id로 맥락을 이어 이미지를 다시 보내지 않는다(캐시 히트면 id가 없어 이미지 재전송)
+    prev_id = getattr(resp, "id", None)
+    if len(copies) < num_copies:
+        for c in merge_copies(copies, parser.finish(), num_copies)[len(copies):]:
+            copies.append(c)
+            yield "copy", c
+
+    while len(copies) < num_copies and meta["topups"] < MAX_TOPUPS:
+        missing = num_copies - len(copies)
+        raw2, resp2 = await _atopup(model, image_bytes, _topup_prompt(tone, length, copies, missing),
+                                    token_budget.output_budget(model, length, missing), prev_id, use_cache)
+        add_topup_meta(meta, resp2)
+        token_budget.record(model, length, missing, resp2)
+        raws.append(raw2)
+        prev_id = getattr(resp2, "id", None) or prev_id
+        for c in merge_copies(copies, parse_copies(raw2), num_copies)[len(copies):]:
+            copies.append(c)
+            yield "copy", c
+
+    yield "done", {"raw_output": "\n".join(raws), "copies": copies, "meta": meta}
@@ -1,11 +1,10 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
-class PosterImageRequest(BaseModel):
+class PosterStyle(BaseModel):
+    """포스터 텍스트 오버레이 스타일(생성/재합성 공용)."""
     title: str
     body: str
-    dalle_prompt: str
-    dalle_size: str = "1024x1024"
     position: Literal["top", "center", "bottom"] = "bottom"
 
     # 추가 스타일 옵션
@@ -18,3 +17,21 @@ class PosterImageRequest(BaseModel):
     stroke_color_title: str = Field("#000000", description="제목 테두리 색상")
     stroke_color_body: str = Field("#000000", description="본문 테두리 색상")
     font_name: Optional[str] = Field(None, description="선택한 폰트 이름 (data/fonts 내 파일명)")
+    output_format: Optional[Literal["png", "webp", "jpeg"]] = Field(None, description="출력 포맷 (기본: IMAGE_OUTPUT_FORMAT, png)")
+
+class PosterImageRequest(PosterStyle):
+    dalle_prompt: str
+    dalle_size: str = "1024x1024"
+
+class PosterRenderRequest(PosterStyle):
+    """이미 생성된 배경(base_image_id)에 스타일만 다시 입혀 합성."""
+    base_image_id: str = Field(..., description="/poster/image 응답 헤더 X-Base-Image-Id 값")
+    save: bool = Field(False, description="True면 결과를 포스터 히스토리에 저장")
+
+class PosterVariantsRequest(PosterStyle):
+    """한 배경에 위치 × 폰트 조합을 한꺼번에 합성(position/font_name 대신 아래 목록을 사용, output_format 미지정 시 webp)."""
+    base_image_id: str = Field(..., description="/poster/image 응답 헤더 X-Base-Image-Id 값")
+    positions: List[Literal["top", "center", "bottom"]] = Field(
+        default_factory=lambda: ["top", "center", "bottom"], description="비교할 텍스트 위치 목록")
+    font_names: List[Optional[str]] = Field(
+        default_factory=lambda: [None], description="비교할 폰트 목록 (data/fonts 내 파일명, null/없는 폰트=기본 폰트, 응답에는 실제 사용한 폰트)")
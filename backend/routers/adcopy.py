@@ -1,15 +1,23 @@
-# FastAPI 라우터. /adcopy/text (JSON) 와 /adcopy/image (multipart/form-data) 엔드포인트 제공.
+# FastAPI 라우터. /adcopy/text (JSON), /adcopy/text/batch (JSON/NDJSON) 와 /adcopy/image (multipart/form-data) 엔드포인트 제공.
 
 # backend/routers/adcopy.py
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 import logging
 
 # 스키마는 models, 로직은 services
-from backend.models.adcopy_model import AdcopyTextRequest, AdcopyTextResponse, AdcopyImageResponse
-from backend.services.adcopy_service import generate_text, generate_image
+from backend.models.adcopy_model import (
+    AdcopyTextRequest, AdcopyTextResponse, AdcopyImageResponse, AdcopyBatchRequest, AdcopyBatchResponse,
+)
+from backend.services.adcopy_service import (
+    agenerate_text, agenerate_image, stream_text, stream_image,
+    agenerate_batch, stream_batch_ndjson, BATCH_MAX_ITEMS,
+)
 
 # 팀의 JWT 인증
 from backend.auth import get_current_user
+from utils import response_cache, sse
+from utils.image_intake import UploadRejected, read_image_upload
 
 router = APIRouter(prefix="/adcopy", tags=["Adcopy"])
 logger = logging.getLogger(__name__)
@@ -21,7 +29,8 @@ async def create_text_ad(
     user = Depends(get_current_user),
 ):
     try:
-        return generate_text(req)
+        # [MOD] async 경로 사용 → OpenAI 대기 중에도 이벤트 루프가 다른 요청 처리
+        return await agenerate_text(req)
     except Exception as e:
         # 서버 로그에는 스택추적 남기고, 클라이언트엔 메시지 전달
         logger.exception("create_text_ad failed: %s", e)
@@ -30,6 +39,28 @@ async def create_text_ad(
             detail=f"create_text_ad 실패: {e}",
         )
 
+@router.post("/text/batch", response_model=AdcopyBatchResponse)
+async def create_text_ad_batch(
+    req: AdcopyBatchRequest,
+    stream: bool = Query(False, description="True면 완료 순서대로 NDJSON 스트리밍"),
+    user = Depends(get_current_user),
+):
+    """
+    여러 상품 문구를 한 번에 생성.
+    - 항목별 성공/실패를 따로 담아 반환(일부 실패해도 200)
+    - stream=true 이면 application/x-ndjson 으로 끝난 항목부터 한 줄씩 전송
+    """
+    if not req.items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="items가 비어 있습니다.")
+    if len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"한 번에 최대 {BATCH_MAX_ITEMS}개까지 요청할 수 있습니다.",
+        )
+    if stream:
+        return StreamingResponse(stream_batch_ndjson(req), media_type="application/x-ndjson", headers=sse.STREAM_HEADERS)
+    return await agenerate_batch(req)
+
 @router.post("/image", response_model=AdcopyImageResponse)
 async def create_image_ad(
     file: UploadFile = File(...),
@@ -37,15 +68,49 @@ async def create_image_ad(
     length: str = Form("short"),
     num_copies: int = Form(3),
     model: str = Form("gpt-4.1-mini"),
+    no_cache: bool = Form(False),
     # [MOD] JWT 토큰 필요
     user = Depends(get_current_user),
 ):
+    # 업로드는 청크 단위로 받아 크기/포맷/해상도를 먼저 확인하고, 목표 해상도로 축소해 둔다
+    try:
+        image_bytes = await read_image_upload(file)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     try:
-        image_bytes = await file.read()
-        return generate_image(image_bytes, tone, length, num_copies, model)
+        return await agenerate_image(image_bytes, tone, length, num_copies, model, use_cache=not no_cache)
     except Exception as e:
         logger.exception("create_image_ad failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"create_image_ad 실패: {e}",
-        )
\ No newline at end of file
+        )
+
+# SSE: 문구가 하나 완성될 때마다 event: copy 전송, 마지막에 event: done
+@router.post("/text/stream")
+async def create_text_ad_stream(
+    req: AdcopyTextRequest,
+    user = Depends(get_current_user),
+):
+    return sse.response(stream_text(req))
+
+@router.post("/image/stream")
+async def create_image_ad_stream(
+    file: UploadFile = File(...),
+    tone: str = Form("감성적인"),
+    length: str = Form("short"),
+    num_copies: int = Form(3),
+    model: str = Form("gpt-4.1-mini"),
+    no_cache: bool = Form(False),
+    user = Depends(get_current_user),
+):
+    try:
+        image_bytes = await read_image_upload(file)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return sse.response(stream_image(image_bytes, tone, length, num_copies, model, use_cache=not no_cache))
+
+@router.get("/cache/stats")
+def cache_stats(user = Depends(get_current_user)):
+    """응답 캐시 히트/미스 카운터"""
+    return response_cache.stats()
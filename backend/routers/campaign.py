@@ -0,0 +1,25 @@
+# backend/routers/campaign.py
+# 야간 배치(backend/jobs/weekly_campaign.py)로 미리 만든 주간 캠페인 결과 조회.
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from backend.auth import get_current_user
+from backend.services.campaign_service import get_campaign_history
+
+router = APIRouter(prefix="/campaign", tags=["Campaign"])
+
+
+@router.get(
+    "/history",
+    summary="주간 캠페인 결과 조회",
+    description="야간 배치로 미리 생성된 광고 문구/포스터 텍스트를 반환합니다(생성 호출 없음).",
+)
+def campaign_history(
+    run_id: Optional[str] = Query(None, description="실행 id(예: 2026-W42). 없으면 가장 최근"),
+    user=Depends(get_current_user),
+):
+    email = user.get("email")
+    if not email:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 정보 누락")
+    return get_campaign_history(email, run_id)
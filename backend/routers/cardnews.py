@@ -1,8 +1,14 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status
-from backend.models.cardnews_model import CardNewsTextRequest
-from backend.services.cardnews_service import generate_cardnews_text, generate_b64image_with_openai, save_cardnews, get_history
+﻿import os
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
+from backend.models.cardnews_model import CardNewsImagesRequest, CardNewsRenderRequest, CardNewsTextRequest
+from backend.services.cardnews_service import (
+    generate_cardnews_text, generate_b64image_with_openai, save_cardnews_upload, get_history, get_zip_path,
+    asset_mime, asset_path, render_pages, render_to_assets, save_asset_upload, stream_generated_images, stream_zip,
+)
 from backend.auth import get_current_user
-from fastapi.responses import JSONResponse
+from utils import sse
+from utils.image_intake import UploadRejected
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
 router = APIRouter(prefix="/cardnews", tags=["CardNews"])
 
@@ -15,17 +21,85 @@ def create_text(req: CardNewsTextRequest, user=Depends(get_current_user)):
 def generate_b64img(prompt: str, user=Depends(get_current_user)):
     return generate_b64image_with_openai(prompt=prompt)
 
+@router.post("/generate/images")
+async def generate_images(req: CardNewsImagesRequest, user=Depends(get_current_user)):
+    """
+    페이지별 이미지 일괄 생성(SSE). 모든 프롬프트를 동시에 요청하고 완성되는 대로 asset id를 보냄
+    - event: image / error (페이지 index 포함), 마지막에 event: done
+    """
+    email = user.get("email")
+    if not email:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 필요")
+    return sse.response(stream_generated_images(req, email))
+
+@router.post("/assets")
+async def upload_asset(file: UploadFile = File(...), user=Depends(get_current_user)):
+    """합성용 이미지(배경/오버레이) 업로드 → asset id (같은 이미지는 같은 id)"""
+    email = user.get("email")
+    if not email:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 필요")
+    try:
+        asset_id = await save_asset_upload(email, file)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return {"asset_id": asset_id, "url": f"/cardnews/assets/{asset_id}"}
+
+@router.get("/assets/{asset_id}")
+def get_asset(asset_id: str, user=Depends(get_current_user)):
+    """자산 이미지 조회(id가 내용 해시라 내용이 바뀌지 않음 → 오래 캐시)"""
+    email = user.get("email")
+    if not email:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 필요")
+    try:
+        path = asset_path(email, asset_id)
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="이미지를 찾을 수 없습니다.")
+    return FileResponse(path, media_type=asset_mime(path), headers={"Cache-Control": "private, max-age=31536000, immutable"})
+
+@router.post("/render")
+def render_card(req: CardNewsRenderRequest, user=Depends(get_current_user)):
+    """
+    카드뉴스 페이지 합성(프로세스 풀에서 페이지별 병렬)
+    - output=assets: 페이지별 asset id/URL(JSON)
+    - output=zip: 완성되는 페이지부터 ZIP으로 스트리밍
+    - save=true: 결과 ZIP을 히스토리에도 저장(같은 내용은 중복 저장하지 않음)
+    """
+    email = user.get("email")
+    if not email:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 필요")
+    try:
+        if req.output == "assets":
+            return render_to_assets(req, email)
+        pages = render_pages(req, email)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="배경/오버레이 이미지를 찾을 수 없습니다. 다시 업로드해주세요.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"합성 실패: {e}")
+    return StreamingResponse(
+        stream_zip(pages, email=email if req.save else None, title=req.title),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="cardnews.zip"'},
+    )
+
 @router.post("/save")
-def save_card(req: dict, user=Depends(get_current_user)):
-    """최종 카드뉴스 ZIP 저장"""
+async def save_card(
+    file: UploadFile = File(...),
+    title: str = Form("무제 카드뉴스"),
+    user=Depends(get_current_user),
+):
+    """최종 카드뉴스 ZIP 저장(multipart, 청크 단위로 디스크에 기록 / 같은 내용 재저장은 중복 제거)"""
     email = user.get("email")
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 필요")
     try:
-        save_cardnews(email, req)
-        return {"message": "saved"}
+        saved = await save_cardnews_upload(email, title, file)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"저장 실패: {e}")
+    return {"message": "duplicate" if saved["duplicate"] else "saved", **saved}
 
 @router.get("/history")
 def history(user=Depends(get_current_user)):
@@ -33,3 +107,21 @@ def history(user=Depends(get_current_user)):
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 필요")
     return JSONResponse(content={"history": get_history(email)})
+
+@router.get("/{cardnews_id}/zip")
+def download_zip(cardnews_id: int, request: Request, user=Depends(get_current_user)):
+    """저장된 카드뉴스 ZIP 다운로드(파일 스트리밍, Range/ETag 지원)"""
+    email = user.get("email")
+    if not email:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 필요")
+    try:
+        path = get_zip_path(email, cardnews_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="카드뉴스를 찾을 수 없습니다.")
+    resp = FileResponse(path, media_type="application/zip", filename=os.path.basename(path),
+                        stat_result=os.stat(path), headers={"Cache-Control": "private, max-age=86400"})
+    # 저장된 ZIP은 바뀌지 않으므로 같은 ETag면 본문 없이 304
+    etag = resp.headers.get("etag")
+    if etag and etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return resp
@@ -0,0 +1,36 @@
+# backend/routers/metrics.py
+# OpenAI 호출 계층의 운영 지표(캐시 히트율, 모델 파라미터 레지스트리 등) 조회용 라우터.
+from fastapi import APIRouter, Depends
+
+from backend.auth import get_current_user
+from utils import file_prune, hedging, image_fetch, image_payload, model_capabilities, render_pool, response_cache, token_budget
+from utils.rate_limiter import limiter
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/openai")
+def openai_metrics(user=Depends(get_current_user)):
+    """
+    ✅ OpenAI 호출 지표
+    - cache: 응답 캐시 히트/미스
+    - capabilities: 모델별 거절 파라미터 및 회피한 재호출 수
+    - rate_limit: 현재 대기열 길이, 동시 실행 수, 대기 시간(p50/p95/max), 429 횟수
+    - image_payload: 비전 입력 인코딩 캐시 히트/미스, 평균 인코딩 CPU 시간
+    - image_fetch: 생성 이미지 URL 다운로드 횟수/실패/평균 시간, b64_json 디코드 횟수
+    - file_prune: 사용자 폴더 정리(포스터 배경, 카드뉴스 자산) 검사/삭제 횟수와 용량
+    - token_budget: 출력 토큰 예산 학습값(문구당/추론 토큰)과 잘림 비율
+    - hedging: 라우트별 헤지 발사/승리/예산 거절 횟수와 현재 헤지 대기 시간
+    - render_pool: 이미지 합성 프로세스 풀 워커 수, 처리 작업 수, 공유 메모리로 넘긴 배경 수/크기
+    """
+    return {
+        "rate_limit": limiter.stats(),
+        "cache": response_cache.stats(),
+        "capabilities": model_capabilities.stats(),
+        "image_payload": image_payload.stats(),
+        "hedging": hedging.stats(),
+        "token_budget": token_budget.stats(),
+        "image_fetch": image_fetch.stats(),
+        "render_pool": render_pool.stats(),
+        "file_prune": file_prune.stats(),
+    }
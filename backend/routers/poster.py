@@ -1,13 +1,25 @@
 # backend/routers/poster.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse, StreamingResponse
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, JSONResponse, Response
 from backend.models.poster_text_model import PosterTextRequest, PosterTextResponse
-from backend.models.poster_image_model import PosterImageRequest
-from backend.services.poster_service import generate_text, generate_image, get_history
+from backend.models.poster_image_model import PosterImageRequest, PosterRenderRequest, PosterVariantsRequest
+from backend.services.poster_service import (
+    agenerate_text, generate_image, get_history, get_poster_path, get_thumbnail, get_variant, render_poster,
+    render_variants, thumbnail_etag,
+)
 from backend.auth import get_current_user
 
 router = APIRouter(prefix="/poster", tags=["Poster"])
 
+
+def _require_email(user) -> str:
+    email = user.get("email")
+    if not email:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 정보 누락")
+    return email
+
+
 # ---------------------------------------------------------
 # 🧠 텍스트 생성
 # ---------------------------------------------------------
@@ -17,14 +29,14 @@ router = APIRouter(prefix="/poster", tags=["Poster"])
     summary="포스터용 광고 문구 생성",
     description="매장 정보 및 광고 유형(브랜드/제품/이벤트)을 기반으로 포스터용 텍스트를 생성합니다."
 )
-def create_text(req: PosterTextRequest, user=Depends(get_current_user)):
+async def create_text(req: PosterTextRequest, user=Depends(get_current_user)):
     """
     ✅ 광고 텍스트 자동 생성 엔드포인트  
     - 매장 공통 입력(`store_name`, `category`, `address` 등) 포함  
     - 광고 유형(`브랜드`, `제품`, `이벤트`)에 따라 프롬프트 달라짐
     """
     try:
-        return generate_text(req)
+        return await agenerate_text(req)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -37,16 +49,17 @@ def create_text(req: PosterTextRequest, user=Depends(get_current_user)):
 # ---------------------------------------------------------
 @router.post(
     "/image",
-    response_class=StreamingResponse,
+    response_class=Response,
     summary="포스터 이미지 생성",
     description="OpenAI DALL·E 3 모델을 사용해 포스터 이미지를 생성하고, 지정된 위치/폰트/색상 옵션으로 텍스트를 합성합니다."
 )
 def create_image(req: PosterImageRequest, user=Depends(get_current_user)):
     """
     ✅ 포스터 이미지 생성 엔드포인트  
-    - DALL·E3로 이미지 생성 후, `NanumGothic.ttf` 폰트로 한글 텍스트 오버레이  
+    - DALL·E3로 이미지 생성 후, 선택한 폰트(기본 `NanumSquareR.ttf`)로 한글 텍스트 오버레이  
     - 제목/본문 색상, 폰트 크기, 위치 지정 가능  
     - 생성된 결과 이미지는 사용자 이메일 폴더(`data/user_info/{email}/poster_img/`)에 저장됨
+    - 응답 헤더 `X-Base-Image-Id`: 배경 이미지 id (스타일 변경 시 `/poster/render`에 사용)
     """
     email = user.get("email")
     if not email:
@@ -60,26 +73,144 @@ def create_image(req: PosterImageRequest, user=Depends(get_current_user)):
         )
 
 
+# ---------------------------------------------------------
+# 🖌️ 스타일만 다시 합성
+# ---------------------------------------------------------
+@router.post(
+    "/render",
+    response_class=Response,
+    summary="포스터 스타일 재합성",
+    description="이미 생성된 배경 이미지(base_image_id)에 색상/폰트/크기/위치만 바꿔 텍스트를 다시 합성합니다. DALL·E를 호출하지 않습니다."
+)
+def render_image(req: PosterRenderRequest, user=Depends(get_current_user)):
+    """
+    ✅ 포스터 재합성 엔드포인트  
+    - `/poster/image` 응답 헤더의 `X-Base-Image-Id`를 `base_image_id`로 전달  
+    - 배경은 메모리 LRU(없으면 디스크)에서 읽고 Pillow 합성만 다시 수행  
+    - `save=true`면 결과를 포스터 히스토리에 저장
+    """
+    email = user.get("email")
+    if not email:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 정보 누락")
+    try:
+        return render_poster(req, email)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="배경 이미지를 찾을 수 없습니다. 포스터를 다시 생성해주세요.")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"이미지 합성 중 오류 발생: {e}"
+        )
+
+
+# ---------------------------------------------------------
+# 🧩 변형 비교 (위치 × 폰트)
+# ---------------------------------------------------------
+@router.post(
+    "/variants",
+    summary="포스터 변형 일괄 합성",
+    description="한 배경 이미지(base_image_id)에 위치 × 폰트 조합(최대 12개)을 병렬로 합성하고, 컨택트 시트와 개별 이미지 URL을 반환합니다."
+)
+def create_variants(req: PosterVariantsRequest, user=Depends(get_current_user)):
+    """
+    ✅ 포스터 변형 비교 엔드포인트  
+    - `positions` × `font_names` 조합을 프로세스 풀에서 동시에 합성 (DALL·E 호출 없음)  
+    - 응답: `sheet_url`(번호가 붙은 비교용 JPEG), `variants[].url`(개별 이미지)  
+    - 결과는 잠시만 보관되므로, 고른 스타일은 `/poster/render`에 `save=true`로 저장
+    """
+    email = _require_email(user)
+    try:
+        return JSONResponse(content=render_variants(req, email))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="배경 이미지를 찾을 수 없습니다. 포스터를 다시 생성해주세요.")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"변형 합성 중 오류 발생: {e}"
+        )
+
+
+@router.get(
+    "/variants/{set_id}/{index}",
+    response_class=Response,
+    summary="포스터 변형 결과 조회",
+    description="`/poster/variants` 결과의 개별 이미지(index) 또는 컨택트 시트(index=sheet)를 반환합니다."
+)
+def get_variant_image(set_id: str, index: str, user=Depends(get_current_user)):
+    email = _require_email(user)
+    try:
+        data, mime = get_variant(email, set_id, index)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="변형 결과가 만료되었습니다. 다시 요청해주세요.")
+    return Response(content=data, media_type=mime, headers={"Cache-Control": "private, max-age=3600"})
+
+
 # ---------------------------------------------------------
 # 🗂️ 히스토리 조회
 # ---------------------------------------------------------
+# 썸네일/원본은 포스터 id별로 내용이 바뀌지 않으므로 브라우저/프록시가 재검증 없이 재사용(개인 데이터라 private)
+_THUMB_CACHE_CONTROL = "private, max-age=86400"
+
+
 @router.get(
     "/history",
     summary="포스터 생성 히스토리 조회",
-    description="DB에 저장된 사용자의 포스터 생성 이력을 반환합니다."
+    description="DB에 저장된 사용자의 포스터 생성 이력을 최신순으로 한 페이지씩 반환합니다."
 )
-def get_ads_history(user=Depends(get_current_user)):
+def get_ads_history(
+    limit: int = Query(None, ge=1, le=60, description="페이지 크기 (기본 12)"),
+    cursor: str = Query(None, description="이전 응답의 next_cursor"),
+    user=Depends(get_current_user),
+):
     """
     ✅ 포스터 생성 히스토리 조회  
-    - 이메일 기준으로 DB에서 포스터 기록을 불러옴  
-    - 제목/본문/이미지 경로/생성일 포함
+    - 이메일 기준으로 DB에서 포스터 기록을 `limit`개씩 불러옴 (`created_at`, `id` 기준 keyset 페이지네이션)  
+    - 제목/본문/생성일 + `thumb_url`(256px WebP), `image_url`(원본) 포함  
+    - 다음 페이지는 응답의 `next_cursor`를 `cursor`로 전달 (마지막 페이지면 null)
     """
-    email = user.get("email")
-    if not email:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="로그인 정보 누락")
+    email = _require_email(user)
+    try:
+        history, next_cursor = get_history(email, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if not history and not cursor:
+        return JSONResponse(content={"history": [], "next_cursor": None, "message": "히스토리가 없습니다."})
+
+    return JSONResponse(content={"history": history, "next_cursor": next_cursor})
+
+
+@router.get(
+    "/{poster_id}/thumb",
+    response_class=Response,
+    summary="포스터 썸네일",
+    description="히스토리 목록용 256px WebP 썸네일을 반환합니다. ETag/If-None-Match를 지원합니다."
+)
+def get_poster_thumb(poster_id: int, request: Request, user=Depends(get_current_user)):
+    email = _require_email(user)
+    try:
+        path, etag = thumbnail_etag(email, poster_id)
+        headers = {"ETag": etag, "Cache-Control": _THUMB_CACHE_CONTROL}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=get_thumbnail(email, poster_id, path), media_type="image/webp", headers=headers)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="포스터를 찾을 수 없습니다.")
 
-    history = get_history(email)
-    if not history:
-        return JSONResponse(content={"history": [], "message": "히스토리가 없습니다."})
 
-    return JSONResponse(content={"history": history})
+@router.get(
+    "/{poster_id}/image",
+    summary="포스터 원본 다운로드",
+    description="포스터 원본 이미지 파일을 반환합니다(다운로드용)."
+)
+def get_poster_image(poster_id: int, user=Depends(get_current_user)):
+    email = _require_email(user)
+    try:
+        path = get_poster_path(email, poster_id)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="포스터를 찾을 수 없습니다.")
+    return FileResponse(path, filename=os.path.basename(path), headers={"Cache-Control": _THUMB_CACHE_CONTROL})
@@ -1,9 +1,16 @@
 # backend/services/adcopy_service.py
+import asyncio
+import logging
+import os
+from typing import AsyncIterator
+
 from backend.models.adcopy_model import (
-    AdcopyTextRequest, AdcopyTextResponse, AdcopyImageResponse
+    AdcopyTextRequest, AdcopyTextResponse, AdcopyImageResponse,
+    AdcopyBatchRequest, AdcopyBatchItemResult, AdcopyBatchResponse,
 )
 from backend.models import create_text_model as text_model
 from backend.models import image_text_model as image_model
+from utils import sse
 
 def generate_text(req: AdcopyTextRequest) -> AdcopyTextResponse:
     result = text_model.generate_ad_copies(
@@ -12,21 +19,143 @@ def generate_text(req: AdcopyTextRequest) -> AdcopyTextResponse:
         length=req.length,
         num_copies=req.num_copies,
         model=req.model,
+        use_cache=not req.no_cache,
     )
     return AdcopyTextResponse(
         raw_output=result.get("raw_output"),
         copies=result.get("copies", []),
+        meta=result.get("meta"),
     )
 
-def generate_image(image_bytes: bytes, tone: str, length: str, num_copies: int, model: str) -> AdcopyImageResponse:
+def generate_image(image_bytes: bytes, tone: str, length: str, num_copies: int, model: str, use_cache: bool = True) -> AdcopyImageResponse:
     result = image_model.generate_ad_from_image(
         image_bytes=image_bytes,
         tone=tone,
         length=length,
         num_copies=num_copies,
         model=model,
+        use_cache=use_cache,
+    )
+    return AdcopyImageResponse(
+        raw_output=result.get("raw_output"),
+        copies=result.get("copies", []),
+        meta=result.get("meta"),
+    )
+
+# -------------------- async (라우터용) --------------------
+async def agenerate_text(req: AdcopyTextRequest) -> AdcopyTextResponse:
+    result = await text_model.agenerate_ad_copies(
+        product=req.product,
+        tone=req.tone,
+        length=req.length,
+        num_copies=req.num_copies,
+        model=req.model,
+        use_cache=not req.no_cache,
+    )
+    return AdcopyTextResponse(
+        raw_output=result.get("raw_output"),
+        copies=result.get("copies", []),
+        meta=result.get("meta"),
+    )
+
+async def agenerate_image(image_bytes: bytes, tone: str, length: str, num_copies: int, model: str, use_cache: bool = True) -> AdcopyImageResponse:
+    result = await image_model.agenerate_ad_from_image(
+        image_bytes=image_bytes,
+        tone=tone,
+        length=length,
+        num_copies=num_copies,
+        model=model,
+        use_cache=use_cache,
     )
     return AdcopyImageResponse(
         raw_output=result.get("raw_output"),
         copies=result.get("copies", []),
-    )
\ No newline at end of file
+        meta=result.get("meta"),
+    )
+
+
+# -------------------- SSE 스트리밍 --------------------
+logger = logging.getLogger(__name__)
+
+async def _sse_events(events) -> AsyncIterator[str]:
+    """
+    모델 스트림 → SSE 문자열.
+    - event: copy  data: {"index": 0, "text": "..."}
+    - event: done  data: {"copies": [...], "raw_output": "...", "meta": {...}}
+    - event: error data: {"detail": "..."}
+    """
+    idx = 0
+    try:
+        async for kind, payload in events:
+            if kind == "copy":
+                yield sse.event("copy", {"index": idx, "text": payload})
+                idx += 1
+            else:
+                yield sse.event("done", {
+                    "copies": payload.get("copies", []),
+                    "raw_output": payload.get("raw_output"),
+                    "meta": payload.get("meta"),
+                })
+    except Exception as e:
+        logger.exception("adcopy stream failed: %s", e)
+        yield sse.event("error", {"detail": str(e)})
+
+def stream_text(req: AdcopyTextRequest) -> AsyncIterator[str]:
+    return _sse_events(text_model.astream_ad_copies(
+        product=req.product,
+        tone=req.tone,
+        length=req.length,
+        num_copies=req.num_copies,
+        model=req.model,
+        use_cache=not req.no_cache,
+    ))
+
+def stream_image(image_bytes: bytes, tone: str, length: str, num_copies: int, model: str, use_cache: bool = True) -> AsyncIterator[str]:
+    return _sse_events(image_model.astream_ad_from_image(
+        image_bytes=image_bytes,
+        tone=tone,
+        length=length,
+        num_copies=num_copies,
+        model=model,
+        use_cache=use_cache,
+    ))
+
+
+# -------------------- 배치 --------------------
+# 한 요청에서 동시에 생성하는 상품 수 상한(업스트림 전체 동시성은 rate_limiter가 별도로 제한)
+BATCH_MAX_PARALLEL = int(os.getenv("ADCOPY_BATCH_MAX_PARALLEL", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("ADCOPY_BATCH_MAX_ITEMS", "100"))
+
+async def _abatch_results(req: AdcopyBatchRequest) -> AsyncIterator[AdcopyBatchItemResult]:
+    """items를 병렬 생성하고, 끝나는 순서대로 항목별 결과(실패 포함)를 yield."""
+    parallel = max(1, min(req.max_parallel or BATCH_MAX_PARALLEL, BATCH_MAX_PARALLEL))
+    sem = asyncio.Semaphore(parallel)
+
+    async def _one(index: int, item: AdcopyTextRequest) -> AdcopyBatchItemResult:
+        async with sem:
+            try:
+                result = await agenerate_text(item)
+                return AdcopyBatchItemResult(index=index, product=item.product, ok=True, result=result)
+            except Exception as e:
+                logger.warning("adcopy batch item %d failed: %s", index, e)
+                return AdcopyBatchItemResult(index=index, product=item.product, ok=False, error=str(e))
+
+    tasks = [asyncio.create_task(_one(i, item)) for i, item in enumerate(req.items)]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        # 클라이언트가 스트림을 끊으면 남은 생성 취소
+        for t in tasks:
+            t.cancel()
+
+async def agenerate_batch(req: AdcopyBatchRequest) -> AdcopyBatchResponse:
+    results = [r async for r in _abatch_results(req)]
+    results.sort(key=lambda r: r.index)
+    ok = sum(1 for r in results if r.ok)
+    return AdcopyBatchResponse(results=results, succeeded=ok, failed=len(results) - ok)
+
+async def stream_batch_ndjson(req: AdcopyBatchRequest) -> AsyncIterator[str]:
+    """완료 순서대로 항목 결과를 한 줄씩(NDJSON) 내보낸다."""
+    async for r in _abatch_results(req):
+        yield r.model_dump_json() + "\n"
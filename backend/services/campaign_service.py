@@ -0,0 +1,302 @@
+# backend/services/campaign_service.py
+# 주간 캠페인(야간 배치로 미리 만든 광고 문구/포스터 텍스트) 저장소.
+# - campaign_items   : 배치 요청 1건(custom_id) 단위 진행 상태 → 중단 후 재실행 시 이어서 처리
+#                      (실패/결과 없이 끝난 항목은 다음 실행에서 그 항목만 모은 재시도 배치로 다시 처리)
+# - campaign_batches : 제출한 배치 파일/배치 id/상태
+# - campaign_results : 완성된 결과(JSON). 히스토리 엔드포인트는 여기서 바로 읽는다.
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+BASE_DIR = os.path.join("data", "user_info")
+DB_PATH = os.path.join(BASE_DIR, "database.db")
+
+
+def _connect():
+    os.makedirs(BASE_DIR, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS campaign_batches (
+            run_id TEXT,
+            batch_no INTEGER,
+            endpoint TEXT,
+            input_path TEXT,
+            batch_id TEXT,
+            status TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (run_id, batch_no, endpoint)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS campaign_items (
+            run_id TEXT,
+            custom_id TEXT,
+            email TEXT,
+            kind TEXT,
+            batch_no INTEGER,
+            status TEXT,
+            attempts INTEGER DEFAULT 1,
+            PRIMARY KEY (run_id, custom_id)
+        )
+    """)
+    # 재시도 횟수(실패 항목 재배치 상한). 예전 DB에는 컬럼 추가
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(campaign_items)")}
+    if "attempts" not in cols:
+        conn.execute("ALTER TABLE campaign_items ADD COLUMN attempts INTEGER DEFAULT 1")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS campaign_results (
+            run_id TEXT,
+            email TEXT,
+            kind TEXT,
+            payload TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (run_id, email, kind)
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_campaign_results_email ON campaign_results (email, run_id)")
+    return conn
+
+
+def current_run_id(now: Optional[datetime] = None) -> str:
+    """주간 실행 id (ISO 주차, 예: 2026-W42)."""
+    year, week, _ = (now or datetime.now()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+# ---------- 매장 목록 ----------
+def iter_stores(page_size: int = 500) -> Iterator[Tuple[str, str, str, str, str]]:
+    """
+    user_information 행을 email 순으로 page_size개씩 읽어 하나씩 yield.
+    (읽기 커서를 오래 잡고 있지 않으므로 도중에 같은 DB에 결과를 써도 잠기지 않음)
+    """
+    last = ""
+    while True:
+        conn = _connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS user_information (
+                    email TEXT PRIMARY KEY, store_name TEXT, category TEXT, phone TEXT, address TEXT
+                )
+            """)
+            rows = conn.execute(
+                "SELECT email, store_name, category, phone, address FROM user_information "
+                "WHERE email > ? ORDER BY email LIMIT ?",
+                (last, page_size),
+            ).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1][0]
+
+
+# ---------- 진행 상태(체크포인트) ----------
+def known_emails(run_id: str) -> set:
+    """이번 실행에서 이미 배치에 들어간(또는 끝난) 매장 이메일."""
+    conn = _connect()
+    try:
+        return {r[0] for r in conn.execute("SELECT DISTINCT email FROM campaign_items WHERE run_id=?", (run_id,))}
+    finally:
+        conn.close()
+
+
+def next_batch_no(run_id: str) -> int:
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT MAX(batch_no) FROM campaign_batches WHERE run_id=?", (run_id,)).fetchone()
+        return (row[0] or 0) + 1
+    finally:
+        conn.close()
+
+
+def record_batch(run_id: str, batch_no: int, endpoint: str, input_path: str,
+                 items: List[Tuple[str, str, str]]) -> None:
+    """
+    배치 파일 1개를 'prepared' 상태로 기록. items: [(custom_id, email, kind), ...]
+    파일 기록과 항목 등록을 한 트랜잭션으로 묶어, 중간에 죽어도 반쪽 배치가 남지 않게 한다.
+    """
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO campaign_batches (run_id, batch_no, endpoint, input_path, status) "
+                "VALUES (?, ?, ?, ?, 'prepared')",
+                (run_id, batch_no, endpoint, input_path),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO campaign_items (run_id, custom_id, email, kind, batch_no, status) "
+                "VALUES (?, ?, ?, ?, ?, 'pending')",
+                [(run_id, cid, email, kind, batch_no) for cid, email, kind in items],
+            )
+    finally:
+        conn.close()
+
+
+def update_batch(run_id: str, batch_no: int, endpoint: str, *, status: str, batch_id: Optional[str] = None) -> None:
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE campaign_batches SET status=?, batch_id=COALESCE(?, batch_id), updated_at=CURRENT_TIMESTAMP "
+                "WHERE run_id=? AND batch_no=? AND endpoint=?",
+                (status, batch_id, run_id, batch_no, endpoint),
+            )
+    finally:
+        conn.close()
+
+
+def unfinished_batches(run_id: str) -> List[Dict[str, Any]]:
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT batch_no, endpoint, input_path, batch_id, status FROM campaign_batches "
+            "WHERE run_id=? AND status NOT IN ('done', 'failed') ORDER BY batch_no, endpoint",
+            (run_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {"batch_no": r[0], "endpoint": r[1], "input_path": r[2], "batch_id": r[3], "status": r[4]}
+        for r in rows
+    ]
+
+
+def pending_custom_ids(run_id: str, batch_no: int) -> set:
+    conn = _connect()
+    try:
+        return {r[0] for r in conn.execute(
+            "SELECT custom_id FROM campaign_items WHERE run_id=? AND batch_no=? AND status='pending'",
+            (run_id, batch_no),
+        )}
+    finally:
+        conn.close()
+
+
+def fail_pending(run_id: str, batch_no: int, kind: str) -> int:
+    """
+    끝난 배치에서 결과 줄을 받지 못한 항목(만료/취소/실패 배치의 나머지)을 'failed'로.
+    다음 실행의 retryable_items가 이들을 다시 배치에 넣는다. 반환: 바뀐 항목 수.
+    """
+    conn = _connect()
+    try:
+        with conn:
+            cur = conn.execute(
+                "UPDATE campaign_items SET status='failed' "
+                "WHERE run_id=? AND batch_no=? AND kind=? AND status='pending'",
+                (run_id, batch_no, kind),
+            )
+            return cur.rowcount
+    finally:
+        conn.close()
+
+
+def retryable_items(run_id: str, max_attempts: int) -> List[Tuple[str, str, str, int]]:
+    """
+    다시 실행할 항목 [(custom_id, email, kind, batch_no), ...].
+    'failed' 항목과, 이미 끝난 배치에 남은 'pending' 항목(fail_pending 이전에 중단된 실행분)이 대상.
+    attempts가 max_attempts에 이른 항목은 제외.
+    """
+    conn = _connect()
+    try:
+        return conn.execute(
+            "SELECT i.custom_id, i.email, i.kind, i.batch_no FROM campaign_items i "
+            "WHERE i.run_id=? AND COALESCE(i.attempts, 1) < ? AND (i.status='failed' OR (i.status='pending' "
+            "AND NOT EXISTS (SELECT 1 FROM campaign_batches b WHERE b.run_id=i.run_id AND b.batch_no=i.batch_no "
+            "AND b.status NOT IN ('done', 'failed')))) ORDER BY i.custom_id",
+            (run_id, max_attempts),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def batch_input_paths(run_id: str) -> Dict[Tuple[int, str], str]:
+    """{(batch_no, endpoint): input_path} — 재시도 배치가 원래 요청 본문을 그대로 다시 쓰기 위해."""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT batch_no, endpoint, input_path FROM campaign_batches WHERE run_id=?", (run_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {(r[0], r[1]): r[2] for r in rows}
+
+
+def requeue_batch(run_id: str, batch_no: int, endpoint: str, input_path: str, custom_ids: List[str]) -> None:
+    """
+    재시도 배치 파일을 'prepared'로 기록하고, 들어간 항목을 새 batch_no의 'pending'으로 옮긴다(attempts + 1).
+    record_batch와 같이 한 트랜잭션으로 처리.
+    """
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO campaign_batches (run_id, batch_no, endpoint, input_path, status) "
+                "VALUES (?, ?, ?, ?, 'prepared')",
+                (run_id, batch_no, endpoint, input_path),
+            )
+            conn.executemany(
+                "UPDATE campaign_items SET batch_no=?, status='pending', attempts=COALESCE(attempts, 1) + 1 "
+                "WHERE run_id=? AND custom_id=?",
+                [(batch_no, run_id, cid) for cid in custom_ids],
+            )
+    finally:
+        conn.close()
+
+
+def save_results(run_id: str, results: List[Tuple[str, str, str, Dict[str, Any], bool]]) -> None:
+    """results: [(custom_id, email, kind, payload, ok), ...] → 결과 저장 + 항목 상태 갱신을 한 번에."""
+    if not results:
+        return
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO campaign_results (run_id, email, kind, payload) VALUES (?, ?, ?, ?)",
+                [(run_id, email, kind, json.dumps(payload, ensure_ascii=False))
+                 for _, email, kind, payload, ok in results if ok],
+            )
+            conn.executemany(
+                "UPDATE campaign_items SET status=? WHERE run_id=? AND custom_id=?",
+                [("done" if ok else "failed", run_id, cid) for cid, _, _, _, ok in results],
+            )
+    finally:
+        conn.close()
+
+
+def run_summary(run_id: str) -> Dict[str, int]:
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT status, COUNT(*) FROM campaign_items WHERE run_id=? GROUP BY status", (run_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {status: n for status, n in rows}
+
+
+# ---------- 히스토리 조회 ----------
+def get_campaign_history(email: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+    """사용자의 미리 생성된 캠페인 결과. run_id가 없으면 가장 최근 실행분."""
+    conn = _connect()
+    try:
+        if run_id is None:
+            row = conn.execute(
+                "SELECT MAX(run_id) FROM campaign_results WHERE email=?", (email,)
+            ).fetchone()
+            run_id = row[0] if row else None
+        if run_id is None:
+            return {"run_id": None, "items": {}}
+        rows = conn.execute(
+            "SELECT kind, payload, created_at FROM campaign_results WHERE email=? AND run_id=?",
+            (email, run_id),
+        ).fetchall()
+    finally:
+        conn.close()
+    return {
+        "run_id": run_id,
+        "items": {kind: {**json.loads(payload), "created_at": created_at} for kind, payload, created_at in rows},
+    }
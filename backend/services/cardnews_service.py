@@ -1,21 +1,30 @@
 ﻿# backend/services/cardnews_service.py
-from typing import Tuple, List
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
-import os, json, io, base64, sqlite3
-from datetime import datetime
-from openai import OpenAI
-from backend.models.cardnews_model import CardNewsTextRequest
-from PIL import Image
+import asyncio, hashlib, io, logging, os, json, re, sqlite3, tempfile, zipfile
+from contextlib import ExitStack
+from backend.models.cardnews_model import CardNewsImagesRequest, CardNewsRenderRequest, CardNewsTextRequest
+from PIL import Image, ImageDraw, ImageFont
 import requests
+from utils import file_prune, image_fetch, render_pool, sse
+from utils.image_intake import UploadRejected
+from utils.image_output import encode
+from utils.openai_utils import alimited_call, async_client, client, limited_call
+from utils.rate_limiter import estimate_tokens
+from utils.render_pool import load_shared, share_image
+from utils.text_layout import get_font, wrap_text
 
 load_dotenv()
-OPENAI_KEY = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_KEY)
+logger = logging.getLogger(__name__)
 
 BASE_DIR = os.path.join("data", "user_info")
 DB_PATH = os.path.join(BASE_DIR, "database.db")
 os.makedirs(BASE_DIR, exist_ok=True)
 
+# 저장 업로드(ZIP) 상한. 1080px PNG 20장 기준 수십 MB
+MAX_UPLOAD_BYTES = int(os.getenv("CARDNEWS_MAX_UPLOAD_BYTES", str(200 * 1024 * 1024)))
+_UPLOAD_CHUNK = 256 * 1024
+
 def _ensure_db():
     os.makedirs(BASE_DIR, exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
@@ -29,6 +38,16 @@ def _ensure_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
+    # 히스토리 목록용 메타데이터(ZIP을 열지 않고 크기/페이지 수 표시). 예전 DB에는 컬럼 추가
+    cols = {r[1] for r in cur.execute("PRAGMA table_info(cardnews)")}
+    if "size_bytes" not in cols:
+        cur.execute("ALTER TABLE cardnews ADD COLUMN size_bytes INTEGER")
+    if "page_count" not in cols:
+        cur.execute("ALTER TABLE cardnews ADD COLUMN page_count INTEGER")
+    if "content_hash" not in cols:
+        cur.execute("ALTER TABLE cardnews ADD COLUMN content_hash TEXT")
+    # 같은 ZIP을 다시 저장하면(합성 실행마다 자동 저장) 행을 새로 만들지 않음. 예전 행은 NULL이라 제약에 걸리지 않음
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_cardnews_email_hash ON cardnews (email, content_hash)")
     conn.commit()
     conn.close()
 
@@ -67,13 +86,18 @@ def generate_cardnews_text(req: CardNewsTextRequest) -> List[str]:
         "language": req.lang,
     }
 
-    resp = client.chat.completions.create(
+    messages = [
+        {"role": "system", "content": sys_prompt},
+        {"role": "user", "content": json.dumps(user_prompt, ensure_ascii=False)},
+    ]
+    resp = limited_call(
+        lambda: client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.7,
+        ),
         model=model,
-        messages=[
-            {"role": "system", "content": sys_prompt},
-            {"role": "user", "content": json.dumps(user_prompt, ensure_ascii=False)},
-        ],
-        temperature=0.7,
+        tokens=estimate_tokens(messages, 300 * req.num_pages),
     )
     text = resp.choices[0].message.content or "[]"
     s = text.find("[")
@@ -88,73 +112,467 @@ def generate_cardnews_text(req: CardNewsTextRequest) -> List[str]:
     return arr
 
 def generate_b64image_with_openai(prompt: str, model: str = "dall-e-3", size_str: str = "1024x1024"):
-    resp = client.images.generate(
+    resp = limited_call(
+        lambda: client.images.generate(
+            model=model,
+            prompt=str(prompt)[:2000],
+            size=size_str,
+            response_format="b64_json",
+        ),
         model=model,
-        prompt=str(prompt)[:2000],
-        size=size_str,
-        response_format="b64_json",
+        images=1,
     )
     d0 = resp.data[0]
     b64 = getattr(d0, "b64_json", None)
     return b64
 
-def save_cardnews(email: str, req: dict):
+async def save_cardnews_upload(email: str, title: str, upload) -> dict:
     """
-    req: {
-      "title": "카드뉴스 제목",
-      "zip_b64": "base64(zip bytes)"
-    }
+    multipart로 올라온 카드뉴스 ZIP을 청크 단위로 디스크에 바로 쓰면서 sha256을 계산한다.
+    (업로드 전체를 메모리에 올리지 않음 → 페이지 수/해상도와 관계없이 메모리 사용량 일정)
+    같은 사용자가 같은 내용을 다시 저장하면 새 행/파일 없이 기존 항목을 돌려준다.
+    반환: {"id": ..., "duplicate": bool, "size_bytes": ..., "page_count": ...}
+    실패 시 UploadRejected(status_code, detail).
     """
-    _ensure_db()
-    title = req.get("title") or "무제 카드뉴스"
-    zip_b64 = req.get("zip_b64")
-    if not zip_b64:
-        raise ValueError("zip_b64가 필요합니다.")
-
-    # 파일 저장
+    title = title or "무제 카드뉴스"
     user_dir = os.path.join(BASE_DIR, email, "cardnews")
     os.makedirs(user_dir, exist_ok=True)
-    fname = f"cardnews_{int(datetime.now().timestamp())}.zip"
-    save_path = os.path.join(user_dir, fname)
-    with open(save_path, "wb") as f:
-        f.write(base64.b64decode(zip_b64))
 
-    # DB insert
+    hasher = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=user_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(_UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise UploadRejected(413, f"업로드 용량 초과(최대 {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)")
+                hasher.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        if not size:
+            raise UploadRejected(400, "빈 파일입니다.")
+        page_count = await asyncio.to_thread(_count_pages, tmp_path)
+        if not page_count:
+            raise UploadRejected(400, "ZIP 파일이 아니거나 비어 있습니다.")
+        return await asyncio.to_thread(_commit_upload, email, title, tmp_path, hasher.hexdigest(), size, page_count)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _commit_upload(email: str, title: str, tmp_path: str, digest: str, size: int, page_count: int) -> dict:
+    """임시 파일을 내용 해시 이름으로 확정하고 DB에 기록(같은 해시가 있으면 기존 항목 재사용)."""
+    # /save 업로드와 /render save=true(stream_zip, render_to_assets)가 모두 여기로 온다
+    _ensure_db()
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
-    cur.execute("INSERT INTO cardnews (email, title, zip_path) VALUES (?, ?, ?)", (email, title, save_path))
-    conn.commit()
-    conn.close()
+    try:
+        cur.execute("SELECT id, zip_path FROM cardnews WHERE email=? AND content_hash=?", (email, digest))
+        row = cur.fetchone()
+        if row and os.path.exists(row[1]):
+            return {"id": row[0], "duplicate": True, "size_bytes": size, "page_count": page_count}
+
+        save_path = os.path.join(os.path.dirname(tmp_path), f"cardnews_{digest[:16]}.zip")
+        os.replace(tmp_path, save_path)
+        if row:
+            # 파일만 사라진 기존 항목: 같은 내용으로 다시 채움
+            cur.execute("UPDATE cardnews SET zip_path=?, size_bytes=?, page_count=? WHERE id=?",
+                        (save_path, size, page_count, row[0]))
+            conn.commit()
+            return {"id": row[0], "duplicate": True, "size_bytes": size, "page_count": page_count}
+        cur.execute("""
+            INSERT INTO cardnews (email, title, zip_path, size_bytes, page_count, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (email, content_hash) DO NOTHING
+        """, (email, title, save_path, size, page_count, digest))
+        inserted = cur.rowcount == 1   # 0이면 동시에 들어온 같은 저장이 먼저 기록함
+        conn.commit()
+        cur.execute("SELECT id FROM cardnews WHERE email=? AND content_hash=?", (email, digest))
+        return {"id": cur.fetchone()[0], "duplicate": not inserted, "size_bytes": size, "page_count": page_count}
+    finally:
+        conn.close()
+
+
+def _count_pages(src) -> int:
+    """ZIP 안의 이미지 파일 수(중앙 디렉터리만 읽음). 열 수 없으면 0."""
+    try:
+        with zipfile.ZipFile(src) as zf:
+            return sum(1 for n in zf.namelist() if not n.endswith("/"))
+    except (OSError, zipfile.BadZipFile):
+        return 0
 
 def get_history(email: str):
     """
-    반환 형식:
+    반환 형식(메타데이터만, ZIP 본문은 /cardnews/{id}/zip 으로 따로 받음):
     [
-      {"id": 1, "title": "...", "created_at": "...", "zip_b64": "..."},
+      {"id": 1, "title": "...", "created_at": "...", "size_bytes": 123456, "page_count": 5},
       ...
     ]
-    ※ zip 파일 내용을 base64로 함께 내려줘서 프론트가 곧바로 다운로드 버튼 생성 가능
     """
     _ensure_db()
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
-    cur.execute("SELECT id, title, zip_path, created_at FROM cardnews WHERE email=? ORDER BY created_at DESC", (email,))
+    cur.execute("""
+        SELECT id, title, zip_path, created_at, size_bytes, page_count
+        FROM cardnews WHERE email=? ORDER BY created_at DESC, id DESC
+    """, (email,))
     rows = cur.fetchall()
-    conn.close()
 
-    items = []
-    for rid, title, zip_path, created_at in rows:
-        try:
-            with open(zip_path, "rb") as f:
-                zb64 = base64.b64encode(f.read()).decode()
-        except Exception:
-            zb64 = ""
+    items, backfill = [], []
+    for rid, title, zip_path, created_at, size_bytes, page_count in rows:
+        if size_bytes is None or page_count is None:
+            # 컬럼 추가 전에 저장된 항목: 한 번만 계산해서 채워 둔다
+            try:
+                size_bytes = os.path.getsize(zip_path)
+                page_count = _count_pages(zip_path)
+            except OSError:
+                size_bytes, page_count = 0, 0
+            backfill.append((size_bytes, page_count, rid))
         items.append(
             {
                 "id": rid,
                 "title": title,
                 "created_at": created_at,
-                "zip_b64": zb64,
+                "size_bytes": size_bytes,
+                "page_count": page_count,
             }
         )
+    if backfill:
+        cur.executemany("UPDATE cardnews SET size_bytes=?, page_count=? WHERE id=?", backfill)
+        conn.commit()
+    conn.close()
     return items
+
+
+def get_zip_path(email: str, cardnews_id: int) -> str:
+    """본인 카드뉴스 ZIP 경로. 없으면 FileNotFoundError."""
+    _ensure_db()
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    cur.execute("SELECT zip_path FROM cardnews WHERE id=? AND email=?", (cardnews_id, email))
+    row = cur.fetchone()
+    conn.close()
+    if not row or not row[0] or not os.path.exists(row[0]):
+        raise FileNotFoundError(cardnews_id)
+    return row[0]
+
+
+# ---------------------------------------------------------
+# 합성용 이미지 자산 (배경/오버레이 업로드, 합성 결과 페이지)
+# ---------------------------------------------------------
+FONT_DIR = os.path.join("data", "fonts")
+MAX_ASSET_BYTES = int(os.getenv("CARDNEWS_MAX_ASSET_BYTES", str(20 * 1024 * 1024)))
+_ASSET_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_ASSET_EXT = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
+_ASSET_MIME = {".png": "image/png", ".jpg": "image/jpeg", ".webp": "image/webp"}
+# 자산은 사용자별로 마지막 사용 기준 오래된 것/넘치는 것부터 정리(저장한 카드뉴스 ZIP은 대상 아님). 0이면 해당 조건 끔
+ASSET_MAX_AGE_DAYS = float(os.getenv("CARDNEWS_ASSET_MAX_AGE_DAYS", "7"))
+ASSET_MAX_FILES = int(os.getenv("CARDNEWS_ASSET_MAX_FILES", "500"))
+ASSET_MAX_BYTES = int(os.getenv("CARDNEWS_ASSET_MAX_BYTES", str(500 * 1024 * 1024)))
+
+
+def _asset_dir(email: str) -> str:
+    return os.path.join(BASE_DIR, email, "cardnews_assets")
+
+
+def save_asset_bytes(email: str, data: bytes) -> str:
+    """이미지 bytes를 내용 해시 id로 저장(같은 이미지는 같은 id, 한 번만 기록). 이미지가 아니면 UploadRejected."""
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            fmt = im.format
+    except Exception:
+        raise UploadRejected(415, "이미지 파일을 인식할 수 없습니다.")
+    if fmt not in _ASSET_EXT:
+        raise UploadRejected(415, f"지원하지 않는 이미지 형식입니다: {fmt}")
+    asset_id = hashlib.sha256(data).hexdigest()[:32]
+    path = os.path.join(_asset_dir(email), asset_id + _ASSET_EXT[fmt])
+    if os.path.exists(path):
+        file_prune.touch(path)
+        return asset_id
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    file_prune.maybe_prune(_asset_dir(email), max_age_s=ASSET_MAX_AGE_DAYS * 86400,
+                           max_files=ASSET_MAX_FILES, max_bytes=ASSET_MAX_BYTES)
+    return asset_id
+
+
+async def save_asset_upload(email: str, upload) -> str:
+    """업로드 이미지를 청크로 받아(상한 CARDNEWS_MAX_ASSET_BYTES) 자산으로 저장하고 id 반환."""
+    buf = bytearray()
+    while True:
+        chunk = await upload.read(_UPLOAD_CHUNK)
+        if not chunk:
+            break
+        buf += chunk
+        if len(buf) > MAX_ASSET_BYTES:
+            raise UploadRejected(413, f"업로드 용량 초과(최대 {MAX_ASSET_BYTES // (1024 * 1024)}MB)")
+    if not buf:
+        raise UploadRejected(400, "빈 파일입니다.")
+    return await asyncio.to_thread(save_asset_bytes, email, bytes(buf))
+
+
+def asset_path(email: str, asset_id: str) -> str:
+    """(경로). id 형식이 잘못되면 ValueError, 없으면 FileNotFoundError."""
+    if not _ASSET_ID_RE.match(asset_id or ""):
+        raise ValueError("잘못된 asset id 입니다.")
+    for ext in _ASSET_MIME:
+        path = os.path.join(_asset_dir(email), asset_id + ext)
+        if os.path.exists(path):
+            file_prune.touch(path)   # 마지막 사용 시각 → 정리 순서
+            return path
+    raise FileNotFoundError(asset_id)
+
+
+def asset_mime(path: str) -> str:
+    return _ASSET_MIME.get(os.path.splitext(path)[1], "application/octet-stream")
+
+
+# ---------------------------------------------------------
+# 페이지 합성 (프로세스 풀에서 페이지별 병렬)
+# ---------------------------------------------------------
+def _font_path(font_name: Optional[str]) -> Optional[str]:
+    if not font_name:
+        return None
+    path = os.path.join(FONT_DIR, os.path.basename(font_name))
+    return path if os.path.exists(path) else None
+
+
+def _background(req: CardNewsRenderRequest, email: str) -> Image.Image:
+    """모든 페이지가 같이 쓰는 배경(RGBA). 한 번만 만들어 공유 메모리로 워커에 넘긴다."""
+    size = (req.width, req.height)
+    bg = req.background
+    if bg.method == "solid":
+        return Image.new("RGBA", size, hex_to_rgb(bg.color))
+    if bg.method == "gradient":
+        start = Image.new("RGBA", size, hex_to_rgb(bg.grad_start))
+        end = Image.new("RGBA", size, hex_to_rgb(bg.grad_end))
+        mask = Image.linear_gradient("L").resize((1, size[1])).resize(size)
+        return Image.composite(end, start, mask)
+    if not bg.image_id:
+        raise ValueError("background.image_id가 필요합니다.")
+    with Image.open(asset_path(email, bg.image_id)) as im:
+        return im.convert("RGBA").resize(size)
+
+
+def _load_overlay(email: str, asset_id: str) -> Image.Image:
+    with Image.open(asset_path(email, asset_id)) as im:
+        return im.convert("RGBA")
+
+
+def place_overlay(canvas: Image.Image, overlay: Image.Image, opacity: int = 100) -> Image.Image:
+    """오버레이를 캔버스 면적의 80% 크기로 맞춰 가운데에 얹는다."""
+    can = canvas.convert("RGBA")
+    W, H = can.size
+    ov = overlay.convert("RGBA")
+    target_area = int(W * H * 0.8)
+    ratio = ov.width / max(1, ov.height)
+    new_w = int((target_area * ratio) ** 0.5)
+    new_h = max(1, int(new_w / ratio))
+    ov = ov.resize((new_w, new_h), Image.LANCZOS)
+    if opacity < 100:
+        alpha = ov.split()[-1]
+        alpha = alpha.point(lambda p: int(p * (opacity / 100.0)))
+        ov.putalpha(alpha)
+    x = W // 2 - ov.width // 2
+    y = H // 2 - ov.height // 2
+    can.paste(ov, (x, y), ov)
+    return can
+
+
+def _render_page(bg_handle, overlay_handle, spec: dict) -> bytes:
+    """(워커 프로세스) 배경 + 오버레이 + 가운데 정렬 텍스트 → PNG bytes."""
+    base = load_shared(bg_handle)
+    if overlay_handle is not None:
+        base = place_overlay(base, load_shared(overlay_handle), opacity=spec["overlay_opacity"])
+    page = Image.new("RGB", base.size, (255, 255, 255))
+    page.paste(base, mask=base.getchannel("A"))
+
+    draw = ImageDraw.Draw(page)
+    try:
+        font = get_font(spec["font_path"], spec["font_size"]) if spec["font_path"] else ImageFont.load_default(spec["font_size"])
+    except OSError:
+        font = ImageFont.load_default(spec["font_size"])
+    W, H = page.size
+    wrapped = "\n".join(wrap_text(spec["text"], font, W * 0.84))
+    bbox = draw.multiline_textbbox((0, 0), wrapped, font=font, spacing=8)
+    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+    draw.multiline_text(((W - tw) / 2, (H - th) / 2), wrapped, fill=spec["font_color"], font=font,
+                        align="center", spacing=8)
+    return encode(page, "png")[0]
+
+
+def render_pages(req: CardNewsRenderRequest, email: str) -> Iterator[bytes]:
+    """
+    페이지 PNG를 순서대로 내보내는 이터레이터. 배경/오버레이 디코드와 검증은 여기서 바로 수행하므로
+    잘못된 asset id 등은 (스트리밍 시작 전에) ValueError/FileNotFoundError로 올라온다.
+    """
+    background = _background(req, email)
+    overlays = [_load_overlay(email, a) for a in req.overlay_ids]
+    font_path = _font_path(req.font_name)
+    specs = [
+        {"text": text or "", "font_path": font_path, "font_size": req.font_size,
+         "font_color": hex_to_rgb(req.font_color), "overlay_opacity": req.overlay_opacity}
+        for text in req.pages
+    ]
+    return _iter_pages(background, overlays, specs)
+
+
+def _iter_pages(background: Image.Image, overlays, specs) -> Iterator[bytes]:
+    with ExitStack() as stack:
+        bg = stack.enter_context(share_image(background))
+        ovs = [stack.enter_context(share_image(ov)) for ov in overlays]
+        futures = [
+            render_pool.submit(_render_page, bg, ovs[i % len(ovs)] if ovs else None, spec)
+            for i, spec in enumerate(specs)
+        ]
+        try:
+            for fut in futures:
+                yield fut.result()
+        finally:
+            # 클라이언트가 중간에 끊으면 아직 시작 안 한 페이지는 취소
+            for fut in futures:
+                fut.cancel()
+
+
+class _ZipSink:
+    """zipfile이 쓰는 바이트를 모아 두었다가 넘기고(스트리밍), 저장할 때는 파일/해시에도 같이 기록."""
+
+    def __init__(self, file=None):
+        self.buf = bytearray()
+        self.file = file
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, b) -> int:
+        self.buf += b
+        self.hasher.update(b)
+        self.size += len(b)
+        if self.file is not None:
+            self.file.write(b)
+        return len(b)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        out = bytes(self.buf)
+        self.buf.clear()
+        return out
+
+
+def _zip_info(index: int) -> zipfile.ZipInfo:
+    # 프론트 ZIP과 같은 규칙: 시각 고정 → 같은 결과물은 같은 바이트(저장 중복 제거)
+    info = zipfile.ZipInfo(f"card_{index:02d}.png", date_time=(1980, 1, 1, 0, 0, 0))
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def stream_zip(pages: Iterator[bytes], *, email: str = None, title: str = None, saved: dict = None) -> Iterator[bytes]:
+    """
+    페이지가 완성되는 대로 ZIP(무압축) 조각을 내보낸다. email이 주어지면 같은 바이트를
+    임시 파일에도 써 두었다가 끝나면 히스토리에 저장(_commit_upload, 해시 중복 제거)하고 결과를 saved에 채운다.
+    """
+    tmp_path = None
+    f = None
+    if email:
+        user_dir = os.path.join(BASE_DIR, email, "cardnews")
+        os.makedirs(user_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=user_dir, suffix=".part")
+        f = os.fdopen(fd, "wb")
+    try:
+        sink = _ZipSink(f)
+        count = 0
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as zf:
+            for count, data in enumerate(pages, start=1):
+                zf.writestr(_zip_info(count), data)
+                yield sink.take()
+        yield sink.take()
+        if f is not None:
+            f.close()
+            result = _commit_upload(email, title or "무제 카드뉴스", tmp_path, sink.hasher.hexdigest(), sink.size, count)
+            if saved is not None:
+                saved.update(result)
+    finally:
+        if f is not None and not f.closed:
+            f.close()
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def render_to_assets(req: CardNewsRenderRequest, email: str) -> dict:
+    """페이지를 합성해 자산으로 저장하고 id/URL 목록을 반환. save면 ZIP으로 히스토리에도 저장."""
+    ids = []
+
+    def _collect(pages):
+        for data in pages:
+            ids.append(save_asset_bytes(email, data))
+            yield data
+
+    pages = _collect(render_pages(req, email))
+    saved = {}
+    if req.save:
+        for _ in stream_zip(pages, email=email, title=req.title, saved=saved):
+            pass
+    else:
+        for _ in pages:
+            pass
+    return {
+        "pages": [{"index": i, "asset_id": a, "url": f"/cardnews/assets/{a}"} for i, a in enumerate(ids)],
+        "saved": saved or None,
+    }
+
+
+# ---------------------------------------------------------
+# 페이지 오버레이 이미지 일괄 생성 (동시 요청 + SSE)
+# ---------------------------------------------------------
+async def _generate_asset(email: str, prompt: str, model: str, size: str) -> str:
+    """이미지 한 장 생성 → 자산 저장 → asset id. 동시 실행 수/분당 이미지 수는 공용 리미터가 조절."""
+    resp = await alimited_call(
+        lambda: async_client.images.generate(
+            model=model,
+            prompt=str(prompt)[:2000],
+            size=size,
+            response_format=image_fetch.RESPONSE_FORMAT,
+        ),
+        model=model,
+        images=1,
+    )
+    data = await asyncio.to_thread(image_fetch.image_bytes, resp.data[0])
+    return await asyncio.to_thread(save_asset_bytes, email, data)
+
+
+async def stream_generated_images(req: CardNewsImagesRequest, email: str) -> AsyncIterator[str]:
+    """
+    모든 프롬프트를 동시에 요청하고, 완성되는 순서대로 SSE로 알린다(이미지 본문 대신 asset id).
+    - event: image data: {"index": 0, "asset_id": "...", "url": "/cardnews/assets/..."}
+    - event: error data: {"index": 2, "detail": "..."}
+    - event: done  data: {"asset_ids": [페이지 순서, 실패는 null], "failed": 1}
+    """
+    async def _indexed(i: int, prompt: str):
+        try:
+            return i, await _generate_asset(email, prompt, req.model, req.size), None
+        except Exception as e:
+            logger.exception("cardnews image %d failed: %s", i, e)
+            return i, None, str(e)
+
+    tasks = [asyncio.create_task(_indexed(i, p)) for i, p in enumerate(req.prompts)]
+    asset_ids = [None] * len(tasks)
+    try:
+        for fut in asyncio.as_completed(tasks):
+            i, asset_id, err = await fut
+            if err is not None:
+                yield sse.event("error", {"index": i, "detail": err})
+                continue
+            asset_ids[i] = asset_id
+            yield sse.event("image", {"index": i, "asset_id": asset_id, "url": f"/cardnews/assets/{asset_id}"})
+        yield sse.event("done", {"asset_ids": asset_ids, "failed": sum(1 for a in asset_ids if a is None)})
+    finally:
+        # 클라이언트가 중간에 끊으면 남은 생성 요청은 취소(리미터 슬롯도 반환됨)
+        for t in tasks:
+            t.cancel()
@@ -1,9 +1,9 @@
-﻿from openai import OpenAI
-from github import Github
+﻿from github import Github
 from pathlib import Path
 import os, json
+from utils.openai_utils import client, limited_call
+from utils.rate_limiter import estimate_tokens
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 GITHUB_TOKEN = os.getenv("GITHUB_HOMEPAGE_TOKEN")
 ORG_NAME = "codeit-last-project-team2"
 REPO_NAME = "homepage"
@@ -67,10 +67,14 @@ def generate_html(input_json):
     """
     json_str = json.dumps(input_json, ensure_ascii=False, indent=2)
 
-    response = client.responses.create(
+    response = limited_call(
+        lambda: client.responses.create(
+            model="gpt-5",
+            input=json_str,
+            instructions=system_prompt,
+        ),
         model="gpt-5",
-        input=json_str,
-        instructions=system_prompt,
+        tokens=estimate_tokens(system_prompt + json_str, 8000),
     )
 
     html = _extract_text(response).strip()
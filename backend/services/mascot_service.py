@@ -1,8 +1,7 @@
 from backend.models.mascot_model import MascotRequest, MascotHistoryItem
-from openai import OpenAI
+from utils.openai_utils import client, limited_call
 import os, sqlite3
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 DB_PATH = os.path.join("data", "user_info", "database.db")
 os.makedirs("data", exist_ok=True)
 
@@ -47,11 +46,15 @@ def generate_mascot_url_candidates(req: MascotRequest, num:int=3):
 
     urls = []
     for _ in range(num):
-        result = client.images.generate(
+        result = limited_call(
+            lambda: client.images.generate(
+                model="dall-e-3",
+                prompt=prompt,
+                size="1024x1024",
+                n=1,
+            ),
             model="dall-e-3",
-            prompt=prompt,
-            size="1024x1024",
-            n=1,
+            images=1,
         )
         urls.append(result.data[0].url)
     return urls
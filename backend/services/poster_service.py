@@ -1,19 +1,21 @@
 # backend/services/poster_service.py
-import os, sqlite3, requests, re, json
+import base64, os, sqlite3, re, json, threading, uuid
+from collections import OrderedDict
 from io import BytesIO
-from datetime import datetime
-from openai import OpenAI
-from fastapi.responses import StreamingResponse
-from PIL import Image, ImageDraw, ImageFont
+from fastapi.responses import Response
+from PIL import Image, ImageDraw
 from backend.models.poster_text_model import PosterTextResponse
-from backend.models.poster_image_model import PosterImageRequest
-
-# OpenAI 클라이언트
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from backend.models.poster_image_model import PosterImageRequest, PosterRenderRequest, PosterStyle, PosterVariantsRequest
+from utils import file_prune, image_fetch, render_pool
+from utils.image_output import encode, encode_and_save, save_bytes
+from utils.openai_utils import alimited_call, async_client, client, limited_call
+from utils.rate_limiter import estimate_tokens
+from utils.render_pool import load_shared, share_image
+from utils.text_layout import get_font, text_width, wrap_text
 
 # 경로 설정
 FONT_DIR = "data/fonts"
-DEFAULT_FONT = "NanumGothic.ttf"
+DEFAULT_FONT = "NanumSquareR.ttf"
 BASE_DIR = os.path.join("data", "user_info")
 DB_PATH = os.path.join(BASE_DIR, "database.db")
 
@@ -32,7 +34,8 @@ def parse_json_block(text: str):
 # ---------------------------------------------------------
 # 텍스트 생성
 # ---------------------------------------------------------
-def generate_text(req) -> PosterTextResponse:
+def build_text_prompt(req) -> str:
+    """매장/광고 정보로 포스터 텍스트 생성 프롬프트를 만든다(야간 배치 작업과 공용)."""
     store_name = getattr(req, "store_name", "")
     category = getattr(req, "category", "")
     address = getattr(req, "address", "")
@@ -52,7 +55,7 @@ def generate_text(req) -> PosterTextResponse:
     vibe = getattr(req, "vibe", "분위기 미정")
 
     # 프롬프트 생성
-    prompt = f"""
+    return f"""
     당신은 소상공인 광고 전문가입니다.
     아래 정보를 바탕으로 감성적이면서도 직관적인 광고 문구를 만들어주세요.
 
@@ -75,12 +78,9 @@ def generate_text(req) -> PosterTextResponse:
     }}
     """
 
-    res = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-    )
-    data = parse_json_block(res.choices[0].message.content)
+
+def parse_text_output(content: str) -> PosterTextResponse:
+    data = parse_json_block(content or "")
     return PosterTextResponse(
         title=data.get("TITLE_KO", "제목 미정"),
         body=data.get("BODY_KO", "본문 미정"),
@@ -88,6 +88,36 @@ def generate_text(req) -> PosterTextResponse:
     )
 
 
+def generate_text(req) -> PosterTextResponse:
+    prompt = build_text_prompt(req)
+    res = limited_call(
+        lambda: client.chat.completions.create(
+            model="gpt-4.1-mini",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+        ),
+        model="gpt-4.1-mini",
+        tokens=estimate_tokens(prompt, 500),
+    )
+    return parse_text_output(res.choices[0].message.content)
+
+
+async def agenerate_text(req) -> PosterTextResponse:
+    """generate_text의 async 버전(지연 꼬리 구간 헤지 대상 라우트: poster.text)."""
+    prompt = build_text_prompt(req)
+    res = await alimited_call(
+        lambda: async_client.chat.completions.create(
+            model="gpt-4.1-mini",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+        ),
+        model="gpt-4.1-mini",
+        tokens=estimate_tokens(prompt, 500),
+        hedge_route="poster.text",
+    )
+    return parse_text_output(res.choices[0].message.content)
+
+
 # ---------------------------------------------------------
 # 색상 hex → RGBA 변환 유틸
 # ---------------------------------------------------------
@@ -105,75 +135,276 @@ def _hex_to_rgba(hex_color: str, alpha: int = 255):
 
 
 # ---------------------------------------------------------
-# 이미지 생성
+# 배경 이미지 자산 (DALL·E 결과를 id로 보관 → 스타일만 바꿀 때 재생성하지 않음)
 # ---------------------------------------------------------
-def generate_image(req: PosterImageRequest, email: str):
-    # ✅ 폰트 경로 처리
-    font_name = getattr(req, "font_name", DEFAULT_FONT)
-    font_path = os.path.join(FONT_DIR, font_name)
-    if not os.path.exists(font_path):
-        font_path = os.path.join(FONT_DIR, DEFAULT_FONT)
+BASE_CACHE_MAX = int(os.getenv("POSTER_BASE_CACHE", "16"))
+# 디스크의 배경 원본은 사용자별로 오래된 것/넘치는 것부터 정리(마지막 사용 기준). 0이면 해당 조건 끔
+BASE_MAX_AGE_DAYS = float(os.getenv("POSTER_BASE_MAX_AGE_DAYS", "14"))
+BASE_MAX_FILES = int(os.getenv("POSTER_BASE_MAX_FILES", "100"))
+_BASE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_base_lock = threading.Lock()
+_bases: "OrderedDict[tuple, Image.Image]" = OrderedDict()   # (email, base_id) -> 디코드된 RGBA
+
+
+def _base_path(email: str, base_id: str) -> str:
+    return os.path.join(BASE_DIR, email, "poster_base", f"{base_id}.png")
+
+
+def _cache_base(email: str, base_id: str, img: Image.Image) -> None:
+    with _base_lock:
+        _bases[(email, base_id)] = img
+        _bases.move_to_end((email, base_id))
+        while len(_bases) > BASE_CACHE_MAX:
+            _bases.popitem(last=False)
 
-    # ✅ 이미지 생성
-    resp = client.images.generate(
-        model="dall-e-3",
-        prompt=req.dalle_prompt,
-        size=req.dalle_size,
-    )
-    img_url = resp.data[0].url
-    img = Image.open(BytesIO(requests.get(img_url).content)).convert("RGBA")
 
+def load_base(email: str, base_id: str) -> Image.Image:
+    """
+    배경 이미지(RGBA). 메모리 LRU → 디스크 순으로 찾는다.
+    id 형식이 잘못되면 ValueError, 없으면 FileNotFoundError.
+    """
+    if not _BASE_ID_RE.match(base_id or ""):
+        raise ValueError("잘못된 base_image_id 입니다.")
+    path = _base_path(email, base_id)
+    with _base_lock:
+        img = _bases.get((email, base_id))
+        if img is not None:
+            _bases.move_to_end((email, base_id))
+    if img is not None:
+        file_prune.touch(path)   # 메모리에서 쓰는 동안 디스크 원본이 정리되지 않도록
+        return img
+    with Image.open(path) as im:
+        img = im.convert("RGBA")
+    file_prune.touch(path)
+    _cache_base(email, base_id, img)
+    return img
+
+
+def _new_base(email: str, raw: bytes) -> tuple:
+    """DALL·E 원본 바이트를 재인코딩 없이 그대로 저장하고 (base_id, RGBA 이미지) 반환."""
+    base_id = uuid.uuid4().hex
+    img = Image.open(BytesIO(raw)).convert("RGBA")
+    path = _base_path(email, base_id)
+    save_bytes(path, raw)
+    _cache_base(email, base_id, img)
+    file_prune.maybe_prune(os.path.dirname(path), max_age_s=BASE_MAX_AGE_DAYS * 86400, max_files=BASE_MAX_FILES)
+    return base_id, img
+
+
+# ---------------------------------------------------------
+# 텍스트 합성
+# ---------------------------------------------------------
+def _font_path(font_name) -> str:
+    """
+    font_name → data/fonts 안의 실제 폰트 경로. 파일명만 쓰므로(basename) 폴더 밖은 가리킬 수 없다.
+    없으면 DEFAULT_FONT, 그것도 없으면 폴더의 첫 .ttf. 폰트가 하나도 없으면 FileNotFoundError.
+    """
+    for name in (os.path.basename(font_name or ""), DEFAULT_FONT):
+        if name:
+            font_path = os.path.join(FONT_DIR, name)
+            if os.path.isfile(font_path):
+                return font_path
+    fonts = sorted(f for f in os.listdir(FONT_DIR) if f.lower().endswith((".ttf", ".otf")))
+    if not fonts:
+        raise FileNotFoundError(f"{FONT_DIR}에 폰트 파일이 없습니다.")
+    return os.path.join(FONT_DIR, fonts[0])
+
+
+def _overlay(base: Image.Image, style) -> Image.Image:
+    """배경 복사본에 제목/본문을 그린다(배경 원본은 캐시에 그대로 둠)."""
+    img = base.copy()
     draw = ImageDraw.Draw(img)
 
-    # ✅ 선택한 폰트로 텍스트 그리기
-    font_title = ImageFont.truetype(font_path, req.title_font_size)
-    font_body = ImageFont.truetype(font_path, req.body_font_size)
-
-    title_fill = _hex_to_rgba(req.title_color)
-    body_fill = _hex_to_rgba(req.body_color)
-    stroke_title = _hex_to_rgba(req.stroke_color_title)
-    stroke_body = _hex_to_rgba(req.stroke_color_body)
-
-    y_title = {"top": 60, "center": img.height // 3}.get(req.position, img.height - 400)
-
-    # ✅ 텍스트 줄바꿈
-    def wrap_text(text, font, max_width):
-        words = text.split()
-        lines, line = [], ""
-        for w in words:
-            test = f"{line} {w}".strip()
-            if draw.textlength(test, font=font) <= max_width:
-                line = test
-            else:
-                lines.append(line)
-                line = w
-        if line:
-            lines.append(line)
-        return lines
+    # ✅ 선택한 폰트로 텍스트 그리기 (폰트는 (경로, 크기)별로 캐시)
+    font_path = _font_path(getattr(style, "font_name", None))
+    font_title = get_font(font_path, style.title_font_size)
+    font_body = get_font(font_path, style.body_font_size)
+
+    title_fill = _hex_to_rgba(style.title_color)
+    body_fill = _hex_to_rgba(style.body_color)
+    stroke_title = _hex_to_rgba(style.stroke_color_title)
+    stroke_body = _hex_to_rgba(style.stroke_color_body)
+
+    y_title = {"top": 60, "center": img.height // 3}.get(style.position, img.height - 400)
 
+    # ✅ 텍스트 줄바꿈(어절 단위, 띄어쓰기 없는 긴 한글은 음절 단위) → utils/text_layout.py
     max_width = img.width - 120
     y = y_title
 
-    for line in wrap_text(req.title, font_title, max_width):
+    for line in wrap_text(style.title, font_title, max_width):
         draw.text((60, y), line, font=font_title, fill=title_fill,
-                  stroke_width=req.stroke_width_title, stroke_fill=stroke_title)
-        y += req.title_font_size + 10
+                  stroke_width=style.stroke_width_title, stroke_fill=stroke_title)
+        y += style.title_font_size + 10
 
-    for line in wrap_text(req.body, font_body, max_width):
+    for line in wrap_text(style.body, font_body, max_width):
         draw.text((60, y), line, font=font_body, fill=body_fill,
-                  stroke_width=req.stroke_width_body, stroke_fill=stroke_body)
-        y += req.body_font_size + 5
+                  stroke_width=style.stroke_width_body, stroke_fill=stroke_body)
+        y += style.body_font_size + 5
+    return img
+
+
+def _save_and_respond(img: Image.Image, style, email: str, base_id: str, save: bool = True) -> Response:
+    """한 번만 인코딩 → 같은 바이트로 파일 저장(백그라운드)과 응답을 함께 처리."""
+    def _record(save_path):
+        # 파일이 완성된 뒤에 DB에 기록(히스토리에 없는 파일이 보이지 않도록)
+        conn = sqlite3.connect(DB_PATH)
+        cur = conn.cursor()
+        _ensure_table(cur)
+        cur.execute("INSERT INTO poster (email, text, image_path) VALUES (?, ?, ?)",
+                    (email, f"{style.title}\n{style.body}", save_path))
+        poster_id = cur.lastrowid
+        conn.commit()
+        conn.close()
+        # 히스토리 첫 조회가 썸네일 생성을 기다리지 않도록 저장 직후 미리 만들어 둠
+        try:
+            get_thumbnail(email, poster_id, save_path)
+        except Exception:
+            pass
+
+    if save:
+        data_dir = os.path.join(BASE_DIR, email, "poster_img")
+        # /poster/render는 수 ms 만에 끝나 같은 초에 여러 번 저장될 수 있으므로 초 단위 시각 대신 uuid
+        stem = f"poster_{uuid.uuid4().hex}"
+        data, mime, _ = encode_and_save(img, data_dir, stem, style.output_format, on_saved=_record)
+    else:
+        data, mime, _ = encode(img, style.output_format)
+    return Response(content=data, media_type=mime, headers={"X-Base-Image-Id": base_id})
 
-    # ✅ 파일 저장
-    data_dir = os.path.join(BASE_DIR, email, "poster_img")
-    os.makedirs(data_dir, exist_ok=True)
-    filename = f"poster_{int(datetime.now().timestamp())}.png"
-    save_path = os.path.join(data_dir, filename)
-    img.save(save_path)
 
-    # ✅ DB 저장
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
+# ---------------------------------------------------------
+# 이미지 생성
+# ---------------------------------------------------------
+def generate_image(req: PosterImageRequest, email: str):
+    # ✅ 이미지 생성
+    resp = limited_call(
+        lambda: client.images.generate(
+            model="dall-e-3",
+            prompt=req.dalle_prompt,
+            size=req.dalle_size,
+            response_format=image_fetch.RESPONSE_FORMAT,
+        ),
+        model="dall-e-3",
+        images=1,
+    )
+    # b64_json이면 디코드만, url이면 풀링된 세션으로 타임아웃/크기 상한을 두고 다운로드
+    base_id, base = _new_base(email, image_fetch.image_bytes(resp.data[0]))
+
+    # ✅ 응답 (이미지 바이너리 + 배경 id 헤더 → 이후 /poster/render로 스타일만 변경)
+    return _save_and_respond(_overlay(base, req), req, email, base_id)
+
+
+def render_poster(req: PosterRenderRequest, email: str):
+    """저장된 배경(base_image_id)에 스타일만 다시 합성. DALL·E 호출 없음."""
+    base = load_base(email, req.base_image_id)
+    return _save_and_respond(_overlay(base, req), req, email, req.base_image_id, save=req.save)
+
+
+# ---------------------------------------------------------
+# 변형 비교 (위치 × 폰트 조합을 프로세스 풀에서 병렬 합성)
+# ---------------------------------------------------------
+VARIANTS_MAX = int(os.getenv("POSTER_VARIANTS_MAX", "12"))
+VARIANT_SET_CACHE = int(os.getenv("POSTER_VARIANT_SET_CACHE", "4"))
+VARIANT_FORMAT = os.getenv("POSTER_VARIANT_FORMAT", "webp")   # 비교용이라 output_format이 없으면 인코딩이 빠른 webp
+SHEET_CELL = 256
+_SHEET_LABEL_H = 28
+_variant_lock = threading.Lock()
+_variant_sets: "OrderedDict[tuple, dict]" = OrderedDict()   # (email, set_id) -> {"renders", "sheet"}
+
+
+def _render_variant(handle, style: dict, fmt):
+    """(워커 프로세스) 공유 배경 + 스타일 하나 → (인코딩 bytes, mime, 시트용 축소 RGB bytes, 축소 크기)"""
+    img = _overlay(load_shared(handle), PosterStyle(**style))
+    data, mime, _ = encode(img, fmt)
+    # 시트 칸은 정수 배율 축소(reduce)로 충분하다(thumbnail 대비 약 3배 빠름)
+    cell = img.reduce(max(1, -(-max(img.size) // SHEET_CELL))).convert("RGB")
+    return data, mime, cell.tobytes(), cell.size
+
+
+def _contact_sheet(cells, labels, fonts, columns: int) -> tuple:
+    """축소본들을 columns열 격자로 붙이고 칸마다 번호/위치/폰트 라벨을 단다."""
+    cw = max(size[0] for _, size in cells)
+    ch = max(size[1] for _, size in cells) + _SHEET_LABEL_H
+    rows = (len(cells) + columns - 1) // columns
+    sheet = Image.new("RGB", (cw * columns, ch * rows), (255, 255, 255))
+    draw = ImageDraw.Draw(sheet)
+    for i, ((raw, size), label, font_name) in enumerate(zip(cells, labels, fonts)):
+        x, y = (i % columns) * cw, (i // columns) * ch
+        sheet.paste(Image.frombytes("RGB", size, raw), (x, y))
+        font = get_font(_font_path(font_name), 16)
+        while len(label) > 1 and text_width(label, font) > cw - 12:
+            label = label[:-2] + "…"
+        draw.text((x + 6, y + size[1] + 5), label, font=font, fill=(40, 40, 40))
+    data, mime, _ = encode(sheet, "jpeg")
+    return data, mime
+
+
+def render_variants(req: PosterVariantsRequest, email: str) -> dict:
+    """
+    배경 하나에 positions × font_names 조합을 합성. 배경 픽셀은 공유 메모리에 한 번만 올리고
+    워커들이 나눠 그린다. 결과(개별 이미지 + 비교용 컨택트 시트)는 set id로 잠시 보관.
+    """
+    positions = list(dict.fromkeys(req.positions))
+    # 실제로 쓰일 폰트 파일명으로 먼저 바꾼다(없는 폰트/null → 기본 폰트). 같은 폰트로 귀결되는 항목은 하나로.
+    fonts = list(dict.fromkeys(os.path.basename(_font_path(f)) for f in (req.font_names or [None])))
+    if not positions:
+        raise ValueError("positions가 비어 있습니다.")
+    if len(positions) * len(fonts) > VARIANTS_MAX:
+        raise ValueError(f"변형은 한 번에 최대 {VARIANTS_MAX}개까지 만들 수 있습니다. (요청: {len(positions) * len(fonts)}개)")
+
+    base = load_base(email, req.base_image_id)
+    common = req.model_dump(exclude={"base_image_id", "positions", "font_names"})
+    grid = [(p, f) for f in fonts for p in positions]
+    fmt = req.output_format or VARIANT_FORMAT
+    with share_image(base) as handle:
+        futures = [render_pool.submit(_render_variant, handle, {**common, "position": p, "font_name": f}, fmt)
+                   for p, f in grid]
+        results = [fut.result() for fut in futures]
+
+    labels = [f"{i + 1}. {p} · {os.path.splitext(f)[0]}" for i, (p, f) in enumerate(grid)]
+    sheet = _contact_sheet([(r[2], r[3]) for r in results], labels, [f for _, f in grid], len(positions))
+
+    set_id = uuid.uuid4().hex
+    with _variant_lock:
+        _variant_sets[(email, set_id)] = {"renders": [(r[0], r[1]) for r in results], "sheet": sheet}
+        while len(_variant_sets) > VARIANT_SET_CACHE:
+            _variant_sets.popitem(last=False)
+
+    return {
+        "variant_set_id": set_id,
+        "base_image_id": req.base_image_id,
+        "columns": len(positions),
+        "sheet_url": f"/poster/variants/{set_id}/sheet",
+        "variants": [
+            {"index": i, "position": p, "font_name": f, "url": f"/poster/variants/{set_id}/{i}"}
+            for i, (p, f) in enumerate(grid)
+        ],
+    }
+
+
+def get_variant(email: str, set_id: str, index) -> tuple:
+    """보관 중인 변형 결과 (bytes, mime). index="sheet"면 컨택트 시트. 없으면(만료 포함) FileNotFoundError."""
+    with _variant_lock:
+        entry = _variant_sets.get((email, set_id))
+    if entry is None:
+        raise FileNotFoundError(set_id)
+    if index == "sheet":
+        return entry["sheet"]
+    try:
+        return entry["renders"][int(index)]
+    except (ValueError, IndexError):
+        raise FileNotFoundError(index)
+
+
+# ---------------------------------------------------------
+# 히스토리 조회 (keyset 페이지네이션 + 썸네일)
+# ---------------------------------------------------------
+HISTORY_PAGE_DEFAULT = int(os.getenv("POSTER_HISTORY_PAGE", "12"))
+HISTORY_PAGE_MAX = 60
+THUMB_SIZE = int(os.getenv("POSTER_THUMB_SIZE", "256"))
+THUMB_QUALITY = 80
+
+
+def _ensure_table(cur) -> None:
     cur.execute("""
         CREATE TABLE IF NOT EXISTS poster (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -183,39 +414,107 @@ def generate_image(req: PosterImageRequest, email: str):
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    cur.execute("INSERT INTO poster (email, text, image_path) VALUES (?, ?, ?)",
-                (email, f"{req.title}\n{req.body}", save_path))
-    conn.commit()
-    conn.close()
+    # 히스토리 페이지 조회: (email, created_at, id) 인덱스만 따라 LIMIT개 읽고 멈춤
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_poster_email_created ON poster (email, created_at, id)")
 
-    # ✅ 응답 (이미지 바이너리 반환)
-    buf = BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-    return StreamingResponse(buf, media_type="image/png")
 
+def _encode_cursor(created_at: str, poster_id: int) -> str:
+    raw = f"{created_at}|{poster_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
-# ---------------------------------------------------------
-# 히스토리 조회
-# ---------------------------------------------------------
-def get_history(email: str):
+
+def _decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, poster_id = raw.rsplit("|", 1)
+        return created_at, int(poster_id)
+    except Exception:
+        raise ValueError("잘못된 cursor 값입니다.")
+
+
+def get_history(email: str, *, limit: int = None, cursor: str = None):
+    """
+    최신순 히스토리 한 페이지. 반환: (items, next_cursor)
+    cursor는 직전 페이지 마지막 항목의 (created_at, id) → OFFSET 없이 인덱스에서 바로 이어 읽는다.
+    """
+    limit = max(1, min(HISTORY_PAGE_MAX, int(limit or HISTORY_PAGE_DEFAULT)))
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
-    cur.execute("""
-        SELECT id, text, image_path, created_at 
-        FROM poster 
-        WHERE email = ? 
-        ORDER BY created_at DESC
-    """, (email,))
+    _ensure_table(cur)
+    if cursor:
+        created_at, last_id = _decode_cursor(cursor)
+        cur.execute("""
+            SELECT id, text, image_path, created_at
+            FROM poster
+            WHERE email = ? AND (created_at < ? OR (created_at = ? AND id < ?))
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """, (email, created_at, created_at, last_id, limit + 1))
+    else:
+        cur.execute("""
+            SELECT id, text, image_path, created_at
+            FROM poster
+            WHERE email = ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        """, (email, limit + 1))
     rows = cur.fetchall()
     conn.close()
 
-    return [
+    next_cursor = _encode_cursor(rows[limit - 1][3], rows[limit - 1][0]) if len(rows) > limit else None
+    items = [
         {
             "id": r[0],
             "text": r[1],
             "image_path": r[2],
-            "created_at": r[3]
+            "created_at": r[3],
+            "thumb_url": f"/poster/{r[0]}/thumb",
+            "image_url": f"/poster/{r[0]}/image",
         }
-        for r in rows
+        for r in rows[:limit]
     ]
+    return items, next_cursor
+
+
+def get_poster_path(email: str, poster_id: int) -> str:
+    """본인 포스터의 원본 경로. 없으면 FileNotFoundError."""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    _ensure_table(cur)
+    cur.execute("SELECT image_path FROM poster WHERE id = ? AND email = ?", (poster_id, email))
+    row = cur.fetchone()
+    conn.close()
+    if not row or not row[0] or not os.path.exists(row[0]):
+        raise FileNotFoundError(poster_id)
+    return row[0]
+
+
+def thumbnail_etag(email: str, poster_id: int):
+    """(원본 경로, ETag). ETag는 원본 파일의 크기/수정 시각 + 썸네일 설정으로 계산(썸네일을 읽지 않음)."""
+    path = get_poster_path(email, poster_id)
+    st = os.stat(path)
+    return path, f'"{poster_id}-{st.st_mtime_ns:x}-{st.st_size:x}-{THUMB_SIZE}"'
+
+
+def get_thumbnail(email: str, poster_id: int, path: str = None) -> bytes:
+    """
+    THUMB_SIZE px WebP 썸네일. 처음 요청 때 만들어 poster_thumb/에 저장하고,
+    원본이 바뀌지 않았으면 저장본을 그대로 읽는다.
+    """
+    path = path or get_poster_path(email, poster_id)
+    thumb_path = os.path.join(BASE_DIR, email, "poster_thumb", f"{poster_id}_{THUMB_SIZE}.webp")
+    try:
+        if os.path.getmtime(thumb_path) >= os.path.getmtime(path):
+            with open(thumb_path, "rb") as f:
+                return f.read()
+    except OSError:
+        pass
+
+    with Image.open(path) as img:
+        img.draft("RGB", (THUMB_SIZE, THUMB_SIZE))  # JPEG은 디코드 단계에서 축소
+        img.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        buf = BytesIO()
+        img.save(buf, format="WEBP", quality=THUMB_QUALITY, method=0)
+    data = buf.getvalue()
+    save_bytes(thumb_path, data)
+    return data
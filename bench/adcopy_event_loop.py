@@ -0,0 +1,83 @@
+# bench/adcopy_event_loop.py
+# /adcopy/text 생성이 몰려 있는 동안 관계없는 요청(/docs)의 지연을 재는 부하 테스트.
+# - blocking: 예전 방식 재현(async def 라우트 안에서 동기 call_openai_model 호출 → 이벤트 루프 정지)
+# - async   : 현재 /adcopy/text (acall_openai_model, await 대기)
+# 백엔드 앱을 이 프로세스에서 uvicorn으로 띄우고, OpenAI 호출은 대역 서버로 보낸다.
+#
+# 실행(저장소 루트에서):
+#   python -m utils.openai_stub_server --port 8100 --latency fixed:3000
+#   OPENAI_BASE_URL=http://127.0.0.1:8100/v1 python -m bench.adcopy_event_loop --concurrency 20
+import argparse, asyncio, os, statistics, threading, time
+
+os.environ.setdefault("RENDER_POOL_WARM", "0")
+
+import httpx
+import uvicorn
+
+from backend.auth import get_current_user
+from backend.main import app
+from backend.models.adcopy_model import AdcopyTextRequest
+from backend.models.create_text_model import generate_ad_copies
+
+
+# 기준(변경 전) 동작: 동기 호출을 async 라우트에서 그대로 실행
+@app.post("/bench/blocking-text")
+async def _blocking_text(req: AdcopyTextRequest):
+    return generate_ad_copies(req.product, req.tone, req.length, req.num_copies, req.model, use_cache=False)
+
+
+def _serve(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _run(base: str, path: str, concurrency: int, probe_interval: float) -> dict:
+    body = {"product": "수제 쿠키", "tone": "친근한", "length": "short", "num_copies": 3, "no_cache": True}
+    probes = []
+    async with httpx.AsyncClient(base_url=base, timeout=120) as c:
+        await c.get("/docs")
+        start = time.perf_counter()
+        gens = [asyncio.create_task(c.post(path, json={**body, "product": f"수제 쿠키 {i}"}))
+                for i in range(concurrency)]
+        while not all(g.done() for g in gens):
+            t = time.perf_counter()
+            await c.get("/docs")
+            probes.append((time.perf_counter() - t) * 1000)
+            await asyncio.sleep(probe_interval)
+        codes = [g.result().status_code for g in gens]
+        wall = time.perf_counter() - start
+    probes.sort()
+    return {
+        "generations": f"{codes.count(200)}/{len(codes)} ok",
+        "wall_s": round(wall, 2),
+        "probe_n": len(probes),
+        "probe_p50_ms": round(statistics.median(probes), 1),
+        "probe_p95_ms": round(probes[min(len(probes) - 1, int(len(probes) * 0.95))], 1),
+        "probe_max_ms": round(probes[-1], 1),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="생성 요청 중 무관한 요청 지연 측정(blocking vs async)")
+    ap.add_argument("--port", type=int, default=8199)
+    ap.add_argument("--concurrency", type=int, default=20)
+    ap.add_argument("--probe-interval", type=float, default=0.05, help="프로브 간격(초)")
+    args = ap.parse_args()
+    if not os.getenv("OPENAI_BASE_URL"):
+        raise SystemExit("OPENAI_BASE_URL을 대역 서버로 지정하세요 (예: http://127.0.0.1:8100/v1)")
+
+    app.dependency_overrides[get_current_user] = lambda: {"email": "bench@example.com"}
+    server = _serve(args.port)
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for name, path in (("blocking", "/bench/blocking-text"), ("async", "/adcopy/text")):
+            print(name, asyncio.run(_run(base, path, args.concurrency, args.probe_interval)))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
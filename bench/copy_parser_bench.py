@@ -0,0 +1,104 @@
+# bench/copy_parser_bench.py
+# 광고 문구 파서 마이크로 벤치마크: 예전 parse_copies(정규식 단계별 재시도) vs utils.copy_parser.
+# 코퍼스는 모델 원문 형태별(JSON, 코드펜스, 앞뒤 설명문, 번호/불릿 목록, 잘린 JSON) 합성 샘플이며
+# --corpus로 기록해 둔 원문(JSONL, 줄마다 JSON 문자열 하나)을 줄 수 있다.
+# 같은 입력을 조각으로 나눠 넣어도(스트리밍) 통째로 넣은 결과와 같은지도 확인한다.
+#
+# 실행: python -m bench.copy_parser_bench [--runs 5000] [--corpus raw_outputs.jsonl]
+import argparse, json, random, re, time
+from typing import List
+
+from utils.copy_parser import CopyParser, parse_copies
+
+
+# 기준(변경 전) 구현
+def legacy_parse_copies(raw_output: str) -> List[str]:
+    if not raw_output:
+        return []
+    s = raw_output.strip()
+    m = re.search(r"```(?:json)?\s*(.*?)```", s, re.S | re.I)
+    if m:
+        try:
+            data = json.loads(m.group(1).strip())
+            if isinstance(data, dict) and isinstance(data.get("copies"), list):
+                arr = [str(x).strip() for x in data["copies"] if isinstance(x, (str, int, float))]
+                arr = [x for x in arr if x]
+                if arr:
+                    return arr
+        except Exception:
+            pass
+    if "{" in s and "}" in s:
+        i, j = s.find("{"), s.rfind("}")
+        if j > i:
+            try:
+                data = json.loads(s[i:j + 1])
+                if isinstance(data, dict) and isinstance(data.get("copies"), list):
+                    arr = [str(x).strip() for x in data["copies"] if isinstance(x, (str, int, float))]
+                    arr = [x for x in arr if x]
+                    if arr:
+                        return arr
+            except Exception:
+                pass
+    parts = re.split(r"\n{2,}|\n+|•|–|-|\d+[.)]", s)
+    copies = [p.strip(" -•\t\"'") for p in parts if p and p.strip()]
+    return [c for c in copies if len(c) > 1 and not c.lower().startswith(("note:", "주의", "info:"))]
+
+
+_KO = "따뜻한 아메리카노 한 잔으로 하루를 시작하세요. 진한 향과 부드러운 맛이 여러분을 기다립니다"
+
+
+def build_corpus(seed: int = 0) -> dict:
+    """형태별 샘플 {이름: [원문, ...]} (문구 5개 기준)"""
+    r = random.Random(seed)
+    out = {k: [] for k in ("json", "fenced", "prose", "numbered", "truncated")}
+    for _ in range(20):
+        cs = [_KO[:r.randint(20, len(_KO))] + f" {i}" for i in range(5)]
+        j = json.dumps({"copies": cs}, ensure_ascii=False)
+        out["json"].append(j)
+        out["fenced"].append("```json\n" + j + "\n```")
+        out["prose"].append("다음은 문구입니다:\n" + j + "\n참고하세요.")
+        out["numbered"].append("\n".join(f"{i + 1}. {c}" for i, c in enumerate(cs)))
+        out["truncated"].append(j[: len(j) * 2 // 3])
+    return out
+
+
+def _per_call_us(fn, samples: List[str], runs: int) -> float:
+    start = time.perf_counter()
+    for i in range(runs):
+        fn(samples[i % len(samples)])
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def _chunked(text: str, r: random.Random) -> List[str]:
+    p, i = CopyParser(), 0
+    while i < len(text):
+        k = r.randint(1, 7)
+        p.feed(text[i:i + k])
+        i += k
+    return p.finish()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="parse_copies 기준 구현 vs 단일 패스 증분 파서")
+    ap.add_argument("--runs", type=int, default=5000)
+    ap.add_argument("--corpus", default=None, help="기록된 원문 JSONL (줄마다 JSON 문자열)")
+    args = ap.parse_args()
+
+    corpus = build_corpus()
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            corpus["recorded"] = [json.loads(l) for l in f if l.strip()]
+
+    r = random.Random(1)
+    print(f"{'shape':10s} {'legacy us':>10s} {'new us':>8s}  copies(legacy→new)  chunked==whole")
+    for name, samples in corpus.items():
+        old = _per_call_us(legacy_parse_copies, samples, args.runs)
+        new = _per_call_us(parse_copies, samples, args.runs)
+        n_old = sum(len(legacy_parse_copies(s)) for s in samples) / len(samples)
+        n_new = sum(len(parse_copies(s)) for s in samples) / len(samples)
+        same = all(_chunked(s, r) == parse_copies(s) for s in samples)
+        print(f"{name:10s} {old:10.1f} {new:8.1f}  {n_old:5.1f} → {n_new:<5.1f}       {same}")
+
+
+if __name__ == "__main__":
+    main()
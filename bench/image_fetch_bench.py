@@ -0,0 +1,60 @@
+# bench/image_fetch_bench.py
+# 생성 이미지 받아오기: url 응답 + 호출마다 새 연결 requests.get(변경 전)
+# vs url 응답 + utils.image_fetch 풀 세션 vs b64_json 응답(다운로드 왕복 없음), 각 중앙값.
+# 마스코트 후보처럼 url 여러 개를 받을 때 순차 requests.get vs image_fetch.fetch_many 도 비교한다.
+#
+# 실행: 대역 서버를 다운로드 지연과 함께 띄운 뒤
+#   python -m utils.openai_stub_server --port 8100 --image-latency fixed:300 --fetch-latency fixed:150
+#   OPENAI_BASE_URL=http://127.0.0.1:8100/v1 python -m bench.image_fetch_bench
+import argparse, statistics, time
+
+import requests
+
+from utils import image_fetch
+from utils.openai_utils import client
+
+
+def _generate(fmt: str, i: int):
+    kw = {"response_format": "b64_json"} if fmt == "b64_json" else {}
+    return client.images.generate(model="dall-e-3", prompt=f"bench {i}", size="1024x1024", **kw).data[0]
+
+
+# 기준(변경 전) 구현: url을 받아 호출마다 새 연결로 내려받는다
+def legacy_bytes(i: int) -> bytes:
+    return requests.get(_generate("url", i).url, timeout=20).content
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="생성 이미지 받아오기: bare requests.get vs 풀 세션 vs b64_json")
+    ap.add_argument("-n", type=int, default=8, help="방식별 반복 횟수")
+    ap.add_argument("--candidates", type=int, default=3, help="동시에 받을 후보 url 수")
+    args = ap.parse_args()
+
+    cases = (
+        ("url + bare requests.get", legacy_bytes),
+        ("url + pooled image_bytes", lambda i: image_fetch.image_bytes(_generate("url", i))),
+        ("b64_json", lambda i: image_fetch.image_bytes(_generate("b64_json", i))),
+    )
+    for name, fn in cases:
+        times = []
+        for i in range(args.n):
+            start = time.perf_counter()
+            data = fn(i)
+            times.append((time.perf_counter() - start) * 1000)
+        print(f"{name:26s} median {statistics.median(times):6.0f} ms  ({len(data) // 1024} KB)")
+
+    urls = [_generate("url", 100 + i).url for i in range(args.candidates)]
+    start = time.perf_counter()
+    for url in urls:
+        requests.get(url, timeout=20).content
+    seq = (time.perf_counter() - start) * 1000
+    urls = [_generate("url", 200 + i).url for i in range(args.candidates)]
+    start = time.perf_counter()
+    image_fetch.fetch_many(urls)
+    par = (time.perf_counter() - start) * 1000
+    print(f"{args.candidates} candidate downloads: sequential {seq:.0f} ms, fetch_many {par:.0f} ms")
+    print(image_fetch.stats())
+
+
+if __name__ == "__main__":
+    main()
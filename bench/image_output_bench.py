@@ -0,0 +1,90 @@
+# bench/image_output_bench.py
+# 생성 이미지 출력 단계: 포맷별 인코딩 시간/크기와 요청 경로 비용.
+# - 포스터: 1024px RGBA(사진형 배경 + 한글 텍스트), 카드: 1080px RGB(그라디언트 + 텍스트)
+# - 예전 요청 경로: PNG(level 6) 두 번(파일 저장 + 응답용 BytesIO), 파일 쓰기는 요청 스레드에서
+# - 현재 요청 경로: utils.image_output.encode_and_save (한 번 인코딩, 파일 쓰기는 백그라운드)
+#
+# 실행: python -m bench.image_output_bench
+import argparse, io, os, tempfile, time
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from utils import image_output
+from utils.text_layout import get_font, wrap_text
+
+FONT = os.path.join("data", "fonts", "NanumSquareB.ttf")
+
+
+def poster() -> Image.Image:
+    small = Image.merge("RGB", [Image.effect_noise((256, 256), 80) for _ in range(3)])
+    im = small.resize((1024, 1024), Image.BICUBIC).filter(ImageFilter.GaussianBlur(1))
+    grain = Image.merge("RGB", [Image.effect_noise((1024, 1024), 20) for _ in range(3)])
+    im = Image.blend(im, grain, 0.15).convert("RGBA")
+    d, f = ImageDraw.Draw(im), get_font(FONT, 80)
+    for i, line in enumerate(wrap_text("오늘만 특가 세일 진행중 여러분 모두 환영합니다", f, 904)):
+        d.text((60, 600 + i * 90), line, font=f, fill=(255, 255, 255, 255), stroke_width=3, stroke_fill=(0, 0, 0, 255))
+    return im
+
+
+def card() -> Image.Image:
+    im = Image.new("RGB", (1080, 1080))
+    d = ImageDraw.Draw(im)
+    for y in range(1080):
+        d.line([(0, y), (1080, y)], fill=(245 - y * 27 // 1080, 246 - y * 22 // 1080, 250 - y * 12 // 1080))
+    f = get_font(FONT, 48)
+    for i, line in enumerate(wrap_text("초보를 위한 ETF 가이드 — 분산투자의 기본부터 수수료 비교까지 한 번에 정리했습니다", f, 900)):
+        d.text((90, 400 + i * 60), line, font=f, fill=(20, 20, 20))
+    return im
+
+
+# 기준(변경 전) 구현: 파일 저장과 응답용 인코딩을 따로 해서 PNG level 6 두 번, 쓰기는 요청 스레드에서
+def legacy_request_path(im: Image.Image, out_dir: str) -> bytes:
+    im.save(os.path.join(out_dir, "legacy.png"))
+    buf = io.BytesIO()
+    im.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _ms(fn, n: int):
+    start = time.perf_counter()
+    for _ in range(n):
+        out = fn()
+    return (time.perf_counter() - start) / n * 1000, out
+
+
+def _png(im, level):
+    buf = io.BytesIO()
+    im.save(buf, format="PNG", compress_level=level)
+    return buf.getvalue()
+
+
+def _webp(im, method):
+    buf = io.BytesIO()
+    im.save(buf, format="WEBP", quality=image_output.QUALITY, method=method)
+    return buf.getvalue()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="출력 포맷별 인코딩 시간/크기, 예전/현재 요청 경로 비교")
+    ap.add_argument("-n", type=int, default=5, help="반복 횟수")
+    args = ap.parse_args()
+    out_dir = tempfile.mkdtemp(prefix="image_output_bench_")
+
+    for name, im in (("poster 1024 RGBA photo", poster()), ("card 1080 RGB gradient", card())):
+        print(name)
+        for level in (6, 3, 1):
+            ms, data = _ms(lambda: _png(im, level), args.n)
+            print(f"  png level {level}      {ms:6.1f} ms {len(data) / 1024:6.0f} KB")
+        for method in (0, 4):
+            ms, data = _ms(lambda: _webp(im, method), args.n)
+            print(f"  webp q{image_output.QUALITY} m{method}     {ms:6.1f} ms {len(data) / 1024:6.0f} KB")
+        ms, (data, _, _) = _ms(lambda: image_output.encode(im, "jpeg"), args.n)
+        print(f"  jpeg q{image_output.QUALITY}        {ms:6.1f} ms {len(data) / 1024:6.0f} KB")
+        old, _ = _ms(lambda: legacy_request_path(im, out_dir), args.n)
+        new, _ = _ms(lambda: image_output.encode_and_save(im, out_dir, "new", "png"), args.n)
+        print(f"  request path: legacy (PNG x2 + sync write) {old:.0f} ms, "
+              f"new (PNG level {image_output.PNG_LEVEL} x1, async write) {new:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
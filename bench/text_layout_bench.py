@@ -0,0 +1,99 @@
+# bench/text_layout_bench.py
+# 포스터/카드뉴스 텍스트 줄바꿈: 예전 poster_service 중첩 wrap_text(어절마다 누적 문자열 전체를 textlength)
+# vs utils.text_layout.wrap_text(글리프 advance 캐시, 한 번 훑기).
+# 무작위 한국어 본문 길이/줄 폭별 ms/회, 폰트 로드(truetype) vs get_font 캐시,
+# 그리고 무작위 문자열 퍼징(넘치는 줄 없음, 글자 보존)을 함께 확인한다.
+#
+# 실행: python -m bench.text_layout_bench [--font NanumSquareR.ttf]
+import argparse, os, random, time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from utils import text_layout as tl
+
+FONT_DIR = os.path.join("data", "fonts")
+_WORDS = ["따뜻한", "커피", "한", "잔과", "함께하는", "여유로운", "오후", "지금", "바로", "방문하세요",
+          "신메뉴가", "준비되어", "있습니다", "특별할인", "이벤트"]
+
+
+# 기준(변경 전) 구현: 공백으로만 나누고, 어절마다 늘어나는 줄 전체를 다시 잰다
+def legacy_wrap(draw, text: str, font, max_width: float):
+    lines, line = [], ""
+    for w in text.split():
+        test = f"{line} {w}".strip()
+        if draw.textlength(test, font=font) <= max_width:
+            line = test
+        else:
+            lines.append(line)
+            line = w
+    if line:
+        lines.append(line)
+    return lines
+
+
+def _ms(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def _fuzz(path: str, n: int = 300) -> tuple:
+    """(검사한 wrap 수, 폭을 넘은 줄 수). 글자가 빠지거나 늘면 AssertionError."""
+    r = random.Random(3)
+    chars = "가나다라마바사아자차카타파하 ,.!?ABCabc한글폰트테스트"
+    total = overflow = 0
+    for size in (30, 50, 80):
+        font = tl.get_font(path, size)
+        for _ in range(n):
+            text = "".join(r.choice(chars) for _ in range(r.randint(5, 300)))
+            max_width = r.randint(200, 900)
+            for mode in ("keep-all", "break-all"):
+                lines = tl.wrap_text(text, font, max_width, break_mode=mode)
+                total += 1
+                for line in lines:
+                    core = line.rstrip("".join(tl._NO_LINE_START))
+                    if len(core) > 1 and font.getlength(core) > max_width:
+                        overflow += 1
+                assert "".join(lines).replace(" ", "") == text.replace(" ", ""), (text, lines)
+    return total, overflow
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="줄바꿈: 예전 중첩 wrap_text vs utils.text_layout")
+    ap.add_argument("--font", default="NanumSquareR.ttf", help="data/fonts 안의 폰트 파일명")
+    ap.add_argument("--size", type=int, default=50)
+    args = ap.parse_args()
+    path = os.path.join(FONT_DIR, args.font)
+    draw = ImageDraw.Draw(Image.new("RGBA", (8, 8)))
+    r = random.Random(0)
+
+    print(f"{args.font} {args.size}px, ms per wrap")
+    print(f"{'chars':>6s} {'width':>6s} {'legacy':>8s} {'new':>7s}")
+    for n_words in (50, 300, 1000):
+        text = " ".join(r.choice(_WORDS) for _ in range(n_words))
+        for width in (904, 4000):
+            legacy_font = ImageFont.truetype(path, args.size)
+            font = tl.get_font(path, args.size)
+            tl.wrap_text(text, font, width)   # 글리프 advance 캐시 채우기
+            n = 20 if width == 904 else 5
+            old = _ms(lambda: legacy_wrap(draw, text, legacy_font, width), n)
+            new = _ms(lambda: tl.wrap_text(text, tl.get_font(path, args.size), width), n)
+            print(f"{len(text):6d} {width:6d} {old:8.2f} {new:7.2f}")
+
+    load = _ms(lambda: ImageFont.truetype(path, 80), 50)
+    cached = _ms(lambda: tl.get_font(path, 80), 50)
+    print(f"truetype() {load:.3f} ms, cached get_font() {cached * 1000:.1f} us")
+
+    title = "오늘만특가세일진행중입니다여러분모두환영합니다정말로감사"
+    f80 = tl.get_font(path, 80)
+    print("unspaced title @904: legacy",
+          [round(draw.textlength(l, font=f80)) for l in legacy_wrap(draw, title, f80, 904)], "px,",
+          "new", [round(f80.getlength(l)) for l in tl.wrap_text(title, f80, 904)], "px")
+
+    total, overflow = _fuzz(path)
+    print(f"fuzz: {total} wraps, {overflow} overflowing lines, characters preserved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# bench/upload_memory_bench.py
+# /adcopy/image 업로드 처리의 요청당 최대 메모리(peak RSS)와 CPU 시간.
+# - legacy: await file.read() 전체 → 전체 디코드 → 2048px → PNG optimize (변경 전)
+# - new   : utils.image_intake.read_image_upload(청크 읽기 + 헤더 확인 + 축소 디코드) → image_payload
+# 측정마다 새 프로세스를 띄워 peak RSS가 섞이지 않게 한다(Linux/macOS, resource 모듈 필요).
+# 처리 비용을 재는 것이 목적이라 업로드 용량 상한(IMAGE_MAX_UPLOAD_BYTES)은 64MB로 올려서 실행한다.
+# 기본 입력은 48MP JPEG / 12MP PNG 합성 이미지(임시 폴더에 생성). --image로 실제 파일 지정 가능.
+#
+# 실행: python -m bench.upload_memory_bench [--image a.jpg --image b.png]
+import argparse, asyncio, io, os, resource, subprocess, sys, tempfile, time
+
+from PIL import Image, ImageFilter
+
+
+def _peak_mb() -> float:
+    # Linux의 ru_maxrss는 exec 후에도 부모 값을 물려받으므로 프로세스별 VmHWM을 우선 사용
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _child(path: str, mode: str) -> None:
+    # 임포트까지 끝난 뒤를 기준선으로 잡는다
+    from starlette.datastructures import UploadFile
+    from utils import image_payload
+    from utils.image_intake import read_image_upload
+
+    base = _peak_mb()
+    start = time.process_time()
+    with open(path, "rb") as f:
+        if mode == "legacy":
+            data = f.read()
+            with Image.open(io.BytesIO(data)) as im:
+                im = im.convert("RGB")
+                w, h = im.size
+                if max(w, h) > 2048:
+                    r = 2048 / float(max(w, h))
+                    im = im.resize((int(w * r), int(h * r)))
+                im.save(io.BytesIO(), format="PNG", optimize=True)
+        else:
+            data = asyncio.run(read_image_upload(UploadFile(file=f)))
+            image_payload.image_data_uri(data, detail="high")
+    cpu = (time.process_time() - start) * 1000
+    print(f"{os.path.basename(path):14s} {mode:6s} peak_rss +{_peak_mb() - base:6.1f} MB  cpu {cpu:6.0f} ms")
+
+
+def _make_inputs(out_dir: str) -> list:
+    paths = []
+    for name, size, fmt in (("photo_48mp.jpg", (8000, 6000), "JPEG"), ("photo_12mp.png", (4000, 3000), "PNG")):
+        small = Image.merge("RGB", [Image.effect_noise((800, 600), 80) for _ in range(3)])
+        im = small.resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(1))
+        grain = Image.merge("RGB", [Image.effect_noise(size, 20) for _ in range(3)])
+        im = Image.blend(im, grain, 0.15)
+        path = os.path.join(out_dir, name)
+        im.save(path, fmt, **({"quality": 95} if fmt == "JPEG" else {}))
+        del im, grain
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="업로드 처리 요청당 peak RSS: 예전 경로 vs 스트리밍 intake")
+    ap.add_argument("--image", action="append", default=[], help="입력 이미지(여러 번 지정 가능)")
+    ap.add_argument("--child", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        _child(*args.child)
+        return
+
+    env = {**os.environ, "IMAGE_MAX_UPLOAD_BYTES": os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(64 * 1024 * 1024))}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.image or _make_inputs(tmp)
+        for path in paths:
+            print(f"{os.path.basename(path)}: {os.path.getsize(path) / 1e6:.1f} MB")
+            for mode in ("legacy", "new"):
+                subprocess.run([sys.executable, "-m", "bench.upload_memory_bench", "--child", path, mode],
+                               check=True, env=env)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# bench/vision_payload_bench.py
+# 비전 입력 인코딩 CPU 시간/크기: 예전 _img_to_png_bytes(전체 디코드 → 2048px → PNG optimize)
+# vs utils.image_payload(detail별 목표 크기, JPEG draft 축소 디코드, 내용 해시 캐시).
+# 기본 입력은 12MP 사진형 합성 JPEG. --image로 실제 사진을 줄 수 있다.
+#
+# 실행: python -m bench.vision_payload_bench [--image photo.jpg]
+import argparse, base64, io, time
+
+from PIL import Image, ImageFilter
+
+from utils import image_payload
+
+
+# 기준(변경 전) 구현: 호출마다 디코드 + 리사이즈 + PNG optimize 재인코딩
+def legacy_data_uri(image_bytes: bytes, max_side: int = 2048) -> str:
+    with Image.open(io.BytesIO(image_bytes)) as im:
+        im = im.convert("RGB")
+        w, h = im.size
+        if max(w, h) > max_side:
+            r = max_side / float(max(w, h))
+            im = im.resize((int(w * r), int(h * r)))
+        out = io.BytesIO()
+        im.save(out, format="PNG", optimize=True)
+    return "data:image/png;base64," + base64.b64encode(out.getvalue()).decode()
+
+
+def synthetic_photo(size=(4000, 3000)) -> bytes:
+    """사진과 비슷하게 압축되는 합성 이미지(저주파 색 + 잔 노이즈), JPEG q90."""
+    small = Image.merge("RGB", [Image.effect_noise((400, 300), 80) for _ in range(3)])
+    im = small.resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+    grain = Image.merge("RGB", [Image.effect_noise(size, 8) for _ in range(3)])
+    im = Image.blend(im, grain, 0.08)
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def _cpu_ms(fn, n: int):
+    start = time.process_time()
+    for _ in range(n):
+        out = fn()
+    return (time.process_time() - start) / n * 1000, len(out)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="비전 입력 인코딩: 예전 PNG 경로 vs image_payload")
+    ap.add_argument("--image", default=None, help="입력 이미지 파일(기본: 12MP 합성 JPEG)")
+    ap.add_argument("-n", type=int, default=3, help="반복 횟수")
+    args = ap.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            data = f.read()
+    else:
+        data = synthetic_photo()
+    with Image.open(io.BytesIO(data)) as im:
+        print(f"input {im.format} {im.size[0]}x{im.size[1]} {len(data) / 1e6:.1f}MB")
+
+    ms, size = _cpu_ms(lambda: legacy_data_uri(data), args.n)
+    print(f"  legacy PNG 2048 optimize : {ms:7.0f} ms cpu  {size / 1e6:5.2f} MB data URI")
+    for detail in ("high", "low"):
+        def miss():
+            image_payload.clear()
+            return image_payload.image_data_uri(data, detail=detail)[0]
+        ms, size = _cpu_ms(miss, args.n)
+        print(f"  {detail:4s} cache miss          : {ms:7.0f} ms cpu  {size / 1e6:5.2f} MB")
+    image_payload.image_data_uri(data, detail="high")
+    ms, _ = _cpu_ms(lambda: image_payload.image_data_uri(data, detail="high")[0], 20)
+    print(f"  cache hit (sha256)       : {ms:7.1f} ms cpu")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # 사용자로부터 브랜드/상품/톤/길이/개수/모델 입력 받아 백엔드 /poster/text 호출. 원문(디버그) + 파싱 결과 표시.
 
 # frontend/pages/create_text.py
+import json
 import requests
 import streamlit as st
 
@@ -18,7 +19,8 @@ headers = {"Authorization": f"Bearer {st.session_state.token}"}
 # ------------------------
 # 백엔드 호출 함수
 # ------------------------
-def generate_ad_copy(product, num_copies, tone, length):
+def stream_ad_copy(product, num_copies, tone, length, no_cache=False):
+    """/adcopy/text/stream(SSE)를 읽어 (event, data)를 도착 순서대로 yield"""
     model = MODEL_BY_LENGTH.get(length, "gpt-5-mini")
     payload = {
         "product": product,
@@ -26,17 +28,25 @@ def generate_ad_copy(product, num_copies, tone, length):
         "length": length,
         "num_copies": num_copies,
         "model": model,
+        "no_cache": no_cache,
     }
-    r = requests.post(f"{BACKEND_URL}/adcopy/text", json=payload, headers=headers, timeout=60)
-    if r.ok:
-        return r.json()
-    else:
-        try:
-            err = r.json()
-            detail = err.get("detail") or r.text
-        except Exception:
-            detail = r.text
-        raise RuntimeError(f"API {r.status_code} - {detail}")
+    with requests.post(f"{BACKEND_URL}/adcopy/text/stream", json=payload, headers=headers,
+                       stream=True, timeout=60) as r:
+        if not r.ok:
+            try:
+                err = r.json()
+                detail = err.get("detail") or r.text
+            except Exception:
+                detail = r.text
+            raise RuntimeError(f"API {r.status_code} - {detail}")
+        event = None
+        for line in r.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                yield event, json.loads(line[len("data:"):].strip())
     
 # --- 도움말 (접기/펼치기) ---
 with st.expander("❓ 도움말", expanded=False):
@@ -95,6 +105,9 @@ MODEL_BY_LENGTH = {
 # 생성 개수
 num_copies = st.number_input("생성할 문구 개수", min_value=1, max_value=10, value=3)
 
+# 같은 조건이면 이전 결과를 재사용(캐시). 체크 시 새로 생성
+no_cache = st.checkbox("새로 생성 (이전 결과 재사용 안 함)", value=False)
+
 # ------------------------
 # 3️⃣ 문구 생성 버튼
 # ------------------------
@@ -102,18 +115,21 @@ if st.button("문구 생성"):
     if not product:
         st.warning("상품명을 입력해주세요.")
     else:
-        with st.spinner("문구 생성 중..."):
-            try:
-                result = generate_ad_copy(product, num_copies, tone, length)
-
-                # 파싱된 문구 출력
-                st.subheader("생성 결과")
-                copies = result.get("copies", [])
-                if copies:
-                    for i, c in enumerate(copies, 1):
-                        st.write(f"{i}. {c}")
-                else:
-                    st.warning("생성된 문구가 없습니다.")
-
-            except Exception as e:
-                st.error(f"문구 생성 중 오류 발생: {e}")
+        st.subheader("생성 결과")
+        placeholder = st.empty()
+        lines = []
+        try:
+            with st.spinner("문구 생성 중..."):
+                # 문구가 하나 완성될 때마다 바로 표시
+                for event, data in stream_ad_copy(product, num_copies, tone, length, no_cache):
+                    if event == "copy":
+                        lines.append(f"{data['index'] + 1}. {data['text']}")
+                        placeholder.markdown("\n\n".join(lines))
+                    elif event == "error":
+                        raise RuntimeError(data.get("detail"))
+
+            if not lines:
+                st.warning("생성된 문구가 없습니다.")
+
+        except Exception as e:
+            st.error(f"문구 생성 중 오류 발생: {e}")
@@ -66,6 +66,9 @@ MODEL_BY_LENGTH = {
 # 생성 개수
 num_copies = st.number_input("생성할 문구 개수", min_value=1, max_value=10, value=3)
 
+# 같은 조건이면 이전 결과를 재사용(캐시). 체크 시 새로 생성
+no_cache = st.checkbox("새로 생성 (이전 결과 재사용 안 함)", value=False)
+
 
 # ------------------------
 # 3️⃣ 문구 생성 버튼
@@ -73,7 +76,7 @@ num_copies = st.number_input("생성할 문구 개수", min_value=1, max_value=1
 if uploaded_file and st.button("이미지로 문구 생성"):
     files = {"file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
     model = MODEL_BY_LENGTH.get(length, "gpt-5-mini")
-    data = {"tone": tone, "length": length, "num_copies": num_copies, "model": model}
+    data = {"tone": tone, "length": length, "num_copies": num_copies, "model": model, "no_cache": no_cache}
 
     try:
         with st.spinner("생성 중... (이미지 → 모델 호출)"):
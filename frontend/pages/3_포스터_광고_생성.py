@@ -208,71 +208,199 @@ if go:
         st.success("✅ 포스터 생성 완료!")
         st.image(img_bytes, caption=text_data["title"], width=500)
 
+        # 배경 id 보관 → 이후 스타일만 바꿀 때 DALL·E 재생성 없이 /poster/render 사용
+        st.session_state.poster_last = {
+            "base_image_id": img_res.headers.get("X-Base-Image-Id"),
+            "title": text_data["title"],
+            "body": text_data["body"],
+        }
+
+# -----------------------------
+# 스타일만 다시 적용 (배경 이미지 재사용)
+# -----------------------------
+last = st.session_state.get("poster_last")
+if last and last.get("base_image_id") and not go:
+    st.markdown("#### 🖌️ 스타일 변경")
+    st.caption("색상/폰트/크기/위치를 바꾼 뒤 아래 버튼을 누르면 배경은 그대로 두고 글자만 다시 합성합니다.")
+    save_restyle = st.checkbox("히스토리에 저장", value=False)
+    if st.button("🖌️ 현재 스타일로 다시 합성"):
+        render_payload = {
+            "base_image_id": last["base_image_id"],
+            "title": last["title"],
+            "body": last["body"],
+            "position": position,
+            "title_color": title_color,
+            "body_color": body_color,
+            "title_font_size": title_font_size,
+            "body_font_size": body_font_size,
+            "font_name": selected_font or "",
+            "stroke_color_title": "#000000",
+            "stroke_color_body": "#000000",
+            "stroke_width_title": 2,
+            "stroke_width_body": 2,
+            "save": save_restyle,
+            # 미리보기는 JPEG(인코딩 수 ms), 저장할 때만 기본 포맷(PNG)
+            "output_format": None if save_restyle else "jpeg",
+        }
+        res = requests.post(f"{BACKEND_URL}/poster/render", json=render_payload, headers=headers)
+        if res.status_code == 200:
+            st.image(BytesIO(res.content), caption=last["title"], width=500)
+        elif res.status_code == 404:
+            st.warning("배경 이미지가 만료되었습니다. 포스터를 다시 생성해주세요.")
+        else:
+            st.error(f"❌ 재합성 실패: {res.text}")
+
+    # -----------------------------
+    # 위치 × 폰트 한꺼번에 비교 (최대 12개)
+    # -----------------------------
+    st.markdown("#### 🧩 레이아웃 비교")
+    compare_positions = st.multiselect("비교할 위치", ["top", "center", "bottom"], default=["top", "center", "bottom"])
+    compare_fonts = st.multiselect("비교할 폰트 (최대 4개)", fonts, default=fonts[:1], max_selections=4)
+    if st.button("🧩 변형 한꺼번에 보기") and compare_positions:
+        variants_payload = {
+            "base_image_id": last["base_image_id"],
+            "title": last["title"],
+            "body": last["body"],
+            "positions": compare_positions,
+            "font_names": compare_fonts or [None],
+            "title_color": title_color,
+            "body_color": body_color,
+            "title_font_size": title_font_size,
+            "body_font_size": body_font_size,
+            "stroke_color_title": "#000000",
+            "stroke_color_body": "#000000",
+            "stroke_width_title": 2,
+            "stroke_width_body": 2,
+        }
+        res = requests.post(f"{BACKEND_URL}/poster/variants", json=variants_payload, headers=headers, timeout=30)
+        if res.status_code == 200:
+            st.session_state.poster_variants = res.json()
+        elif res.status_code == 404:
+            st.warning("배경 이미지가 만료되었습니다. 포스터를 다시 생성해주세요.")
+        else:
+            st.error(f"❌ 변형 합성 실패: {res.text}")
+
+    variants = st.session_state.get("poster_variants")
+    if variants and variants.get("base_image_id") == last["base_image_id"]:
+        sheet = requests.get(f"{BACKEND_URL}{variants['sheet_url']}", headers=headers, timeout=10)
+        if sheet.status_code == 200:
+            st.image(sheet.content, caption="번호를 골라 크게 보거나, 같은 위치/폰트로 위에서 다시 합성해 저장하세요.",
+                     use_container_width=True)
+            labels = {f"{v['index'] + 1}. {v['position']} · {v['font_name'] or '기본 폰트'}": v for v in variants["variants"]}
+            picked = st.selectbox("크게 볼 변형", list(labels))
+            one = requests.get(f"{BACKEND_URL}{labels[picked]['url']}", headers=headers, timeout=10)
+            if one.status_code == 200:
+                st.image(one.content, width=500)
+        else:
+            st.warning("변형 결과가 만료되었습니다. 다시 요청해주세요.")
+
 # -----------------------------
 # 히스토리 불러오기
 # -----------------------------
 st.divider()
 st.subheader("📜 내가 만든 포스터 히스토리")
 
+def load_history_page(cursor=None):
+    """히스토리 한 페이지(메타데이터 + 썸네일)를 불러와 poster_history 뒤에 붙인다. 원본은 다운로드할 때만 받음."""
+    params = {"cursor": cursor} if cursor else {}
+    res = requests.get(f"{BACKEND_URL}/poster/history", params=params, headers=headers, timeout=10)
+    if res.status_code != 200:
+        st.error("❌ 히스토리 요청 실패")
+        return
+    body = res.json()
+    thumbs = st.session_state.poster_thumbs  # id → (etag, bytes)
+    for item in body.get("history", []):
+        pid = item["id"]
+        cached = thumbs.get(pid)
+        thumb_headers = dict(headers)
+        if cached:
+            thumb_headers["If-None-Match"] = cached[0]
+        t = requests.get(f"{BACKEND_URL}{item['thumb_url']}", headers=thumb_headers, timeout=10)
+        if t.status_code == 200:
+            thumbs[pid] = (t.headers.get("ETag", ""), t.content)
+        elif t.status_code != 304:
+            continue
+        lines = (item.get("text") or "").split("\n")
+        st.session_state.poster_history.append({
+            "id": pid,
+            "title": lines[0],
+            "body": "\n".join(lines[1:]),
+            "image_url": item["image_url"],
+            "thumb_bytes": thumbs[pid][1],
+        })
+    st.session_state.poster_history_cursor = body.get("next_cursor")
+
+
+if "poster_thumbs" not in st.session_state:
+    st.session_state.poster_thumbs = {}
+if "poster_history_cursor" not in st.session_state:
+    st.session_state.poster_history_cursor = None
+if "poster_full" not in st.session_state:
+    st.session_state.poster_full = {}  # id → 원본 bytes (다운로드 요청한 것만)
+
 if st.button("📂 히스토리 불러오기"):
     try:
-        res = requests.get(f"{BACKEND_URL}/poster/history", headers=headers, timeout=10)
-        if res.status_code == 200:
-            data = res.json().get("history", [])
-            st.session_state.poster_history = []
-
-            for item in data:
-                path = item.get("image_path")
-                if path and os.path.exists(path):
-                    with open(path, "rb") as f:
-                        img_bytes = f.read()
-                    st.session_state.poster_history.append({
-                        "title": item["text"].split("\n")[0],
-                        "body": "\n".join(item["text"].split("\n")[1:]),
-                        "dalle_prompt": "",
-                        "image_bytes": img_bytes
-                    })
-            st.success(f"✅ {len(st.session_state.poster_history)}개의 포스터를 불러왔습니다!")
-        else:
-            st.error("❌ 히스토리 요청 실패")
+        st.session_state.poster_history = []
+        load_history_page()
+        st.success(f"✅ {len(st.session_state.poster_history)}개의 포스터를 불러왔습니다!")
     except Exception as e:
         st.error(f"요청 오류: {e}")
 
-    # -----------------------------
-    # 히스토리 표시 (선택버튼 제거)
-    # -----------------------------
-    st.markdown("""
-    <style>
-    /* 포스터 썸네일 공통 스타일 */
-    .poster-grid img {
-    border-radius: 8px;
-    box-shadow: 0 1px 4px rgba(0,0,0,0.1);
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
-    if st.session_state.poster_history:
-        posters = list(reversed(st.session_state.poster_history))
-        num_cols = 3
-
-        for row_start in range(0, len(posters), num_cols):
-            cols = st.columns(num_cols, gap="small")
-            # 현재 줄의 포스터들
-            row_items = posters[row_start:row_start + num_cols]
-            for idx, (col, ad) in enumerate(zip(cols, row_items)):
-                with col:
-                    # 본문/캡션
-                    st.caption(ad["body"])
-                    # 이미지 (bytes 바로 사용)
-                    st.image(ad["image_bytes"], caption=None, use_container_width=True)
+# -----------------------------
+# 히스토리 표시 (썸네일 + 원본은 요청 시 다운로드)
+# -----------------------------
+st.markdown("""
+<style>
+/* 포스터 썸네일 공통 스타일 */
+.poster-grid img {
+border-radius: 8px;
+box-shadow: 0 1px 4px rgba(0,0,0,0.1);
+}
+</style>
+""", unsafe_allow_html=True)
+
+if st.session_state.poster_history:
+    posters = st.session_state.poster_history
+    num_cols = 3
+
+    for row_start in range(0, len(posters), num_cols):
+        cols = st.columns(num_cols, gap="small")
+        # 현재 줄의 포스터들
+        row_items = posters[row_start:row_start + num_cols]
+        for col, ad in zip(cols, row_items):
+            with col:
+                # 본문/캡션
+                st.caption(ad["body"])
+                # 썸네일 (256px WebP)
+                st.image(ad["thumb_bytes"], caption=None, use_container_width=True)
+                full = st.session_state.poster_full.get(ad["id"])
+                if full is None:
+                    if st.button("📥 원본 받기", key=f"prepare_{ad['id']}", use_container_width=True):
+                        r = requests.get(f"{BACKEND_URL}{ad['image_url']}", headers=headers, timeout=30)
+                        if r.status_code == 200:
+                            st.session_state.poster_full[ad["id"]] = (r.content, r.headers.get("content-type", "image/png"))
+                            st.rerun()
+                        else:
+                            st.error("❌ 원본을 불러오지 못했습니다.")
+                else:
+                    data, mime = full
+                    ext = {"image/webp": "webp", "image/jpeg": "jpg"}.get(mime.split(";")[0], "png")
                     # 다운로드 버튼 (고유 key 필수)
                     st.download_button(
                         "📥 다운로드",
-                        data=ad["image_bytes"],
-                        file_name=f"{ad['title'] or 'poster'}_{row_start+idx+1}.png",
-                        mime="image/png",
+                        data=data,
+                        file_name=f"{ad['title'] or 'poster'}_{ad['id']}.{ext}",
+                        mime=mime,
                         use_container_width=True,
-                        key=f"download_{row_start}_{idx}"  # ← 고유 키
+                        key=f"download_{ad['id']}"  # ← 고유 키
                     )
-    else:
-        st.info("아직 생성된 포스터 히스토리가 없습니다.")
+
+    if st.session_state.poster_history_cursor:
+        if st.button("⬇️ 더 보기", use_container_width=True):
+            try:
+                load_history_page(st.session_state.poster_history_cursor)
+                st.rerun()
+            except Exception as e:
+                st.error(f"요청 오류: {e}")
+else:
+    st.info("아직 생성된 포스터 히스토리가 없습니다.")
@@ -1,8 +1,6 @@
 # frontend/pages/2_카드뉴스_생성.py
 import sys, os
-import io
-import base64
-import zipfile
+import json
 from datetime import datetime
 from typing import List, Tuple
 
@@ -17,6 +15,7 @@ if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
 from backend.services.cardnews_service import hex_to_rgb
+from utils.text_layout import get_font
 
 BACKEND_URL = "http://127.0.0.1:8000"
 
@@ -40,67 +39,76 @@ if "project" not in st.session_state:
         "lang": "ko",
 
         "page_texts": [],
-        "base_images": [],
-        "overlay_images": [],
-        "final_images": [],
+        # 합성은 백엔드(/cardnews/render)에서: 여기에는 스펙과 asset id만 보관
+        "background": {"method": "gradient", "color": "#F5F6FA", "grad_start": "#F5F6FA", "grad_end": "#DAE0EE"},
+        "overlay_ids": [],
+        "final_pages": [],      # 합성 결과 PNG bytes (미리보기용)
+        "saved_id": None,       # 히스토리에 저장된 카드뉴스 id (ZIP 다운로드)
 
         "img_size": (1080, 1080),
         "bg_method": "그라디언트",
-        "bg_color": (245, 246, 250),
-        "grad_start": (245, 246, 250),
-        "grad_end": (218, 224, 238),
 
+        "font_name": None,
         "font_path": None,
         "font_size": 48,
-        "font_color": (20, 20, 20),
+        "font_color": "#141414",
         "overlay_opacity": 100,
     }
 
 proj = st.session_state.project
 
 
-def export_zip_from_images(images: List[Image.Image]) -> bytes:
-    mem = io.BytesIO()
-    with zipfile.ZipFile(mem, "w", zipfile.ZIP_DEFLATED) as zf:
-        for i, im in enumerate(images, start=1):
-            b = io.BytesIO()
-            im.save(b, format="PNG")
-            zf.writestr(f"card_{i:02d}.png", b.getvalue())
-    mem.seek(0)
-    return mem.read()
-
-def place_overlay(canvas: Image.Image, overlay: Image.Image, opacity: int = 100) -> Image.Image:
-    can = canvas.convert("RGBA")
-    W, H = can.size
-    ov = overlay.convert("RGBA")
-    target_area = int(W * H * 0.8)
-    ratio = ov.width / max(1, ov.height)
-    new_w = int((target_area * ratio) ** 0.5)
-    new_h = max(1, int(new_w / ratio))
-    ov = ov.resize((new_w, new_h), Image.LANCZOS)
-    if opacity < 100:
-        alpha = ov.split()[-1]
-        alpha = alpha.point(lambda p: int(p * (opacity / 100.0)))
-        ov.putalpha(alpha)
-    x = W // 2 - ov.width // 2
-    y = H // 2 - ov.height // 2
-    can.paste(ov, (x, y), ov)
-    return can
-
-def wrap_text_simple(text: str, width: int = 22) -> str:
-    lines, cur = [], ""
-    for ch in text:
-        cur += ch
-        if len(cur) >= width and ch == " ":
-            lines.append(cur.rstrip())
-            cur = ""
-    if cur:
-        lines.append(cur)
-    return "\n".join(lines)
+def upload_asset(name: str, data: bytes, mime: str = "image/png"):
+    """배경/오버레이 이미지를 백엔드 자산으로 올리고 asset id 반환(실패 시 None)."""
+    res = requests.post(f"{BACKEND_URL}/cardnews/assets", files={"file": (name, data, mime)}, headers=headers, timeout=60)
+    if res.status_code != 200:
+        st.error(f"이미지 업로드 실패: {res.text}")
+        return None
+    return res.json()["asset_id"]
+
+def render_on_server(pages: List[str], *, size=None, save: bool = False):
+    """현재 스펙으로 백엔드에서 합성 → (페이지 PNG bytes 목록, 저장 결과). 실패 시 (None, None)."""
+    w, h = size or proj["img_size"]
+    payload = {
+        "title": proj["topic"] or "무제 카드뉴스",
+        "pages": pages,
+        "width": w,
+        "height": h,
+        "background": proj["background"],
+        "overlay_ids": proj["overlay_ids"],
+        "overlay_opacity": proj["overlay_opacity"],
+        "font_name": proj["font_name"],
+        "font_size": proj["font_size"],
+        "font_color": proj["font_color"],
+        "output": "assets",
+        "save": save,
+    }
+    res = requests.post(f"{BACKEND_URL}/cardnews/render", json=payload, headers=headers, timeout=120)
+    if res.status_code != 200:
+        st.error(f"합성 실패: {res.text}")
+        return None, None
+    body = res.json()
+    images = [requests.get(f"{BACKEND_URL}{pg['url']}", headers=headers, timeout=30).content for pg in body["pages"]]
+    return images, body.get("saved")
+
+def stream_generated_images(prompts: List[str]):
+    """/cardnews/generate/images(SSE)를 읽어 (event, data)를 도착 순서대로 yield"""
+    with requests.post(f"{BACKEND_URL}/cardnews/generate/images", json={"prompts": prompts}, headers=headers,
+                       stream=True, timeout=(10, 180)) as r:
+        if not r.ok:
+            raise RuntimeError(f"API {r.status_code} - {r.text}")
+        event = None
+        for line in r.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                yield event, json.loads(line[len("data:"):].strip())
 
 def load_font(path: str, size: int) -> ImageFont.FreeTypeFont:
     try:
-        return ImageFont.truetype(path, size)
+        return get_font(path, size)
     except Exception:
         return ImageFont.load_default()
 
@@ -149,83 +157,80 @@ proj["bg_method"] = bg_method
 
 if bg_method == "단색":
     color = st.color_picker("배경 색상", "#F5F6FA")
-    proj["bg_color"] = hex_to_rgb(color)
 elif bg_method == "그라디언트":
     c1 = st.color_picker("시작 색", "#F5F6FA")
     c2 = st.color_picker("끝 색", "#DAE0EE")
-    proj["grad_start"] = hex_to_rgb(c1)
-    proj["grad_end"] = hex_to_rgb(c2)
 else:
     up_bg = st.file_uploader("배경 이미지 업로드", type=["png", "jpg", "jpeg", "webp"])
 
 if st.button("🖼️ 배경 만들기/적용"):
-    new_bases = []
-    for _ in range(proj["num_pages"]):
-        if bg_method == "단색":
-            new_bases.append(Image.new("RGB", proj["img_size"], proj["bg_color"]))
-        elif bg_method == "그라디언트":
-            base = Image.new("RGB", proj["img_size"], proj["grad_start"])
-            top = Image.new("RGB", proj["img_size"], proj["grad_end"])
-            mask = Image.linear_gradient("L").resize((1, proj["img_size"][1])).resize(proj["img_size"])
-            grad = Image.composite(top, base, mask)
-            new_bases.append(grad)
-        else:
-            if up_bg:
-                im = Image.open(up_bg).convert("RGBA").resize(proj["img_size"])
-                new_bases.append(im)
-            else:
-                new_bases.append(Image.new("RGB", proj["img_size"], proj["grad_start"]))
-    proj["base_images"] = new_bases
+    if bg_method == "단색":
+        proj["background"] = {"method": "solid", "color": color}
+    elif bg_method == "그라디언트":
+        proj["background"] = {"method": "gradient", "grad_start": c1, "grad_end": c2}
+    elif up_bg:
+        asset_id = upload_asset(up_bg.name, up_bg.getvalue(), up_bg.type or "image/png")
+        if asset_id:
+            proj["background"] = {"method": "image", "image_id": asset_id}
+    else:
+        st.warning("배경 이미지를 먼저 업로드해주세요.")
     st.success("배경 적용 완료 ✅")
 
-    if proj["base_images"]:
+    # 미리보기는 작은 크기로 서버에서 합성(텍스트 없음)
+    previews, _ = render_on_server([""], size=(270, 270))
+    if previews:
         st.markdown("**배경 미리보기**")
-        cols = st.columns(min(4, len(proj["base_images"])) or 1)
-        for i, im in enumerate(proj["base_images"]):
-            with cols[i % len(cols)]:
-                st.image(im.convert("RGB"), caption=f"페이지 {i+1}", width=200)
+        st.image(previews[0], caption="배경", width=200)
 
 
 st.markdown("### 🎨 3) 오버레이")
-use_overlay = st.checkbox("오버레이 사용", value=len(proj.get("overlay_images", [])) > 0)
+use_overlay = st.checkbox("오버레이 사용", value=len(proj.get("overlay_ids", [])) > 0)
 
 if use_overlay:
     src = st.radio("소스", ["업로드", "DALL·E 3"])
     if src == "업로드":
         files = st.file_uploader("오버레이 업로드", type=["png", "jpg"], accept_multiple_files=True)
-        if files:
-            proj["overlay_images"] = [Image.open(f).convert("RGBA") for f in files]
+        if files and st.button("📤 오버레이 적용"):
+            ids = [upload_asset(f.name, f.getvalue(), f.type or "image/png") for f in files]
+            proj["overlay_ids"] = [a for a in ids if a]
             st.success("오버레이 업로드 완료 ✅")
     else:
         if st.button("🎨 DALL·E 3로 오버레이 생성"):
-            imgs = []
-            for i, txt in enumerate(proj["page_texts"]):
+            prompts = []
+            for txt in proj["page_texts"][:proj["num_pages"]]:
                 title = txt.split("\n")[0][:60] if txt else proj["topic"]
-                r = requests.post(
-                    f"{BACKEND_URL}/cardnews/generate/b64img",
-                    params={"prompt": f"{proj['topic']} / 핵심: {title}"},
-                    headers=headers,
-                )
-                if r.status_code == 200:
-                    b64_str = r.json()
-                    if isinstance(b64_str, dict):
-                        b64_str = b64_str.get("b64") or b64_str.get("image") or ""
-                    if b64_str:
-                        img = Image.open(io.BytesIO(base64.b64decode(b64_str))).convert("RGBA")
-                        imgs.append(img)
-            proj["overlay_images"] = imgs
-            st.success("오버레이 생성 완료 ✅")
+                prompts.append(f"{proj['topic']} / 핵심: {title}")
+            # 모든 페이지를 한 번에 요청 → 서버가 동시에 생성하고 완성되는 대로 알려줌(SSE)
+            ids = [None] * len(prompts)
+            cols = st.columns(min(4, len(prompts)) or 1)
+            slots = [cols[i % len(cols)].empty() for i in range(len(prompts))]
+            for i, slot in enumerate(slots):
+                slot.caption(f"페이지 {i+1} 생성 중…")
+            try:
+                for event, data in stream_generated_images(prompts):
+                    if event == "image":
+                        ids[data["index"]] = data["asset_id"]
+                        img = requests.get(f"{BACKEND_URL}{data['url']}", headers=headers, timeout=30)
+                        slots[data["index"]].image(img.content, caption=f"페이지 {data['index']+1}", width="stretch")
+                    elif event == "error":
+                        slots[data["index"]].warning(f"페이지 {data['index']+1} 생성 실패: {data.get('detail')}")
+            except Exception as e:
+                st.error(f"오버레이 생성 오류: {e}")
+            proj["overlay_ids"] = [a for a in ids if a]
+            if proj["overlay_ids"]:
+                st.success("오버레이 생성 완료 ✅")
 
     proj["overlay_opacity"] = st.slider("오버레이 투명도 (%)", 0, 100, proj["overlay_opacity"])
 
-    if proj.get("overlay_images") and proj.get("base_images"):
+    if proj.get("overlay_ids"):
         st.markdown("**배경 + 오버레이 적용 미리보기**")
-        cols = st.columns(min(4, len(proj["base_images"])) or 1)
-        for i, bg in enumerate(proj["base_images"]):
+        previews, _ = render_on_server([""] * min(4, len(proj["overlay_ids"])), size=(270, 270))
+        cols = st.columns(len(previews or []) or 1)
+        for i, im in enumerate(previews or []):
             with cols[i % len(cols)]:
-                ov = proj["overlay_images"][i % len(proj["overlay_images"])]
-                preview = place_overlay(bg, ov, opacity=proj["overlay_opacity"])
-                st.image(preview, caption=f"페이지 {i+1}", width="stretch")
+                st.image(im, caption=f"오버레이 {i+1}", width="stretch")
+else:
+    proj["overlay_ids"] = []
 
 
 st.markdown("### 🔤 4) 텍스트 폰트 설정")
@@ -235,19 +240,20 @@ font_names = [os.path.basename(f) for f in font_files]
 if font_files:
     selected_font = st.selectbox("폰트 선택", font_names)
     proj["font_path"] = font_files[font_names.index(selected_font)]
+    proj["font_name"] = selected_font
 else:
     proj["font_path"] = None
+    proj["font_name"] = None
 
 proj["font_size"] = st.slider("폰트 크기", 20, 100, proj["font_size"])
-font_color_hex = st.color_picker("폰트 색상", "#141414")
-proj["font_color"] = hex_to_rgb(font_color_hex)
+proj["font_color"] = st.color_picker("폰트 색상", "#141414")
 
 if proj["font_path"]:
     try:
         font = load_font(proj["font_path"], proj["font_size"])
         preview_img = Image.new("RGB", (600, 120), "white")
         d = ImageDraw.Draw(preview_img)
-        d.text((20, 40), "폰트 미리보기 ABC 가나다", font=font, fill=proj["font_color"])
+        d.text((20, 40), "폰트 미리보기 ABC 가나다", font=font, fill=hex_to_rgb(proj["font_color"]))
         st.image(preview_img, caption="폰트 미리보기", width=400)
     except Exception as e:
         st.warning(f"폰트 로드 실패: {e}")
@@ -255,84 +261,80 @@ if proj["font_path"]:
 
 st.markdown("### ✒️ 5) 합성")
 if st.button("합성 실행"):
-    finals = []
-    for i, bg in enumerate(proj["base_images"]):
-        text = proj["page_texts"][i] if i < len(proj["page_texts"]) else ""
-        base_rgba = bg.convert("RGBA")
-        if use_overlay and proj.get("overlay_images"):
-            ov = proj["overlay_images"][i % len(proj["overlay_images"])]
-            base_rgba = place_overlay(base_rgba, ov, opacity=proj["overlay_opacity"])
-        flattened = Image.new("RGB", base_rgba.size, (255, 255, 255))
-        flattened.paste(base_rgba, mask=base_rgba.split()[-1])
-        draw = ImageDraw.Draw(flattened)
-        font = load_font(proj["font_path"], proj["font_size"])
-        wrapped = wrap_text_simple(text)
-        bbox = draw.multiline_textbbox((0, 0), wrapped, font=font, spacing=8)
-        tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-        W, H = flattened.size
-        x = (W - tw) / 2
-        y = (H - th) / 2
-        draw.multiline_text((x, y), wrapped, fill=proj["font_color"], font=font, align="center", spacing=8)
-        finals.append(flattened)
-    proj["final_images"] = finals
-    st.success("합성 완료 ✅")
-
-    try:
-        zip_bytes = export_zip_from_images(proj["final_images"])
-        payload = {
-            "title": proj["topic"] or "무제 카드뉴스",
-            "zip_b64": base64.b64encode(zip_bytes).decode(),
-        }
-        res = requests.post(f"{BACKEND_URL}/cardnews/save", json=payload, headers=headers, timeout=60)
-        if res.status_code == 200:
+    pages = [proj["page_texts"][i] if i < len(proj["page_texts"]) else "" for i in range(proj["num_pages"])]
+    # 백엔드가 페이지를 병렬로 합성하고, 결과 ZIP을 히스토리에 저장(같은 결과는 중복 저장하지 않음)
+    finals, saved = render_on_server(pages, save=True)
+    if finals is not None:
+        proj["final_pages"] = finals
+        proj["saved_id"] = (saved or {}).get("id")
+        proj["final_zip"] = None
+        st.success("합성 완료 ✅")
+        if saved and saved.get("duplicate"):
+            st.info("💾 이미 저장된 카드뉴스와 같아 다시 저장하지 않았습니다.")
+        elif saved:
             st.success("💾 자동 저장 완료 (히스토리에 기록됨)")
-        else:
-            st.warning(f"자동 저장 실패: {res.text}")
-    except Exception as e:
-        st.warning(f"자동 저장 중 오류: {e}")
 
 
-if proj.get("final_images"):
+if proj.get("final_pages"):
     st.markdown("**최종 미리보기**")
-    cols = st.columns(min(4, len(proj["final_images"])) or 1)
-    for i, im in enumerate(proj["final_images"]):
+    cols = st.columns(min(4, len(proj["final_pages"])) or 1)
+    for i, im in enumerate(proj["final_pages"]):
         with cols[i % len(cols)]:
             st.image(im, caption=f"페이지 {i+1}", width=400)
 
-    zip_bytes = export_zip_from_images(proj["final_images"])
-    st.download_button(
-        "📦 ZIP 다운로드 (최종 카드뉴스)",
-        data=zip_bytes,
-        file_name=f"cardnews_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
-        mime="application/zip",
-    )
+    if proj.get("saved_id") and proj.get("final_zip") is None:
+        # 저장된 ZIP을 합성 직후 한 번만 받아 둔다(위젯 조작마다 다시 받지 않음)
+        zr = requests.get(f"{BACKEND_URL}/cardnews/{proj['saved_id']}/zip", headers=headers, timeout=60)
+        if zr.status_code == 200:
+            proj["final_zip"] = zr.content
+    if proj.get("final_zip"):
+        st.download_button(
+            "📦 ZIP 다운로드 (최종 카드뉴스)",
+            data=proj["final_zip"],
+            file_name=f"cardnews_{datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+            mime="application/zip",
+        )
 
 
 st.markdown("### 📜 히스토리 불러오기")
+if "cardnews_history" not in st.session_state:
+    st.session_state.cardnews_history = None
+if "cardnews_zips" not in st.session_state:
+    st.session_state.cardnews_zips = {}  # id → ZIP bytes (받기 누른 것만)
+
 if st.button("📂 히스토리 불러오기"):
     try:
         r = requests.get(f"{BACKEND_URL}/cardnews/history", headers=headers, timeout=30)
         if r.status_code != 200:
             st.error(f"히스토리 조회 실패: {r.text}")
         else:
-            items = r.json().get("history", [])
-            if not items:
-                st.info("저장된 카드뉴스가 없습니다.")
-            else:
-                for idx, it in enumerate(items, start=1):
-                    with st.container(border=True):
-                        st.write(f"**{idx}. {it['title']}**")
-                        st.caption(f"🕒 {it['created_at']}")
-                        zb64 = it.get("zip_b64") or ""
-                        if zb64:
-                            zbytes = base64.b64decode(zb64)
-                            st.download_button(
-                                f"📦 ZIP 다운로드 {idx}",
-                                data=zbytes,
-                                file_name=f"cardnews_{it['id']}.zip",
-                                mime="application/zip"
-                            )
-                        else:
-                            st.warning("ZIP 데이터가 없습니다.")
+            st.session_state.cardnews_history = r.json().get("history", [])
     except Exception as e:
         st.error(f"히스토리 불러오기 오류: {e}")
+
+items = st.session_state.cardnews_history
+if items is not None:
+    if not items:
+        st.info("저장된 카드뉴스가 없습니다.")
+    for idx, it in enumerate(items, start=1):
+        with st.container(border=True):
+            st.write(f"**{idx}. {it['title']}**")
+            st.caption(f"🕒 {it['created_at']} · {it.get('page_count') or 0}페이지 · {(it.get('size_bytes') or 0) / 1024 / 1024:.1f}MB")
+            zbytes = st.session_state.cardnews_zips.get(it["id"])
+            if zbytes is None:
+                # ZIP 본문은 누른 항목만 받는다
+                if st.button(f"📦 ZIP 받기 {idx}", key=f"cardnews_fetch_{it['id']}"):
+                    zr = requests.get(f"{BACKEND_URL}/cardnews/{it['id']}/zip", headers=headers, timeout=60)
+                    if zr.status_code == 200:
+                        st.session_state.cardnews_zips[it["id"]] = zr.content
+                        st.rerun()
+                    else:
+                        st.warning("ZIP 데이터가 없습니다.")
+            else:
+                st.download_button(
+                    f"📦 ZIP 다운로드 {idx}",
+                    data=zbytes,
+                    file_name=f"cardnews_{it['id']}.zip",
+                    mime="application/zip",
+                    key=f"cardnews_download_{it['id']}",
+                )
@@ -2,7 +2,14 @@
 import requests
 from io import BytesIO
 from PIL import Image
-import io, os, uuid
+import io, os, sys, uuid
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from utils.image_fetch import fetch_many
+from utils.image_output import encode, save_bytes
 
 BACKEND_URL = "http://127.0.0.1:8000"
 
@@ -40,8 +47,7 @@ def save_mascot_img(img_bytes, email=st.session_state['user_email']):
     filename = f"{uniq}.png"
     path = os.path.join(save_dir, filename)
 
-    with open(path, "wb") as f:
-        f.write(img_bytes)
+    save_bytes(path, img_bytes)  # 화면 표시를 막지 않도록 백그라운드 저장
 
     return path
 
@@ -61,22 +67,15 @@ go = st.button("🎨 마스코트 생성", type="primary")
 # -----------------------------
 # 실행
 # -----------------------------
-def fetch_image_and_bytes(url: str):
-    """URL에서 이미지를 받아 PIL.Image로 로드하고 PNG/JPG 바이트를 모두 반환."""
-    resp = requests.get(url, timeout=20)
-    resp.raise_for_status()
-    img = Image.open(io.BytesIO(resp.content)).convert("RGBA")  # 투명 채널 대비
-
-    # PNG 바이트
-    png_buf = io.BytesIO()
-    img.save(png_buf, format="PNG")
-    png_bytes = png_buf.getvalue()
-
-    # JPG 바이트 (JPG는 알파 채널 없음)
-    jpg_buf = io.BytesIO()
-    img_rgb = img.convert("RGB")
-    img_rgb.save(jpg_buf, format="JPEG", quality=95)
-    jpg_bytes = jpg_buf.getvalue()
+def image_and_bytes(raw: bytes):
+    """다운로드한 이미지 바이트를 PIL.Image로 로드하고 PNG/JPG 바이트를 모두 반환."""
+    img = Image.open(io.BytesIO(raw)).convert("RGBA")  # 투명 채널 대비
+
+    # PNG 바이트(저장/다운로드 공용, 한 번만 인코딩)
+    png_bytes, _, _ = encode(img, "png")
+
+    # JPG 바이트 (JPG는 알파 채널 없음 → 흰 배경에 합성)
+    jpg_bytes, _, _ = encode(img, "jpeg")
 
     return img, png_bytes, jpg_bytes
 
@@ -108,11 +107,15 @@ if go:
     st.markdown("### 🐱 생성된 마스코트 후보들")
 
     cols = st.columns(len(image_urls))
+    # 후보 URL을 풀링된 세션으로 동시에 다운로드(타임아웃/크기 상한 포함)
+    downloads = fetch_many(image_urls)
 
-    for i, url in enumerate(image_urls):
+    for i, raw in enumerate(downloads):
         with cols[i % len(cols)]:
             try:
-                img, png_bytes, jpg_bytes = fetch_image_and_bytes(url)
+                if isinstance(raw, Exception):
+                    raise raw
+                img, png_bytes, jpg_bytes = image_and_bytes(raw)
             except Exception as e:
                 st.error(f"이미지 로드 실패({i+1}번): {e}")
                 continue
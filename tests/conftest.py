@@ -0,0 +1,7 @@
+# tests/conftest.py
+import os, sys
+
+# 저장소 루트에서 `python -m pytest` 로 실행. 모듈 임포트 시 필요한 키는 더미 값으로 채운다
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for key in ("OPENAI_API_KEY", "GOOGLE_CLIENT_ID", "GOOGLE_CLIENT_SECRET"):
+    os.environ.setdefault(key, "test")
@@ -0,0 +1,69 @@
+# tests/test_cardnews_render.py
+# /cardnews/render save=true 가 빈 DB(첫 사용)와 예전 스키마 DB에서도 히스토리에 저장되는지 확인.
+import io, os, sqlite3, zipfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.auth import get_current_user
+from backend.routers import cardnews
+from backend.services import cardnews_service
+
+EMAIL = "tester@example.com"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)   # data/user_info 이하 상대 경로가 전부 빈 임시 폴더를 가리키게
+    app = FastAPI()
+    app.include_router(cardnews.router)
+    app.dependency_overrides[get_current_user] = lambda: {"email": EMAIL}
+    with TestClient(app) as c:
+        yield c
+
+
+def _body(output: str) -> dict:
+    return {"title": "테스트", "pages": ["제목\n본문", "둘째 장"], "width": 256, "height": 256,
+            "output": output, "save": True}
+
+
+def _history_rows() -> list:
+    conn = sqlite3.connect(cardnews_service.DB_PATH)
+    try:
+        return conn.execute("SELECT title, zip_path, page_count FROM cardnews WHERE email=?", (EMAIL,)).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("output", ["assets", "zip"])
+def test_render_save_on_empty_db(client, output):
+    assert not os.path.exists(cardnews_service.DB_PATH)
+    r = client.post("/cardnews/render", json=_body(output))
+    assert r.status_code == 200, r.text
+    if output == "zip":
+        with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+            assert zf.namelist() == ["card_01.png", "card_02.png"]
+    else:
+        assert len(r.json()["pages"]) == 2
+        assert r.json()["saved"]["page_count"] == 2
+    rows = _history_rows()
+    assert len(rows) == 1 and rows[0][0] == "테스트" and rows[0][2] == 2
+    assert os.path.exists(rows[0][1])
+
+    # 같은 내용을 다시 저장하면 행이 늘지 않음
+    assert client.post("/cardnews/render", json=_body(output)).status_code == 200
+    assert len(_history_rows()) == 1
+
+
+def test_render_save_on_legacy_db(client):
+    # content_hash 컬럼/유니크 인덱스가 생기기 전의 테이블
+    os.makedirs(cardnews_service.BASE_DIR, exist_ok=True)
+    conn = sqlite3.connect(cardnews_service.DB_PATH)
+    conn.execute("""CREATE TABLE cardnews (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT, title TEXT,
+                    zip_path TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    conn.commit()
+    conn.close()
+    r = client.post("/cardnews/render", json=_body("assets"))
+    assert r.status_code == 200, r.text
+    assert len(_history_rows()) == 1
@@ -0,0 +1,38 @@
+# tests/test_image_intake.py
+# 업로드는 image_intake에서 한 번만 디코드/인코딩되고, image_payload는 그 바이트를 그대로 보낸다.
+import asyncio, base64, io
+
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+from utils import image_payload
+from utils.image_intake import read_image_upload
+
+
+def _upload(size, fmt) -> UploadFile:
+    buf = io.BytesIO()
+    Image.effect_noise(size, 40).convert("RGB").save(buf, fmt)
+    buf.seek(0)
+    return UploadFile(file=buf)
+
+
+def test_upload_is_encoded_once(monkeypatch):
+    data = asyncio.run(read_image_upload(_upload((3000, 2000), "PNG")))
+    with Image.open(io.BytesIO(data)) as im:
+        assert im.format == "JPEG"
+        assert im.size == image_payload.target_size(3000, 2000, "high")
+
+    calls = []
+    monkeypatch.setattr(image_payload, "encode_image", lambda *a, **k: calls.append(a))
+    image_payload.clear()
+    uri, detail = image_payload.image_data_uri(data, detail="high")
+    assert detail == "high" and not calls
+    assert base64.b64decode(uri.split(",", 1)[1]) == data
+
+
+def test_low_detail_still_resizes():
+    data = asyncio.run(read_image_upload(_upload((3000, 2000), "JPEG")))
+    image_payload.clear()
+    uri, _ = image_payload.image_data_uri(data, detail="low")
+    with Image.open(io.BytesIO(base64.b64decode(uri.split(",", 1)[1]))) as im:
+        assert max(im.size) == 512
@@ -0,0 +1,30 @@
+# tests/test_openai_stream_cache.py
+# 이미지 스트리밍 호출은 캐시 키를 원본 이미지 바이트로 만들고, 캐시 히트면 이미지 입력(리사이즈/base64)을 만들지 않는다.
+import asyncio
+
+from utils import openai_utils, response_cache
+
+
+def _collect(agen) -> list:
+    async def run():
+        return [d async for d in agen]
+    return asyncio.run(run())
+
+
+def test_image_stream_cache_hit_skips_image_encoding(tmp_path, monkeypatch):
+    monkeypatch.setattr(response_cache, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    response_cache.clear()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("캐시 히트인데 이미지 입력을 만들었음")
+    monkeypatch.setattr(openai_utils, "_image_input", fail)
+
+    image = b"not decoded on a cache hit"
+    key = openai_utils._cache_key("gpt-4.1-mini", "문구", image, max_tokens=400, temperature=0.8, top_p=1.0,
+                                  force_json=False, json_schema=None, previous_response_id=None)
+    response_cache.put(key, "캐시된 문구")
+
+    result = {}
+    out = _collect(openai_utils.astream_openai_with_image("gpt-4.1-mini", "문구", image, result=result))
+    assert out == ["캐시된 문구"]
+    assert result == {"response": None, "cached": True}
@@ -0,0 +1,69 @@
+# tests/test_sse_streams.py
+# /adcopy, /cardnews SSE 스트림이 같은 프레이밍(utils.sse.event)과 같은 헤더(utils.sse.STREAM_HEADERS)를 쓰는지 확인.
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.auth import get_current_user
+from backend.models import create_text_model
+from backend.routers import adcopy, cardnews
+from backend.services import cardnews_service
+from utils import sse
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(adcopy.router)
+    app.include_router(cardnews.router)
+    app.dependency_overrides[get_current_user] = lambda: {"email": "tester@example.com"}
+    with TestClient(app) as c:
+        yield c
+
+
+def _events(body: str) -> list:
+    out = []
+    for block in body.split("\n\n"):
+        if block:
+            name, data = block.split("\n")
+            assert name.startswith("event: ") and data.startswith("data: ")
+            out.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return out
+
+
+def _assert_stream_headers(r):
+    assert r.headers["content-type"].startswith("text/event-stream")
+    for k, v in sse.STREAM_HEADERS.items():
+        assert r.headers[k] == v
+
+
+def test_event_format():
+    assert sse.event("copy", {"text": "한글"}) == 'event: copy\ndata: {"text": "한글"}\n\n'
+
+
+def test_adcopy_text_stream(client, monkeypatch):
+    async def fake(**kwargs):
+        yield "copy", "첫 문구"
+        yield "done", {"copies": ["첫 문구"], "raw_output": "[]", "meta": None}
+    monkeypatch.setattr(create_text_model, "astream_ad_copies", fake)
+    r = client.post("/adcopy/text/stream", json={"product": "커피", "tone": "감성적인", "length": "short",
+                                                 "num_copies": 1, "model": "gpt-4.1-mini"})
+    assert r.status_code == 200
+    _assert_stream_headers(r)
+    assert [e[0] for e in _events(r.text)] == ["copy", "done"]
+
+
+def test_cardnews_images_stream(client, monkeypatch):
+    async def fake(email, prompt, model, size):
+        if prompt == "bad":
+            raise RuntimeError("생성 실패")
+        return "a" * 32
+    monkeypatch.setattr(cardnews_service, "_generate_asset", fake)
+    r = client.post("/cardnews/generate/images", json={"prompts": ["ok", "bad"]})
+    assert r.status_code == 200
+    _assert_stream_headers(r)
+    events = _events(r.text)
+    assert sorted(e[0] for e in events[:-1]) == ["error", "image"]
+    assert events[-1] == ("done", {"asset_ids": ["a" * 32, None], "failed": 1})
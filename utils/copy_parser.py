@@ -0,0 +1,185 @@
+# utils/copy_parser.py
+# 광고 문구 파서(단일 패스, 증분 입력 지원).
+# 모델 출력 {"copies": ["문구1", "문구2", ...]} 를 청크 단위로 받아
+# 각 문자열 항목의 닫는 따옴표가 도착하는 즉시 문구를 돌려준다.
+# - 코드펜스(```json)나 앞뒤 설명 문장이 섞여 있어도 "copies" 배열만 찾아 읽는다.
+# - JSON 배열을 못 찾으면, 같은 패스에서 모아 둔 줄/불릿/번호 단위 조각을 폴백으로 반환한다.
+#   (기존 parse_copies의 폴백 규칙: 줄바꿈, •, –, -, "숫자." / "숫자)" 로 분리)
+import json, re
+from typing import List
+
+_KEY = '"copies"'
+_ARRAY_TOKEN = re.compile(r'["\]]')         # 배열 안, 문자열 밖: 문자열 시작 또는 배열 끝
+_STRING_TOKEN = re.compile(r'["\\]')        # 문자열 안: 닫는 따옴표 또는 이스케이프
+_FALLBACK_SEP = re.compile(r"[\n•–-]|(\d+)[.)]")
+_TRAILING_DIGITS = re.compile(r"\d*$")
+_FALLBACK_STRIP = " -•\t\"'"
+_FALLBACK_SKIP = ("note:", "주의", "info:")
+
+# Structured Outputs용 스키마: {"copies": [문자열, ...]}
+COPIES_SCHEMA = {
+    "name": "ad_copies",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {"copies": {"type": "array", "items": {"type": "string"}}},
+        "required": ["copies"],
+        "additionalProperties": False,
+    },
+}
+
+
+class CopyParser:
+    """
+    feed(chunk)로 텍스트를 넣으면 새로 완성된 문구 목록을 반환하고,
+    finish()로 최종 문구 목록(JSON 문구 또는 폴백 조각)을 얻는다.
+    입력은 청크마다 한 번씩만 훑고, 청크 경계에 걸친 상태(키 일부, 문자열 일부, 번호 일부)만 이월한다.
+    """
+
+    def __init__(self):
+        # JSON "copies" 배열 상태
+        self._tail = ""            # 청크 경계에 걸친 "copies" 키 탐지용
+        self._await_array = False  # 키는 찾았고 '['를 기다리는 중
+        self._in_array = False
+        self._array_done = False
+        self._in_str = False
+        self._escape = False       # 직전 청크가 역슬래시로 끝남
+        self._str: List[str] = []
+        self.copies: List[str] = []
+
+        # 폴백(줄 단위) 상태
+        self._seg: List[str] = []
+        self._seg_digits = 0       # 현재 조각 끝의 숫자 개수(청크 경계의 "1" + ". " 처리용)
+        self._segments: List[str] = []
+
+    # -------------------- 입력 --------------------
+    def feed(self, chunk: str) -> List[str]:
+        if not chunk:
+            return []
+        out = [] if self._array_done else self._json_feed(chunk)
+        # JSON 문구를 하나라도 얻으면 finish()는 그것을 반환하므로 폴백 조각은 더 모을 필요 없음
+        if not self.copies:
+            self._fallback_feed(chunk)
+        return out
+
+    def finish(self) -> List[str]:
+        """입력 종료. JSON 문구가 있으면 그것을, 없으면 폴백 조각을 반환."""
+        self._close_segment()
+        return list(self.copies) if self.copies else list(self._segments)
+
+    # -------------------- JSON 배열 --------------------
+    def _json_feed(self, chunk: str) -> List[str]:
+        out: List[str] = []
+        i, n = 0, len(chunk)
+
+        if not self._in_array:
+            if not self._await_array:
+                s = self._tail + chunk
+                k = s.find(_KEY)
+                if k < 0:
+                    self._tail = s[-(len(_KEY) - 1):]
+                    return out
+                self._await_array = True
+                i = k + len(_KEY) - len(self._tail)
+                self._tail = ""
+            b = chunk.find("[", i)
+            if b < 0:
+                return out
+            self._in_array = True
+            i = b + 1
+
+        while i < n:
+            if not self._in_str:
+                m = _ARRAY_TOKEN.search(chunk, i)
+                if not m:
+                    break
+                if m.group() == "]":
+                    self._array_done = True
+                    break
+                self._in_str = True
+                i = m.end()
+                continue
+
+            if self._escape:
+                self._str.append(chunk[i])
+                self._escape = False
+                i += 1
+                continue
+            m = _STRING_TOKEN.search(chunk, i)
+            if not m:
+                self._str.append(chunk[i:])
+                break
+            if m.group() == "\\":
+                self._str.append(chunk[i:m.end()])
+                self._escape = True
+                i = m.end()
+                continue
+            self._str.append(chunk[i:m.start()])
+            i = m.end()
+            self._in_str = False
+            raw = "".join(self._str)
+            self._str = []
+            s = raw
+            if "\\" in raw:
+                try:
+                    s = json.loads(f'"{raw}"')
+                except ValueError:
+                    pass
+            s = s.strip()
+            if s:
+                self.copies.append(s)
+                out.append(s)
+        return out
+
+    # -------------------- 폴백 --------------------
+    def _fallback_feed(self, chunk: str) -> None:
+        pos = 0
+        # 이전 청크가 숫자로 끝나고 이번 청크가 '.' / ')'로 시작 → 번호
+        if self._seg_digits and chunk[0] in ".)":
+            self._drop_seg_digits()
+            self._close_segment()
+            pos = 1
+        for m in _FALLBACK_SEP.finditer(chunk, pos):
+            if m.group(1) is not None and m.start() == pos and self._seg_digits:
+                # 청크 경계를 넘는 번호("1" | "2.")의 앞부분도 제거
+                self._drop_seg_digits()
+            self._seg.append(chunk[pos:m.start()])
+            self._close_segment()
+            pos = m.end()
+        rest = chunk[pos:]
+        if rest:
+            self._seg.append(rest)
+            d = len(_TRAILING_DIGITS.search(rest).group())
+            self._seg_digits = self._seg_digits + d if d == len(rest) else d
+
+    def _drop_seg_digits(self) -> None:
+        text = "".join(self._seg)
+        self._seg = [text[:len(text) - self._seg_digits]]
+        self._seg_digits = 0
+
+    def _close_segment(self) -> None:
+        text = "".join(self._seg).strip(_FALLBACK_STRIP)
+        self._seg = []
+        self._seg_digits = 0
+        if len(text) > 1 and not text.lower().startswith(_FALLBACK_SKIP):
+            self._segments.append(text)
+
+
+def parse_copies(raw_output: str) -> List[str]:
+    """완성된 전체 출력 문자열에서 문구 목록을 뽑는다(CopyParser 한 번 통과)."""
+    if not raw_output:
+        return []
+    parser = CopyParser()
+    parser.feed(raw_output.strip())
+    return parser.finish()
+
+
+def merge_copies(existing: List[str], new: List[str], limit: int) -> List[str]:
+    """기존 문구 뒤에 중복이 아닌 새 문구를 limit 개수까지 붙인다."""
+    out = list(existing)
+    for c in new:
+        if len(out) >= limit:
+            break
+        if c not in out:
+            out.append(c)
+    return out
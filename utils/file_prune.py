@@ -0,0 +1,93 @@
+# utils/file_prune.py
+# 사용자 폴더에 계속 쌓이는 재생성 가능한 파일(포스터 배경, 카드뉴스 합성 자산 등) 정리.
+# - 오래된 파일(max_age_s) 삭제 → 남은 파일이 개수(max_files)/용량(max_bytes) 상한을 넘으면 오래된 것부터 삭제
+# - "오래됨"은 mtime 기준. 읽을 때 touch()로 mtime을 갱신하면 자주 쓰는 파일은 남는다(LRU)
+# - 막 쓴 파일(min_age_s 이내)은 지우지 않음: 업로드 직후 id를 받아 바로 합성하는 흐름 보호
+# - 같은 폴더는 PRUNE_INTERVAL 초에 한 번만 훑는다(쓰기마다 listdir 하지 않도록)
+#
+# 설정(환경 변수):
+#   FILE_PRUNE_INTERVAL : 같은 폴더 재검사 최소 간격(초) (기본 60)
+import os, threading, time
+from typing import Any, Dict
+
+PRUNE_INTERVAL = float(os.getenv("FILE_PRUNE_INTERVAL", "60"))
+MIN_AGE_S = 300.0
+
+_lock = threading.Lock()
+_last_run: Dict[str, float] = {}
+_stats = {"scans": 0, "removed": 0, "removed_bytes": 0, "errors": 0}
+
+
+def touch(path: str) -> None:
+    """사용 시점 기록(mtime 갱신). 파일이 없거나 권한이 없으면 무시."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_dir(path: str, *, max_age_s: float = 0, max_files: int = 0, max_bytes: int = 0,
+              min_age_s: float = MIN_AGE_S) -> int:
+    """path 안의 파일을 정리하고 지운 개수를 반환. 상한이 0이면 그 조건은 쓰지 않는다."""
+    now = time.time()
+    entries = []
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                try:
+                    if e.is_file(follow_symlinks=False):
+                        st = e.stat(follow_symlinks=False)
+                        entries.append((st.st_mtime, st.st_size, e.path))
+                except OSError:
+                    continue
+    except FileNotFoundError:
+        return 0
+    entries.sort()   # 오래된 것부터
+
+    total_files = len(entries)
+    total_bytes = sum(size for _, size, _ in entries)
+    removed = removed_bytes = errors = 0
+    for mtime, size, p in entries:
+        age = now - mtime
+        if age < min_age_s:
+            break
+        expired = max_age_s and age > max_age_s
+        over = (max_files and total_files > max_files) or (max_bytes and total_bytes > max_bytes)
+        if not (expired or over):
+            break
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            errors += 1
+            continue
+        total_files -= 1
+        total_bytes -= size
+        removed += 1
+        removed_bytes += size
+
+    with _lock:
+        _stats["scans"] += 1
+        _stats["removed"] += removed
+        _stats["removed_bytes"] += removed_bytes
+        _stats["errors"] += errors
+    return removed
+
+
+def maybe_prune(path: str, **limits) -> int:
+    """prune_dir를 폴더별 PRUNE_INTERVAL 간격으로만 실행(쓰기 경로에서 호출). 건너뛰면 0."""
+    now = time.monotonic()
+    with _lock:
+        last = _last_run.get(path)
+        if last is not None and now - last < PRUNE_INTERVAL:
+            return 0
+        _last_run[path] = now
+    return prune_dir(path, **limits)
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out["tracked_dirs"] = len(_last_run)
+    return out
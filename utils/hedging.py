@@ -0,0 +1,122 @@
+# utils/hedging.py
+# 헤지 요청(hedged request): 호출이 최근 지연 분포의 p 백분위를 넘도록 끝나지 않으면
+# 같은 요청을 하나 더 보내고, 먼저 끝난 쪽을 채택한 뒤 나머지는 취소한다.
+# - 지연 분포: (route, model)별 최근 N건의 완료 시간
+# - 라우트별 예산: 최근 N건 중 헤지 비율이 OPENAI_HEDGE_BUDGET을 넘지 않게 제한(부하 폭증 방지)
+# - async 경로 전용(스레드는 취소할 수 없어 sync 호출에는 적용하지 않음)
+#
+# 설정(환경 변수):
+#   OPENAI_HEDGE_ENABLED     : 1이면 사용 (기본 0, opt-in)
+#   OPENAI_HEDGE_PERCENTILE  : 헤지 발사 기준 백분위 (기본 0.95)
+#   OPENAI_HEDGE_BUDGET      : 라우트별 헤지 허용 비율 (기본 0.05)
+#   OPENAI_HEDGE_MIN_SAMPLES : 분포가 이만큼 쌓이기 전엔 헤지하지 않음 (기본 20)
+#   OPENAI_HEDGE_MIN_DELAY   : 헤지 대기 하한(초) (기본 1.0)
+import asyncio, os, threading, time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+ENABLED = os.getenv("OPENAI_HEDGE_ENABLED", "0") in ("1", "true", "True")
+PERCENTILE = float(os.getenv("OPENAI_HEDGE_PERCENTILE", "0.95"))
+BUDGET = float(os.getenv("OPENAI_HEDGE_BUDGET", "0.05"))
+MIN_SAMPLES = int(os.getenv("OPENAI_HEDGE_MIN_SAMPLES", "20"))
+MIN_DELAY = float(os.getenv("OPENAI_HEDGE_MIN_DELAY", "1.0"))
+WINDOW = 500
+
+_lock = threading.Lock()
+_latency: Dict[tuple, deque] = {}      # (route, model) -> 최근 완료 시간(초)
+_recent: Dict[str, deque] = {}         # route -> 최근 호출의 헤지 여부(bool)
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _route_stats(route: str) -> Dict[str, int]:
+    # _lock 보유 상태에서 호출
+    s = _stats.get(route)
+    if s is None:
+        s = _stats[route] = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0}
+    return s
+
+
+def hedge_delay(route: str, model: str) -> Optional[float]:
+    """헤지를 보내기까지 기다릴 시간(초). 표본이 부족하면 None."""
+    with _lock:
+        samples = _latency.get((route, model))
+        if not samples or len(samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(len(ordered) * PERCENTILE))
+    return max(MIN_DELAY, ordered[idx])
+
+
+def _record(route: str, model: str, seconds: float, hedged: bool) -> None:
+    with _lock:
+        _latency.setdefault((route, model), deque(maxlen=WINDOW)).append(seconds)
+        _recent.setdefault(route, deque(maxlen=WINDOW)).append(hedged)
+        _route_stats(route)["calls"] += 1
+
+
+def _take_budget(route: str) -> bool:
+    with _lock:
+        recent = _recent.get(route) or ()
+        used = sum(recent)
+        ok = (used + 1) <= BUDGET * max(len(recent), 1)
+        s = _route_stats(route)
+        if ok:
+            s["hedged"] += 1
+        else:
+            s["budget_denied"] += 1
+        return ok
+
+
+async def run(factory: Callable[[], Awaitable[Any]], *, route: Optional[str], model: str) -> Any:
+    """
+    factory()로 만든 코루틴을 실행. route가 주어지고 헤지가 켜져 있으면
+    지연 기준을 넘었을 때 factory()를 한 번 더 실행해 먼저 끝난 결과를 반환한다.
+    """
+    start = time.monotonic()
+    if not ENABLED or not route:
+        return await factory()
+
+    delay = hedge_delay(route, model)
+    primary = asyncio.ensure_future(factory())
+    tasks = [primary]
+    try:
+        hedged = False
+        if delay is not None:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            hedged = not done and _take_budget(route)
+        if not hedged:
+            result = await primary
+            _record(route, model, time.monotonic() - start, False)
+            return result
+
+        backup = asyncio.ensure_future(factory())
+        tasks.append(backup)
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t.exception() is not None:
+                    error = t.exception()  # 나머지 하나가 성공할 수 있으니 계속 대기
+                    continue
+                _record(route, model, time.monotonic() - start, True)
+                if t is backup:
+                    with _lock:
+                        _route_stats(route)["hedge_wins"] += 1
+                return t.result()
+        raise error
+    finally:
+        # 진 쪽(또는 호출자 취소 시 전부) 취소 → AsyncOpenAI가 HTTP 요청을 닫는다
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        routes = {r: dict(s) for r, s in _stats.items()}
+        keys = list(_latency.keys())
+    for route, model in keys:
+        d = hedge_delay(route, model)
+        routes.setdefault(route, {}).setdefault("hedge_delay_s", {})[model] = round(d, 3) if d else None
+    return {"enabled": ENABLED, "percentile": PERCENTILE, "budget": BUDGET, "routes": routes}
@@ -0,0 +1,116 @@
+# utils/image_fetch.py
+# 생성 이미지 URL 다운로드 공용 모듈.
+# - keep-alive 커넥션 풀을 쓰는 requests.Session 하나를 공유(요청마다 TCP/TLS 연결을 새로 맺지 않음)
+# - connect/read 타임아웃, 연결 실패·5xx는 짧게 재시도
+# - 응답은 스트리밍으로 읽으며 상한(IMAGE_FETCH_MAX_BYTES)을 넘으면 중단
+# - 여러 URL이 한꺼번에 오면(마스코트 후보 등) 스레드로 동시에 받는다
+# 이미지 생성 응답이 b64_json이면 다운로드 자체가 필요 없으므로 image_bytes()가 알아서 디코드한다.
+#
+# 설정(환경 변수):
+#   IMAGE_FETCH_CONNECT_TIMEOUT : 연결 타임아웃(초) (기본 5)
+#   IMAGE_FETCH_READ_TIMEOUT    : 읽기 타임아웃(초) (기본 30)
+#   IMAGE_FETCH_MAX_BYTES       : 최대 다운로드 크기 (기본 20MB)
+#   IMAGE_FETCH_POOL            : 호스트당 커넥션 풀 크기 / 동시 다운로드 수 (기본 8)
+#   OPENAI_IMAGE_RESPONSE_FORMAT: 백엔드가 직접 쓰는 이미지 생성의 응답 형식 b64_json / url (기본 b64_json)
+import base64, os, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = float(os.getenv("IMAGE_FETCH_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("IMAGE_FETCH_READ_TIMEOUT", "30"))
+MAX_BYTES = int(os.getenv("IMAGE_FETCH_MAX_BYTES", str(20 * 1024 * 1024)))
+POOL_SIZE = int(os.getenv("IMAGE_FETCH_POOL", "8"))
+# 생성 결과를 서버에서 바로 쓰는 경우 b64_json이면 두 번째 왕복(URL 다운로드)이 없다
+RESPONSE_FORMAT = os.getenv("OPENAI_IMAGE_RESPONSE_FORMAT", "b64_json")
+
+_CHUNK = 64 * 1024
+
+
+class ImageFetchError(RuntimeError):
+    """이미지 다운로드 실패(타임아웃, HTTP 오류, 크기 초과)."""
+
+
+def _make_session() -> requests.Session:
+    retry = Retry(total=2, connect=2, read=0, status=2, backoff_factor=0.3,
+                  status_forcelist=(500, 502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+_session = _make_session()
+_lock = threading.Lock()
+_stats = {"fetches": 0, "errors": 0, "bytes": 0, "ms_total": 0.0, "b64_decodes": 0}
+
+
+def fetch(url: str, *, max_bytes: int = MAX_BYTES) -> bytes:
+    """url의 본문을 bytes로. 실패 시 ImageFetchError."""
+    start = time.perf_counter()
+    try:
+        with _session.get(url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as resp:
+            resp.raise_for_status()
+            declared = int(resp.headers.get("Content-Length") or 0)
+            if declared > max_bytes:
+                raise ImageFetchError(f"이미지가 너무 큽니다: {declared} bytes")
+            buf = bytearray()
+            for chunk in resp.iter_content(_CHUNK):
+                buf += chunk
+                if len(buf) > max_bytes:
+                    raise ImageFetchError(f"이미지가 너무 큽니다: {max_bytes} bytes 초과")
+    except ImageFetchError:
+        with _lock:
+            _stats["errors"] += 1
+        raise
+    except requests.RequestException as e:
+        with _lock:
+            _stats["errors"] += 1
+        raise ImageFetchError(f"이미지 다운로드 실패: {e}") from e
+    with _lock:
+        _stats["fetches"] += 1
+        _stats["bytes"] += len(buf)
+        _stats["ms_total"] += (time.perf_counter() - start) * 1000.0
+    return bytes(buf)
+
+
+def fetch_many(urls: List[str], *, max_bytes: int = MAX_BYTES) -> List[Union[bytes, Exception]]:
+    """여러 URL을 동시에 받는다. 결과는 입력 순서대로, 실패한 항목은 예외 객체."""
+    def _one(u):
+        try:
+            return fetch(u, max_bytes=max_bytes)
+        except ImageFetchError as e:
+            return e
+
+    if len(urls) <= 1:
+        return [_one(u) for u in urls]
+    with ThreadPoolExecutor(max_workers=min(POOL_SIZE, len(urls))) as pool:
+        return list(pool.map(_one, urls))
+
+
+def image_bytes(item: Any, *, max_bytes: int = MAX_BYTES) -> bytes:
+    """
+    images.generate 응답의 data 항목 → 이미지 bytes.
+    b64_json이 있으면 디코드(추가 왕복 없음), 없으면 url을 다운로드.
+    """
+    b64 = item.get("b64_json") if isinstance(item, dict) else getattr(item, "b64_json", None)
+    if b64:
+        with _lock:
+            _stats["b64_decodes"] += 1
+        return base64.b64decode(b64)
+    url = item.get("url") if isinstance(item, dict) else getattr(item, "url", None)
+    if not url:
+        raise ImageFetchError("이미지 응답에 url/b64_json이 없습니다.")
+    return fetch(url, max_bytes=max_bytes)
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out = dict(_stats)
+    out["ms_avg"] = round(out["ms_total"] / out["fetches"], 1) if out["fetches"] else 0.0
+    out["ms_total"] = round(out["ms_total"], 1)
+    return out
@@ -0,0 +1,104 @@
+# utils/image_intake.py
+# 업로드 이미지 수신: 전체를 메모리에 올리지 않고 청크 단위로 받아 축소 디코드까지 처리.
+# - 바이트 상한(IMAGE_MAX_UPLOAD_BYTES)을 넘으면 즉시 중단(413)
+# - 앞부분(헤더)만으로 포맷/해상도를 먼저 확인 → 지원하지 않는 포맷(415)이나 과대 해상도(413)는 본문을 다 받기 전에 거절
+# - 본문은 SpooledTemporaryFile에 보관(작으면 메모리, 크면 디스크)
+# - 디코드는 목표 해상도 기준으로 축소: JPEG는 draft(), 그 외는 reduce()(thumbnail의 reducing_gap)
+# 결과는 목표 해상도(image_payload의 high 기준)로 줄여 비전 입력 포맷(image_payload.encode_image)으로 인코딩한 바이트.
+# image_payload는 이 결과를 다시 디코드/인코딩하지 않고 그대로 보낸다(요청당 디코드·인코딩 한 번).
+#
+# 설정(환경 변수):
+#   IMAGE_MAX_UPLOAD_BYTES : 업로드 최대 크기 (기본 20MB)
+#   IMAGE_MAX_PIXELS       : 원본 최대 픽셀 수 (기본 50MP)
+import asyncio, io, os, tempfile
+from typing import Tuple
+
+from PIL import Image, ImageOps
+
+from utils.image_payload import encode_image, target_size
+
+MAX_UPLOAD_BYTES = int(os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(50_000_000)))
+ALLOWED_FORMATS = {"JPEG", "MPO", "PNG", "WEBP", "GIF", "BMP"}
+
+_CHUNK = 64 * 1024
+_SNIFF_LIMIT = 512 * 1024      # 헤더 탐지에 쓰는 최대 바이트(EXIF가 큰 JPEG 대비)
+_SPOOL_MAX = 1024 * 1024       # 이보다 큰 업로드는 임시 파일로
+
+
+class UploadRejected(ValueError):
+    """업로드 거절(HTTP 상태 코드와 메시지를 함께 전달)."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _sniff(head: bytes, final: bool) -> Tuple[str, Tuple[int, int]]:
+    """
+    헤더 바이트에서 (포맷, (w, h))를 읽는다. 바이트가 더 필요하면 LookupError.
+    Image.open은 지연 로딩이라 픽셀 데이터는 디코드하지 않는다.
+    """
+    try:
+        with Image.open(io.BytesIO(head)) as im:
+            fmt, size = im.format, im.size
+    except Exception:
+        if not final and len(head) < _SNIFF_LIMIT:
+            raise LookupError
+        raise UploadRejected(415, "이미지 파일을 인식할 수 없습니다.")
+    if fmt not in ALLOWED_FORMATS:
+        raise UploadRejected(415, f"지원하지 않는 이미지 형식입니다: {fmt}")
+    if size[0] * size[1] > MAX_PIXELS:
+        raise UploadRejected(413, f"이미지 해상도가 너무 큽니다: {size[0]}x{size[1]}")
+    return fmt, size
+
+
+def _decode_reduced(fileobj, fmt: str, size: Tuple[int, int], detail: str) -> bytes:
+    tw, th = target_size(*size, detail)
+    with Image.open(fileobj) as im:
+        if fmt in ("JPEG", "MPO"):
+            # 목표 크기 이상을 유지하는 가장 작은 1/2^n 스케일로 디코드
+            # (thumbnail 자체 draft는 목표의 2배 기준이라 한 단계 덜 줄어든다)
+            im.draft("RGB", (tw, th))
+        # 그 외 포맷: 디코드 후 reduce()로 정수배 축소한 뒤 리샘플
+        im.thumbnail((tw, th), Image.LANCZOS, reducing_gap=2.0)
+        im = ImageOps.exif_transpose(im)  # 휴대폰 사진의 회전 정보 반영
+        if im.mode != "RGB":
+            im = im.convert("RGB")
+        return encode_image(im)
+
+
+async def read_image_upload(upload, *, max_bytes: int = MAX_UPLOAD_BYTES, detail: str = "high") -> bytes:
+    """
+    UploadFile을 청크 단위로 읽어 검사 후, 목표 해상도로 축소해 비전 입력 포맷으로 인코딩한 바이트를 반환.
+    실패 시 UploadRejected(status_code, detail).
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX)
+    try:
+        head = bytearray()
+        sniffed = None
+        total = 0
+        while True:
+            chunk = await upload.read(_CHUNK)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > max_bytes:
+                raise UploadRejected(413, f"업로드 용량 초과(최대 {max_bytes // (1024 * 1024)}MB)")
+            spool.write(chunk)
+            if sniffed is None:
+                head += chunk
+                try:
+                    sniffed = _sniff(bytes(head), final=False)
+                    head = bytearray()
+                except LookupError:
+                    pass
+        if sniffed is None:
+            if not total:
+                raise UploadRejected(400, "빈 파일입니다.")
+            sniffed = _sniff(bytes(head), final=True)
+        spool.seek(0)
+        return await asyncio.to_thread(_decode_reduced, spool, sniffed[0], sniffed[1], detail)
+    finally:
+        spool.close()
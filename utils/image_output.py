@@ -0,0 +1,112 @@
+# utils/image_output.py
+# 생성 이미지(포스터/카드뉴스/마스코트) 출력 단계: 한 번만 인코딩하고, 같은 바이트를
+# 디스크 저장(백그라운드 스레드)과 클라이언트 응답에 함께 쓴다.
+# - png  : 무손실. compress_level을 낮춰(기본 3) 인코딩 시간을 줄임
+#          (사진 배경은 크기 +3% 정도, 단색/그라디언트 배경은 더 커지므로 IMAGE_OUTPUT_PNG_LEVEL로 조정)
+# - webp : 손실/고품질. 사진 배경 + 글자 합성물에서 크기가 가장 작다
+# - jpeg : 사진 배경용. 알파 채널은 흰 배경에 합성 후 저장
+# 디스크 쓰기는 임시 파일에 쓴 뒤 os.replace → 읽는 쪽이 반쯤 쓴 파일을 보지 않음.
+#
+# 설정(환경 변수):
+#   IMAGE_OUTPUT_FORMAT       : 기본 출력 포맷 png / webp / jpeg (기본 png)
+#   IMAGE_OUTPUT_PNG_LEVEL    : PNG compress_level 0~9 (기본 3)
+#   IMAGE_OUTPUT_QUALITY      : webp/jpeg 품질 (기본 90)
+#   IMAGE_OUTPUT_WRITERS      : 디스크 저장 스레드 수 (기본 2)
+import io, logging, os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "png").lower()
+PNG_LEVEL = int(os.getenv("IMAGE_OUTPUT_PNG_LEVEL", "3"))
+QUALITY = int(os.getenv("IMAGE_OUTPUT_QUALITY", "90"))
+WRITERS = int(os.getenv("IMAGE_OUTPUT_WRITERS", "2"))
+# libwebp method: 0이 가장 빠르고, 사진+글자 포스터에서는 4와 크기 차이가 거의 없다(1024px 기준 218ms → 104ms)
+_WEBP_METHOD = 0
+
+# 포맷 → (PIL 포맷, MIME, 확장자)
+FORMATS = {
+    "png": ("PNG", "image/png", ".png"),
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+}
+
+_writer = ThreadPoolExecutor(max_workers=WRITERS, thread_name_prefix="image-output")
+
+
+def resolve_format(fmt: Optional[str]) -> str:
+    fmt = (fmt or DEFAULT_FORMAT).lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    return fmt if fmt in FORMATS else "png"
+
+
+def encode(img: Image.Image, fmt: Optional[str] = None) -> Tuple[bytes, str, str]:
+    """
+    이미지를 한 번 인코딩. 반환: (bytes, mime, 확장자)
+    """
+    fmt = resolve_format(fmt)
+    pil_fmt, mime, ext = FORMATS[fmt]
+    buf = io.BytesIO()
+    if fmt == "png":
+        img.save(buf, format=pil_fmt, compress_level=PNG_LEVEL)
+    elif fmt == "webp":
+        img.save(buf, format=pil_fmt, quality=QUALITY, method=_WEBP_METHOD)
+    else:
+        if img.mode in ("RGBA", "LA", "P"):
+            rgba = img.convert("RGBA")
+            flat = Image.new("RGB", rgba.size, (255, 255, 255))
+            flat.paste(rgba, mask=rgba.getchannel("A"))
+            img = flat
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(buf, format=pil_fmt, quality=QUALITY, optimize=False)
+    return buf.getvalue(), mime, ext
+
+
+def _write(path: str, data: bytes, on_saved: Optional[Callable[[str], None]]) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    if on_saved is not None:
+        on_saved(path)
+    return path
+
+
+def _log_failure(fut: Future) -> None:
+    exc = fut.exception()
+    if exc is not None:
+        logger.error("image save failed: %s", exc)
+
+
+def save_bytes(path: str, data: bytes, *, on_saved: Optional[Callable[[str], None]] = None) -> Future:
+    """
+    data를 path에 백그라운드로 저장. on_saved(path)는 파일이 완성된 뒤 같은 스레드에서 호출
+    (DB 기록 등 "파일이 있어야 하는" 후처리를 여기에 둔다).
+    """
+    fut = _writer.submit(_write, path, data, on_saved)
+    fut.add_done_callback(_log_failure)
+    return fut
+
+
+def encode_and_save(
+    img: Image.Image,
+    directory: str,
+    stem: str,
+    fmt: Optional[str] = None,
+    *,
+    on_saved: Optional[Callable[[str], None]] = None,
+) -> Tuple[bytes, str, str]:
+    """
+    한 번 인코딩해서 directory/stem.<ext>로 백그라운드 저장하고, 같은 바이트를 반환.
+    반환: (bytes, mime, 저장 경로)
+    """
+    data, mime, ext = encode(img, fmt)
+    path = os.path.join(directory, stem + ext)
+    save_bytes(path, data, on_saved=on_saved)
+    return data, mime, path
@@ -0,0 +1,134 @@
+# utils/image_payload.py
+# 비전 호출용 이미지 전처리(디코드 → 리사이즈 → 인코딩 → base64 data URI)를 한 번만 수행하고 캐시.
+# - 키: (이미지 내용 sha256, detail, 포맷, 품질) → 같은 업로드로 재시도/보충 호출을 해도 재인코딩 없음
+# - detail 수준에 맞춰 목표 해상도를 정한다(서버가 어차피 줄이는 크기 이상은 보내지 않음)
+#     low  : 512px 이내
+#     high : 2048px 이내 + 짧은 변 768px 이내
+# - JPEG 원본은 Pillow draft 모드로 축소 디코드(큰 사진의 디코드 비용 절감)
+# - 이미 목표 크기/포맷인 입력(image_intake가 encode_image로 만든 업로드)은 base64만 붙인다
+#
+# 설정(환경 변수):
+#   OPENAI_IMAGE_DETAIL        : 기본 detail (low / high, 기본 high)
+#   OPENAI_IMAGE_FORMAT        : jpeg / webp / png (기본 jpeg)
+#   OPENAI_IMAGE_QUALITY       : jpeg/webp 품질 (기본 85)
+#   OPENAI_IMAGE_CACHE_ENTRIES : 캐시할 data URI 개수 (기본 64)
+import base64, hashlib, io, os, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+DEFAULT_DETAIL = os.getenv("OPENAI_IMAGE_DETAIL", "high").lower()
+IMAGE_FORMAT = os.getenv("OPENAI_IMAGE_FORMAT", "jpeg").lower()
+IMAGE_QUALITY = int(os.getenv("OPENAI_IMAGE_QUALITY", "85"))
+CACHE_MAX_ENTRIES = int(os.getenv("OPENAI_IMAGE_CACHE_ENTRIES", "64"))
+
+# 모델별 detail 수준(없으면 DEFAULT_DETAIL)
+MODEL_DETAIL: Dict[str, str] = {}
+
+# detail → (긴 변 최대, 짧은 변 최대)
+_TARGETS = {
+    "low": (512, 512),
+    "high": (2048, 768),
+}
+
+_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "png": ("PNG", "image/png"),
+}
+
+_lock = threading.Lock()
+_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "encode_ms_total": 0.0, "bytes_in": 0, "bytes_out": 0}
+
+
+def detail_for(model: str) -> str:
+    detail = MODEL_DETAIL.get(model, DEFAULT_DETAIL)
+    return detail if detail in _TARGETS else "high"
+
+
+def target_size(w: int, h: int, detail: str = "high") -> Tuple[int, int]:
+    """원본 (w, h)를 detail 수준의 목표 해상도로 줄인 크기(확대는 하지 않음)."""
+    long_max, short_max = _TARGETS[detail]
+    r = min(1.0, long_max / float(max(w, h)), short_max / float(min(w, h)))
+    return max(1, int(w * r)), max(1, int(h * r))
+
+
+def encode_image(im: Image.Image, fmt: Optional[str] = None, quality: int = IMAGE_QUALITY) -> bytes:
+    """RGB 이미지를 비전 입력 포맷(기본 OPENAI_IMAGE_FORMAT)으로 인코딩. 리사이즈는 하지 않는다."""
+    pil_fmt = _FORMATS[fmt or _payload_format()][0]
+    out = io.BytesIO()
+    if pil_fmt == "PNG":
+        im.save(out, format="PNG")
+    else:
+        im.save(out, format=pil_fmt, quality=quality)
+    return out.getvalue()
+
+
+def _payload_format() -> str:
+    return IMAGE_FORMAT if IMAGE_FORMAT in _FORMATS else "jpeg"
+
+
+def _encode(image_bytes: bytes, detail: str, fmt: str, quality: int) -> str:
+    pil_fmt, mime = _FORMATS[fmt]
+    with Image.open(io.BytesIO(image_bytes)) as im:
+        tw, th = target_size(*im.size, detail)
+        if im.format == pil_fmt and im.mode == "RGB" and im.size == (tw, th):
+            # 이미 목표 크기/포맷(image_intake 결과 등): 다시 디코드/인코딩하지 않고 그대로 보낸다
+            raw = image_bytes
+        else:
+            if im.format == "JPEG":
+                # 목표 크기 이상을 유지하는 가장 작은 1/2^n 스케일로 디코드
+                im.draft("RGB", (tw, th))
+            im = im.convert("RGB")
+            if im.size != (tw, th):
+                im = im.resize((tw, th), Image.LANCZOS)
+            raw = encode_image(im, fmt, quality)
+    data = base64.b64encode(raw).decode("ascii")
+    return f"data:{mime};base64,{data}"
+
+
+def image_data_uri(image_bytes: bytes, *, model: Optional[str] = None, detail: Optional[str] = None) -> Tuple[str, str]:
+    """
+    업로드 이미지를 비전 입력용 data URI로 변환. 같은 내용/설정이면 캐시된 결과를 반환.
+    반환: (data_uri, detail)
+    """
+    detail = detail if detail in _TARGETS else detail_for(model or "")
+    fmt = _payload_format()
+    key = (hashlib.sha256(image_bytes).hexdigest(), detail, fmt, IMAGE_QUALITY)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return hit, detail
+
+    start = time.process_time()
+    uri = _encode(image_bytes, detail, fmt, IMAGE_QUALITY)
+    spent_ms = (time.process_time() - start) * 1000.0
+
+    with _lock:
+        _stats["misses"] += 1
+        _stats["encode_ms_total"] += spent_ms
+        _stats["bytes_in"] += len(image_bytes)
+        _stats["bytes_out"] += len(uri)
+        _cache[key] = uri
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return uri, detail
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out = dict(_stats)
+        out["entries"] = len(_cache)
+    out["encode_ms_avg"] = round(out["encode_ms_total"] / out["misses"], 2) if out["misses"] else 0.0
+    out["encode_ms_total"] = round(out["encode_ms_total"], 2)
+    return out
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
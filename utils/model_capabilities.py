@@ -0,0 +1,87 @@
+# utils/model_capabilities.py
+# 모델별로 서버/SDK가 거절한 파라미터(temperature/top_p/response_format)를 기억하는 레지스트리.
+# 한 번 거절된 파라미터는 이후 첫 요청부터 제거해서, gpt-5 계열의 "거절 → 재호출" 왕복을 없앤다.
+# - 시드: OPENAI_MODEL_CAPS_PATH(JSON: {"모델명": ["temperature", ...]})가 있으면 시작 시 로드
+# - 영속화: 새로 배운 내용은 같은 파일에 저장되어 재시작 후에도 유지
+import json, os, threading
+from typing import Any, Dict, Iterable, List
+
+CAPS_PATH = os.getenv("OPENAI_MODEL_CAPS_PATH", os.path.join("data", "cache", "model_capabilities.json"))
+PERSIST = os.getenv("OPENAI_MODEL_CAPS_PERSIST", "1") not in ("0", "false", "False")
+
+_lock = threading.Lock()
+_unsupported: Dict[str, set] = {}
+_stats = {"learned": 0, "double_calls": 0, "avoided_double_calls": 0}
+
+
+def _load() -> None:
+    try:
+        with open(CAPS_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if not isinstance(data, dict):
+        return
+    for model, params in data.items():
+        if isinstance(params, list):
+            _unsupported.setdefault(str(model), set()).update(str(p) for p in params)
+
+
+def _save() -> None:
+    # _lock 보유 상태에서 호출
+    if not PERSIST:
+        return
+    try:
+        os.makedirs(os.path.dirname(CAPS_PATH) or ".", exist_ok=True)
+        tmp = CAPS_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({m: sorted(p) for m, p in _unsupported.items()}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, CAPS_PATH)
+    except OSError:
+        pass
+
+
+_load()
+
+
+# -------------------- 공개 API --------------------
+def strip_unsupported(kwargs: Dict[str, Any]) -> List[str]:
+    """이미 거절된 것으로 알려진 파라미터를 첫 시도 전에 kwargs에서 제거하고, 제거한 목록을 반환."""
+    model = kwargs.get("model")
+    with _lock:
+        known = _unsupported.get(model)
+        if not known:
+            return []
+        removed = [p for p in known if p in kwargs]
+        if removed:
+            _stats["avoided_double_calls"] += 1
+    for p in removed:
+        kwargs.pop(p, None)
+    return removed
+
+
+def record_rejected(model: str, params: Iterable[str]) -> None:
+    """모델이 거절한 파라미터를 기록(재호출 1회 발생으로 집계)."""
+    params = [p for p in params if p]
+    if not params:
+        return
+    with _lock:
+        _stats["double_calls"] += 1
+        known = _unsupported.setdefault(model, set())
+        new = set(params) - known
+        if new:
+            known.update(new)
+            _stats["learned"] += len(new)
+            _save()
+
+
+def unsupported_params(model: str) -> List[str]:
+    with _lock:
+        return sorted(_unsupported.get(model, ()))
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out = dict(_stats)
+        out["models"] = {m: sorted(p) for m, p in _unsupported.items()}
+    return out
@@ -0,0 +1,504 @@
+# utils/openai_stub_server.py
+# 로컬 OpenAI 호환 대역 서버(오프라인 부하/지연 테스트용).
+# 백엔드가 쓰는 엔드포인트만 흉내 낸다.
+#   POST /v1/responses              (stream=True SSE 포함, json_schema/max_output_tokens 잘림 재현)
+#   POST /v1/chat/completions
+#   POST /v1/images/generations     (response_format: url / b64_json, 플레이스홀더 PNG 생성)
+#   GET  /v1/stub-images/{id}.png   (url 응답이 가리키는 이미지)
+#   POST /v1/files, GET /v1/files/{id}/content, POST /v1/batches, GET /v1/batches/{id}  (배치 인터페이스)
+#   GET  /stub/stats                (엔드포인트별 호출 수, 주입한 오류 수)
+#
+# 실행:
+#   python -m utils.openai_stub_server --port 8100 --latency lognormal:800:0.5 --rate-limit-rate 0.02
+#   백엔드는 OPENAI_BASE_URL=http://127.0.0.1:8100/v1 로 띄우면 모든 서비스가 이 서버를 사용한다.
+#
+# 지연 분포 형식: fixed:ms | uniform:lo_ms:hi_ms | lognormal:median_ms:sigma
+# 같은 요청 본문 + 같은 --seed 면 항상 같은 출력이 나온다(지연/오류 주입 순서도 seed로 고정).
+import argparse, asyncio, base64, hashlib, io, json, math, os, random, re, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from PIL import Image, ImageDraw
+
+# ---------- 설정 ----------
+CONFIG: Dict[str, Any] = {
+    "latency": os.getenv("STUB_OPENAI_LATENCY", "lognormal:600:0.4"),
+    "image_latency": os.getenv("STUB_OPENAI_IMAGE_LATENCY", "lognormal:4000:0.3"),
+    # url 응답 이미지를 내려받을 때의 지연(실서비스의 별도 CDN 왕복을 흉내)
+    "fetch_latency": os.getenv("STUB_OPENAI_FETCH_LATENCY", "fixed:0"),
+    "stream_chunk_ms": float(os.getenv("STUB_OPENAI_STREAM_CHUNK_MS", "15")),
+    "error_rate": float(os.getenv("STUB_OPENAI_ERROR_RATE", "0")),
+    "rate_limit_rate": float(os.getenv("STUB_OPENAI_RATE_LIMIT_RATE", "0")),
+    "retry_after_ms": int(os.getenv("STUB_OPENAI_RETRY_AFTER_MS", "1000")),
+    "seed": int(os.getenv("STUB_OPENAI_SEED", "0")),
+    # 모델별로 거절할 파라미터(예: "gpt-5:temperature,top_p;gpt-5-mini:temperature")
+    "reject_params": os.getenv("STUB_OPENAI_REJECT_PARAMS", ""),
+    # 고정 응답 파일(JSON: [{"match": "부분문자열", "output": "응답 텍스트"}, ...]) — 템플릿보다 우선
+    "canned_path": os.getenv("STUB_OPENAI_CANNED", ""),
+}
+
+_lock = threading.Lock()
+_rng = random.Random(CONFIG["seed"])
+_images: "OrderedDict[str, bytes]" = OrderedDict()
+_IMAGE_CACHE_MAX = 64
+_stats: Dict[str, int] = {}
+_canned: List[Dict[str, str]] = []
+
+app = FastAPI(title="OpenAI stub", version="1.0")
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _stats[name] = _stats.get(name, 0) + 1
+
+
+def _load_canned() -> None:
+    _canned.clear()
+    if not CONFIG["canned_path"]:
+        return
+    try:
+        with open(CONFIG["canned_path"], "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if isinstance(data, list):
+        _canned.extend(x for x in data if isinstance(x, dict) and "match" in x and "output" in x)
+
+
+_load_canned()
+
+
+# ---------- 지연 / 오류 주입 ----------
+def _sample_ms(spec: str) -> float:
+    kind, *args = spec.split(":")
+    vals = [float(a) for a in args]
+    with _lock:
+        if kind == "fixed":
+            return vals[0]
+        if kind == "uniform":
+            return _rng.uniform(vals[0], vals[1])
+        if kind == "lognormal":
+            return vals[0] * math.exp(_rng.gauss(0.0, vals[1] if len(vals) > 1 else 0.5))
+    raise ValueError(f"unknown latency spec: {spec}")
+
+
+def _error(status: int, message: str, err_type: str, code: Optional[str] = None,
+           param: Optional[str] = None, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    body = {"error": {"message": message, "type": err_type, "param": param, "code": code}}
+    return JSONResponse(body, status_code=status, headers=headers)
+
+
+def _inject_fault() -> Optional[JSONResponse]:
+    with _lock:
+        roll = _rng.random()
+    if roll < CONFIG["rate_limit_rate"]:
+        _count("injected_429")
+        ms = CONFIG["retry_after_ms"]
+        return _error(429, "Rate limit reached (stub)", "requests", "rate_limit_exceeded",
+                      headers={"retry-after-ms": str(ms), "retry-after": str(max(1, ms // 1000))})
+    if roll < CONFIG["rate_limit_rate"] + CONFIG["error_rate"]:
+        _count("injected_500")
+        return _error(500, "The server had an error (stub)", "server_error")
+    return None
+
+
+def _rejected_param(model: str, body: Dict[str, Any]) -> Optional[JSONResponse]:
+    for rule in filter(None, CONFIG["reject_params"].split(";")):
+        m, _, params = rule.partition(":")
+        if m.strip() != model:
+            continue
+        for p in params.split(","):
+            p = p.strip()
+            if p and p in body:
+                _count("rejected_param")
+                return _error(400, f"Unsupported parameter: '{p}' is not supported with this model.",
+                              "invalid_request_error", "unsupported_parameter", param=p)
+    return None
+
+
+# ---------- 출력 템플릿 ----------
+_COPY_TEMPLATES = [
+    "오늘 하루, {k}와 함께 특별하게",
+    "한 번 맛보면 잊지 못할 {k}",
+    "지금 이 순간, {k}가 기다려요",
+    "당신의 일상에 {k} 한 스푼",
+    "{k}, 이번 주말엔 꼭 만나요",
+    "작은 행복이 시작되는 곳, {k}",
+    "망설이면 늦어요! {k} 한정 혜택",
+    "매일 새롭게, 언제나 정성스럽게 {k}",
+]
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 2)
+
+
+def _text_of(v: Any) -> str:
+    # input / messages 의 문자열 내용만 이어 붙인다(이미지 등은 무시)
+    if isinstance(v, str):
+        return v
+    if isinstance(v, list):
+        return "\n".join(_text_of(x) for x in v)
+    if isinstance(v, dict):
+        return "\n".join(_text_of(v[k]) for k in ("content", "text") if k in v)
+    return ""
+
+
+def _keyword(prompt: str) -> str:
+    m = re.search(r"(?:상품명|제품명|상호명|매장명|상품|topic)\W{0,4}([^\n,\"]{1,20})", prompt)
+    return m.group(1).strip() if m else "우리 가게"
+
+
+def _generate(prompt: str, body: Dict[str, Any], seed: int) -> str:
+    for c in _canned:
+        if c["match"] in prompt:
+            return c["output"]
+
+    r = random.Random(seed)
+    fmt = ((body.get("text") or {}).get("format") or {})
+    if fmt.get("type") == "json_schema" or '"copies"' in prompt or "copies" in prompt:
+        m = re.search(r"(\d+)\s*개", prompt)
+        n = int(m.group(1)) if m else 3
+        k = _keyword(prompt)
+        picks = r.sample(_COPY_TEMPLATES, min(n, len(_COPY_TEMPLATES)))
+        copies = [t.format(k=k) for t in picks]
+        copies += [f"{k} 추천 문구 {i + 1}" for i in range(n - len(copies))]
+        return json.dumps({"copies": copies}, ensure_ascii=False)
+    if "TITLE_KO" in prompt:
+        k = _keyword(prompt)
+        return json.dumps({
+            "TITLE_KO": r.choice(_COPY_TEMPLATES).format(k=k),
+            "BODY_KO": f"{k}에서 준비한 특별한 시간을 만나보세요.",
+            "DALLE_PROMPT_EN": "A warm, inviting storefront scene, soft light, no text",
+        }, ensure_ascii=False)
+    if "num_pages" in prompt:
+        m = re.search(r'"num_pages"\s*:\s*(\d+)', prompt)
+        n = int(m.group(1)) if m else 3
+        k = _keyword(prompt)
+        pages = [{"title": f"{k} {i + 1}", "body": r.choice(_COPY_TEMPLATES).format(k=k)} for i in range(n)]
+        return json.dumps(pages, ensure_ascii=False)
+    if "html" in prompt.lower() or "웹페이지" in prompt:
+        return "<!doctype html><html lang=\"ko\"><head><meta charset=\"utf-8\"><title>stub</title></head>" \
+               "<body><h1>Stub page</h1></body></html>"
+    return r.choice(_COPY_TEMPLATES).format(k=_keyword(prompt))
+
+
+def _seed_for(body: Dict[str, Any]) -> int:
+    raw = json.dumps(body, ensure_ascii=False, sort_keys=True, default=str)
+    return int(hashlib.sha256(f"{CONFIG['seed']}:{raw}".encode("utf-8")).hexdigest()[:12], 16)
+
+
+def _truncate(text: str, max_tokens: Optional[int]) -> Tuple[str, bool]:
+    if max_tokens and _tokens(text) > int(max_tokens):
+        return text[: int(max_tokens) * 2], True
+    return text, False
+
+
+async def _pre(request: Request, name: str, latency_spec: str) -> Tuple[Dict[str, Any], Optional[JSONResponse]]:
+    _count(name)
+    body = await request.json()
+    await asyncio.sleep(_sample_ms(latency_spec) / 1000.0)
+    return body, (_inject_fault() or _rejected_param(body.get("model", ""), body))
+
+
+# ---------- /v1/responses ----------
+def _response_obj(rid: str, model: str, text: str, status: str, in_tok: int, out_tok: int) -> Dict[str, Any]:
+    return {
+        "id": rid,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": status,
+        "incomplete_details": {"reason": "max_output_tokens"} if status == "incomplete" else None,
+        "output": [{
+            "type": "message",
+            "id": "msg_" + rid[5:],
+            "role": "assistant",
+            "status": status,
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": in_tok,
+            "output_tokens": out_tok,
+            "total_tokens": in_tok + out_tok,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+def _responses_body(body: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = _text_of(body.get("instructions")) + "\n" + _text_of(body.get("input"))
+    seed = _seed_for(body)
+    text, cut = _truncate(_generate(prompt, body, seed), body.get("max_output_tokens"))
+    status = "incomplete" if cut else "completed"
+    return _response_obj(f"resp_{seed:012x}", body.get("model", ""), text, status, _tokens(prompt), _tokens(text))
+
+
+@app.post("/v1/responses")
+async def responses(request: Request):
+    body, err = await _pre(request, "responses", CONFIG["latency"])
+    if err:
+        return err
+    obj = _responses_body(body)
+    status = obj["status"]
+    text = obj["output"][0]["content"][0]["text"]
+
+    if not body.get("stream"):
+        return JSONResponse(obj)
+
+    async def events():
+        seq = 0
+
+        def ev(payload: Dict[str, Any]) -> str:
+            nonlocal seq
+            payload["sequence_number"] = seq
+            seq += 1
+            return f"event: {payload['type']}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        yield ev({"type": "response.created", "response": {**obj, "status": "in_progress", "output": []}})
+        item_id = obj["output"][0]["id"]
+        for i in range(0, len(text), 8):
+            await asyncio.sleep(CONFIG["stream_chunk_ms"] / 1000.0)
+            yield ev({"type": "response.output_text.delta", "item_id": item_id, "output_index": 0,
+                      "content_index": 0, "delta": text[i:i + 8]})
+        yield ev({"type": "response.output_text.done", "item_id": item_id, "output_index": 0,
+                  "content_index": 0, "text": text})
+        yield ev({"type": f"response.{status}", "response": obj})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# ---------- /v1/chat/completions ----------
+def _chat_body(body: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = _text_of(body.get("messages"))
+    seed = _seed_for(body)
+    text, cut = _truncate(_generate(prompt, body, seed), body.get("max_tokens") or body.get("max_completion_tokens"))
+    in_tok, out_tok = _tokens(prompt), _tokens(text)
+    return {
+        "id": f"chatcmpl-{seed:012x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", ""),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text, "refusal": None},
+            "finish_reason": "length" if cut else "stop",
+            "logprobs": None,
+        }],
+        "usage": {"prompt_tokens": in_tok, "completion_tokens": out_tok, "total_tokens": in_tok + out_tok},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body, err = await _pre(request, "chat.completions", CONFIG["latency"])
+    if err:
+        return err
+    return JSONResponse(_chat_body(body))
+
+
+# ---------- /v1/images/generations ----------
+def _placeholder_png(prompt: str, size: str, seed: int) -> bytes:
+    try:
+        w, h = (int(x) for x in size.lower().split("x"))
+    except ValueError:
+        w, h = 1024, 1024
+    r = random.Random(seed)
+    top = tuple(r.randint(40, 215) for _ in range(3))
+    bottom = tuple(min(255, c + 40) for c in top)
+    # 세로 그라디언트(한 줄씩 그리면 느리므로 1px 폭 그라디언트를 늘린다)
+    grad = Image.new("RGB", (1, 256))
+    for y in range(256):
+        t = y / 255.0
+        grad.putpixel((0, y), tuple(int(a + (b - a) * t) for a, b in zip(top, bottom)))
+    img = grad.resize((w, h))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([w // 8, h // 8, w - w // 8, h - h // 8], outline=(255, 255, 255), width=max(2, w // 200))
+    draw.text((w // 8 + 10, h // 8 + 10), f"stub {w}x{h}\n{prompt[:60]}", fill=(255, 255, 255))
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+@app.post("/v1/images/generations")
+async def images_generations(request: Request):
+    body, err = await _pre(request, "images.generate", CONFIG["image_latency"])
+    if err:
+        return err
+    n = int(body.get("n") or 1)
+    seed = _seed_for(body)
+    prompt = str(body.get("prompt", ""))
+    size = str(body.get("size") or "1024x1024")
+    data = []
+    for i in range(n):
+        png = await asyncio.to_thread(_placeholder_png, prompt, size, seed + i)
+        if body.get("response_format") == "b64_json":
+            data.append({"b64_json": base64.b64encode(png).decode("ascii"), "revised_prompt": prompt})
+            continue
+        image_id = f"{seed + i:012x}"
+        with _lock:
+            _images[image_id] = png
+            _images.move_to_end(image_id)
+            while len(_images) > _IMAGE_CACHE_MAX:
+                _images.popitem(last=False)
+        url = str(request.url_for("stub_image", image_id=image_id))
+        data.append({"url": url, "revised_prompt": prompt})
+    return JSONResponse({"created": int(time.time()), "data": data})
+
+
+@app.get("/v1/stub-images/{image_id}.png", name="stub_image")
+async def stub_image(image_id: str):
+    _count("images.fetch")
+    await asyncio.sleep(_sample_ms(CONFIG["fetch_latency"]) / 1000.0)
+    with _lock:
+        png = _images.get(image_id)
+    if png is None:
+        return _error(404, "image expired (stub)", "invalid_request_error")
+    return Response(png, media_type="image/png")
+
+
+# ---------- /v1/files, /v1/batches (배치 작업용) ----------
+_files: Dict[str, Dict[str, Any]] = {}
+_batches: Dict[str, Dict[str, Any]] = {}
+_BATCH_HANDLERS = {"/v1/responses": _responses_body, "/v1/chat/completions": _chat_body}
+
+
+def _file_obj(file_id: str, filename: str, purpose: str, content: bytes) -> Dict[str, Any]:
+    obj = {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+           "filename": filename, "purpose": purpose, "status": "processed"}
+    with _lock:
+        _files[file_id] = {**obj, "content": content}
+    return obj
+
+
+@app.post("/v1/files")
+async def files_create(request: Request):
+    _count("files.create")
+    form = await request.form()
+    upload = form["file"]
+    content = await upload.read()
+    file_id = "file-" + hashlib.sha256(content).hexdigest()[:24]
+    return JSONResponse(_file_obj(file_id, upload.filename or "upload.jsonl", str(form.get("purpose", "")), content))
+
+
+@app.get("/v1/files/{file_id}/content")
+async def files_content(file_id: str):
+    with _lock:
+        f = _files.get(file_id)
+    if f is None:
+        return _error(404, f"No such File object: {file_id}", "invalid_request_error")
+    return Response(f["content"], media_type="application/octet-stream")
+
+
+def _run_batch(batch_id: str) -> None:
+    with _lock:
+        batch = _batches[batch_id]
+        content = _files[batch["input_file_id"]]["content"]
+    handler = _BATCH_HANDLERS[batch["endpoint"]]
+    out_lines, err_lines = [], []
+    for line in content.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        req = json.loads(line)
+        cid = req.get("custom_id")
+        with _lock:
+            failed = _rng.random() < CONFIG["error_rate"]
+        if failed:
+            err_lines.append({"id": f"batch_req_{cid}", "custom_id": cid, "response": None,
+                              "error": {"code": "server_error", "message": "stub batch item failure"}})
+            continue
+        out_lines.append({"id": f"batch_req_{cid}", "custom_id": cid, "error": None,
+                          "response": {"status_code": 200, "request_id": cid, "body": handler(req.get("body") or {})}})
+
+    def _dump(lines):
+        return "".join(json.dumps(x, ensure_ascii=False) + "\n" for x in lines).encode("utf-8")
+
+    out_id = _file_obj(f"file-out-{batch_id}", f"{batch_id}_output.jsonl", "batch_output", _dump(out_lines))["id"]
+    err_id = _file_obj(f"file-err-{batch_id}", f"{batch_id}_error.jsonl", "batch_output", _dump(err_lines))["id"] \
+        if err_lines else None
+    with _lock:
+        batch.update(status="completed", completed_at=int(time.time()), output_file_id=out_id, error_file_id=err_id,
+                     request_counts={"total": len(out_lines) + len(err_lines),
+                                     "completed": len(out_lines), "failed": len(err_lines)})
+
+
+@app.post("/v1/batches")
+async def batches_create(request: Request):
+    _count("batches.create")
+    body = await request.json()
+    if body.get("endpoint") not in _BATCH_HANDLERS or body.get("input_file_id") not in _files:
+        return _error(400, "invalid endpoint or input_file_id", "invalid_request_error")
+    batch_id = f"batch_{hashlib.sha256(body['input_file_id'].encode()).hexdigest()[:16]}_{len(_batches)}"
+    with _lock:
+        _batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress", "created_at": int(time.time()),
+            "output_file_id": None, "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+
+    async def _later():
+        await asyncio.sleep(_sample_ms(CONFIG["latency"]) / 1000.0)
+        await asyncio.to_thread(_run_batch, batch_id)
+
+    asyncio.get_running_loop().create_task(_later())
+    return JSONResponse(dict(_batches[batch_id]))
+
+
+@app.get("/v1/batches/{batch_id}")
+async def batches_retrieve(batch_id: str):
+    with _lock:
+        batch = _batches.get(batch_id)
+        out = dict(batch) if batch else None
+    if out is None:
+        return _error(404, f"No such Batch object: {batch_id}", "invalid_request_error")
+    return JSONResponse(out)
+
+
+# ---------- 운영 ----------
+@app.get("/stub/stats")
+async def stub_stats():
+    with _lock:
+        return {"counts": dict(_stats), "config": dict(CONFIG)}
+
+
+def main() -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8100)
+    ap.add_argument("--latency", default=CONFIG["latency"], help="responses/chat 지연 분포")
+    ap.add_argument("--image-latency", default=CONFIG["image_latency"], help="images 지연 분포")
+    ap.add_argument("--fetch-latency", default=CONFIG["fetch_latency"], help="url 이미지 다운로드 지연 분포")
+    ap.add_argument("--stream-chunk-ms", type=float, default=CONFIG["stream_chunk_ms"])
+    ap.add_argument("--error-rate", type=float, default=CONFIG["error_rate"], help="500 주입 비율")
+    ap.add_argument("--rate-limit-rate", type=float, default=CONFIG["rate_limit_rate"], help="429 주입 비율")
+    ap.add_argument("--retry-after-ms", type=int, default=CONFIG["retry_after_ms"])
+    ap.add_argument("--seed", type=int, default=CONFIG["seed"])
+    ap.add_argument("--reject-params", default=CONFIG["reject_params"])
+    ap.add_argument("--canned", default=CONFIG["canned_path"], help="고정 응답 JSON 파일")
+    args = ap.parse_args()
+
+    CONFIG.update(
+        latency=args.latency, image_latency=args.image_latency, fetch_latency=args.fetch_latency,
+        stream_chunk_ms=args.stream_chunk_ms,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, retry_after_ms=args.retry_after_ms,
+        seed=args.seed, reject_params=args.reject_params, canned_path=args.canned,
+    )
+    for spec in (CONFIG["latency"], CONFIG["image_latency"], CONFIG["fetch_latency"]):
+        _sample_ms(spec)  # 형식 오류는 시작 시점에 드러나도록
+    _rng.seed(CONFIG["seed"])
+    _load_canned()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,172 +1,345 @@
 # utils/openai_utils.py
-import base64, io, json, re, time, os
-from typing import Any, Dict, List, Tuple, Optional
+import asyncio, random, time, os
+from typing import Any, AsyncIterator, Dict, List, Tuple, Optional
 
-from openai import OpenAI, BadRequestError
+from openai import OpenAI, AsyncOpenAI, BadRequestError
 try:
     from openai import APIConnectionError, RateLimitError, APIStatusError
 except Exception:
     APIConnectionError = RateLimitError = APIStatusError = Exception
 
 from dotenv import load_dotenv, find_dotenv
-from PIL import Image
+
+from utils import hedging, image_payload, model_capabilities, rate_limiter, response_cache
+# 문구 파서는 utils/copy_parser.py(단일 패스 증분 파서). 기존 import 경로 유지를 위해 여기서도 노출한다
+from utils.copy_parser import CopyParser, parse_copies
+from utils.rate_limiter import limiter
 
 load_dotenv(find_dotenv())
 
 # 필요 시 프로젝트 지정:
 # client = OpenAI(project=os.getenv("OPENAI_PROJECT"))
-client = OpenAI()
+# OPENAI_BASE_URL: 로컬 대역 서버(utils/openai_stub_server.py) 등 OpenAI 호환 엔드포인트로 전환
+#   예) OPENAI_BASE_URL=http://127.0.0.1:8100/v1
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+# 재시도는 _retry/_aretry가 담당(SDK 내부 재시도는 429 Retry-After를 limiter에 알리지 못함)
+client = OpenAI(base_url=OPENAI_BASE_URL, max_retries=0)
+# async 라우터용 공용 클라이언트(이벤트 루프를 막지 않도록 await 경로에서 사용)
+async_client = AsyncOpenAI(base_url=OPENAI_BASE_URL, max_retries=0)
 
 
 # -------------------- 공통 유틸 --------------------
-def _retry(fn, *, retries: int = 3, base_delay: float = 0.6):
+def _retry_delay(exc: Exception, attempt: int, retries: int, base_delay: float,
+                 model: Optional[str] = None) -> Optional[float]:
+    """
+    재시도 가능한 오류면 대기 시간(초)을, 아니면 None을 반환.
+    - 429: 서버가 준 Retry-After를 우선 사용하고, 같은 모델의 다른 요청도 limiter에서 함께 보류
+    - 그 외(연결 오류/5xx): 지수 백오프에 jitter(0.5~1.5배)를 곱해 동시 재시도가 몰리지 않게 함
+    """
+    backoff = base_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
+    if isinstance(exc, RateLimitError):
+        after = rate_limiter.retry_after_seconds(exc)
+        if after is not None:
+            # 마지막 시도라 그대로 올려보내는 경우에도 보류는 건다(다른 호출이 같은 모델을 계속 두드리지 않도록)
+            limiter.pause(model, after)
+        if attempt == retries - 1:
+            return None
+        return backoff if after is None else after + random.uniform(0, base_delay)
+    if attempt == retries - 1:
+        return None
+    if isinstance(exc, APIConnectionError):
+        return backoff
+    if isinstance(exc, APIStatusError):
+        status = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+        try:
+            code = int(status) if status is not None else None
+        except Exception:
+            code = None
+        if code and 500 <= code < 600:
+            after = rate_limiter.retry_after_seconds(exc)
+            return after if after is not None else backoff
+    return None
+
+
+def _retry(fn, *, retries: int = 3, base_delay: float = 0.6, model: Optional[str] = None):
     for i in range(retries):
         try:
             return fn()
-        except (APIConnectionError, RateLimitError):
-            if i == retries - 1:
+        except (APIConnectionError, RateLimitError, APIStatusError) as e:
+            delay = _retry_delay(e, i, retries, base_delay, model)
+            if delay is None:
                 raise
-            time.sleep(base_delay * (2 ** i))
-        except APIStatusError as e:
-            status = getattr(e, "status_code", None) or getattr(e, "status", None)
-            try:
-                code = int(status) if status is not None else None
-            except Exception:
-                code = None
-            if code and 500 <= code < 600:
-                if i == retries - 1:
-                    raise
-                time.sleep(base_delay * (2 ** i))
-            else:
+            time.sleep(delay)
+
+
+async def _aretry(fn, *, retries: int = 3, base_delay: float = 0.6, model: Optional[str] = None):
+    """_retry의 async 버전. fn은 코루틴 함수이며, 대기는 asyncio.sleep으로 한다."""
+    for i in range(retries):
+        try:
+            return await fn()
+        except (APIConnectionError, RateLimitError, APIStatusError) as e:
+            delay = _retry_delay(e, i, retries, base_delay, model)
+            if delay is None:
                 raise
+            await asyncio.sleep(delay)
+
+
+def limited_call(fn, *, model: str, tokens: int = 0, images: int = 0, retries: int = 3):
+    """
+    서비스 모듈용: 임의의 OpenAI 호출 fn()을 공용 레이트 리미터 + 재시도로 감싸 실행.
+    예) limited_call(lambda: client.images.generate(...), model="dall-e-3", images=1)
+    """
+    def _do():
+        with limiter.slot(model, tokens=tokens, images=images):
+            return fn()
+    return _retry(_do, retries=retries, model=model)
+
+
+async def alimited_call(fn, *, model: str, tokens: int = 0, images: int = 0, retries: int = 3,
+                        hedge_route: Optional[str] = None):
+    """
+    limited_call의 async 버전. fn은 awaitable을 반환하는 함수.
+    hedge_route를 주면 지연 꼬리 구간에서 헤지 요청을 보낼 수 있다(utils/hedging.py, opt-in).
+    """
+    async def _do():
+        async with limiter.aslot(model, tokens=tokens, images=images):
+            return await fn()
+    return await hedging.run(lambda: _aretry(_do, retries=retries, model=model), route=hedge_route, model=model)
+
+
+def _field(obj: Any, name: str) -> Any:
+    # SDK 객체/dict 공용 접근자
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _text_value(v: Any) -> Optional[str]:
+    # "text": "..." 또는 "text": {"value": "..."} 형태 모두 처리
+    if isinstance(v, str):
+        return v
+    v = _field(v, "value")
+    return v if isinstance(v, str) else None
 
 
 def _extract_text(resp: Any) -> str:
-    """Responses API 응답에서 텍스트를 최대한 끌어온다."""
+    """
+    Responses API 응답에서 텍스트를 끌어온다.
+    텍스트가 전혀 없으면 빈 문자열을 반환(잘림/중단 여부는 incomplete_reason으로 확인).
+    """
     # 0) 최신 SDK 편의 필드
-    raw = getattr(resp, "output_text", None)
+    raw = _field(resp, "output_text")
     if isinstance(raw, str) and raw.strip():
         return raw.strip()
 
-    # 1) 객체를 dict로
-    data: Dict[str, Any] = {}
-    try:
-        data = json.loads(resp.model_dump_json())
-    except Exception:
-        try:
-            data = json.loads(resp.to_json())
-        except Exception:
-            data = {}
-
-    # 2) 표준 경로들 먼저 시도
+    # 1) 타입 경로: output[].content[]를 SDK 객체 그대로 읽는다(JSON 직렬화 왕복 없음)
+    output = _field(resp, "output")
     chunks: List[str] = []
-    for item in (data.get("output") or []):
-        for c in (item.get("content") or []):
-            if not isinstance(c, dict):
-                continue
-            t = c.get("text")
-            if isinstance(t, dict) and isinstance(t.get("value"), str):
-                chunks.append(t["value"])
-            elif isinstance(t, str):
+    for item in (output or []):
+        if _field(item, "type") not in (None, "message"):
+            continue  # reasoning 등 텍스트가 없는 항목
+        for c in (_field(item, "content") or []):
+            t = _text_value(_field(c, "text"))
+            if t is None:
+                t = _text_value(_field(c, "refusal")) or _text_value(_field(c, "value"))
+            if t:
                 chunks.append(t)
-            elif isinstance(c.get("value"), str):
-                chunks.append(c["value"])
     if chunks:
         return "\n".join(chunks).strip()
 
-    for msg in (data.get("messages") or []):
-        if msg.get("role") == "assistant":
-            parts: List[str] = []
-            for c in (msg.get("content") or []):
-                if isinstance(c, dict) and c.get("type") in ("text", "output_text"):
-                    t = c.get("text")
-                    if isinstance(t, dict) and isinstance(t.get("value"), str):
-                        parts.append(t["value"])
-                    elif isinstance(t, str):
-                        parts.append(t)
-            if parts:
-                return "\n".join(parts).strip()
-
-    # 3) 재귀 탐색(안 보이는 위치의 value/text 문자열까지 긁어오기)
-    def _dfs(v):
-        out = []
+    # output 목록이 있는데 메시지 텍스트가 없으면(추론 중 잘림 등) 빈 문자열.
+    # reasoning 요약 같은 다른 항목의 text를 문구로 오인하지 않도록 여기서 끝낸다.
+    if output is not None:
+        return ""
+
+    # 2) 알 수 없는 형태(구형 messages 레이아웃 등): dict로만 바꿔 value/text 문자열을 탐색
+    if resp is None or isinstance(resp, str):
+        return (resp or "").strip()
+    data: Any = resp
+    if not isinstance(resp, dict):
+        try:
+            data = resp.model_dump()
+        except Exception:
+            return ""
+    deep: List[str] = []
+    stack = [data]
+    while stack:
+        v = stack.pop()
         if isinstance(v, dict):
             for k, val in v.items():
                 if k in ("value", "text", "output_text") and isinstance(val, str) and val.strip():
-                    out.append(val)
-                elif isinstance(val, dict) and isinstance(val.get("value"), str):
-                    out.append(val["value"])
-                out.extend(_dfs(val))
+                    deep.append(val)
+                elif isinstance(val, (dict, list)):
+                    stack.append(val)
         elif isinstance(v, list):
-            for x in v:
-                out.extend(_dfs(x))
-        return out
+            stack.extend(reversed(v))
+    return "\n".join(reversed(deep)).strip() if deep else ""
 
-    deep = [s for s in _dfs(data) if isinstance(s, str) and s.strip()]
-    if deep:
-        return "\n".join(deep).strip()
 
-    # 4) 정말 없으면 디버깅용으로 전체 JSON을 문자열로 반환(프론트 raw_output 확인용)
-    try:
-        return json.dumps(data, ensure_ascii=False)
-    except Exception:
-        return ""
+_COMPAT_PARAMS = ("response_format", "temperature", "top_p", "text")
 
 
-def _img_to_png_bytes(image_bytes: bytes, *, max_side: int = 2048) -> bytes:
-    with Image.open(io.BytesIO(image_bytes)) as im:
-        im = im.convert("RGB")
-        w, h = im.size
-        if max(w, h) > max_side:
-            r = max_side / float(max(w, h))
-            im = im.resize((int(w * r), int(h * r)))
-        out = io.BytesIO()
-        im.save(out, format="PNG", optimize=True)
-        return out.getvalue()
+def _drop_rejected_params(kwargs: Dict[str, Any], exc: Exception) -> List[str]:
+    """
+    예외 메시지에서 거절된 파라미터(temperature/top_p/response_format/text)를 찾아 kwargs에서 제거.
+    - TypeError: SDK 레벨에서 인자를 아예 받을 수 없을 때
+    - BadRequestError: 서버가 'Unsupported parameter'로 거절할 때
+    제거한 파라미터 목록을 반환(없으면 빈 리스트).
+    """
+    msg = str(exc)
+    dropped: List[str] = []
+    for p in _COMPAT_PARAMS:
+        if isinstance(exc, TypeError):
+            hit = f"'{p}'" in msg
+        else:
+            hit = (f"Unsupported parameter: '{p}'" in msg) or (f"param': '{p}'" in msg)
+        if hit and p in kwargs:
+            kwargs.pop(p, None)
+            dropped.append(p)
+    return dropped
 
 
 def _responses_create_compat(**kwargs):
     """
     Responses.create 호출 시 모델/SDK가 temperature/top_p/response_format을
     지원하지 않으면 해당 파라미터를 제거하고 1회 재호출한다.
-    - TypeError: SDK 레벨에서 인자를 아예 받을 수 없을 때(지금 케이스)
-    - BadRequestError: 서버가 'Unsupported parameter'로 거절할 때
+    거절된 파라미터는 model_capabilities에 기록되어 다음 호출부터는 처음부터 제외된다.
     """
-    # 1) 먼저 한 번 시도
+    model_capabilities.strip_unsupported(kwargs)
     try:
         return client.responses.create(**kwargs)
-
-    # (A) SDK 함수 시그니처가 인자를 못 받을 때: TypeError
-    except TypeError as e:
-        msg = str(e)
-        changed = False
-        if "response_format" in msg:
-            kwargs.pop("response_format", None); changed = True
-        if "temperature" in msg:
-            kwargs.pop("temperature", None); changed = True
-        if "top_p" in msg:
-            kwargs.pop("top_p", None); changed = True
-        if changed:
+    except (TypeError, BadRequestError) as e:
+        dropped = _drop_rejected_params(kwargs, e)
+        if dropped:
+            model_capabilities.record_rejected(kwargs.get("model"), dropped)
             return client.responses.create(**kwargs)
         raise
 
-    # (B) 서버가 인자를 거절할 때: 400 BadRequest
-    except BadRequestError as e:
-        msg = str(e)
-        changed = False
-        if ("Unsupported parameter: 'response_format'" in msg) or ("param': 'response_format'" in msg):
-            kwargs.pop("response_format", None); changed = True
-        if ("Unsupported parameter: 'temperature'" in msg) or ("param': 'temperature'" in msg):
-            kwargs.pop("temperature", None); changed = True
-        if ("Unsupported parameter: 'top_p'" in msg) or ("param': 'top_p'" in msg):
-            kwargs.pop("top_p", None); changed = True
-        if changed:
-            return client.responses.create(**kwargs)
+
+async def _aresponses_create_compat(**kwargs):
+    """_responses_create_compat의 async 버전(AsyncOpenAI 클라이언트 사용)."""
+    model_capabilities.strip_unsupported(kwargs)
+    try:
+        return await async_client.responses.create(**kwargs)
+    except (TypeError, BadRequestError) as e:
+        dropped = _drop_rejected_params(kwargs, e)
+        if dropped:
+            model_capabilities.record_rejected(kwargs.get("model"), dropped)
+            return await async_client.responses.create(**kwargs)
         raise
 
 
 
 # -------------------- OpenAI 호출 --------------------
+def _build_request(
+    model: str,
+    input_: Any,
+    *,
+    max_tokens: int,
+    temperature: Optional[float],
+    top_p: Optional[float],
+    force_json: bool,
+    json_schema: Optional[Dict[str, Any]] = None,
+    previous_response_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    req: Dict[str, Any] = {
+        "model": model,
+        "input": input_,
+        "max_output_tokens": max_tokens,
+    }
+    if temperature is not None:
+        req["temperature"] = temperature
+    if top_p is not None:
+        req["top_p"] = top_p
+    if json_schema:
+        # Structured Outputs: 스키마에 맞는 JSON만 생성, 잘리면 status="incomplete"로 정확히 구분됨
+        req["text"] = {"format": {"type": "json_schema", **json_schema}}
+    elif force_json:
+        req["response_format"] = {"type": "json_object"}
+    if previous_response_id:
+        req["previous_response_id"] = previous_response_id
+    return req
+
+
+# 비전 입력 1장의 TPM 예산용 토큰 추정치(고해상도 타일 기준 대략값)
+_IMAGE_INPUT_TOKENS = 1100
+
+
+def _image_input(text_prompt: str, image_bytes: bytes, model: str) -> List[Dict[str, Any]]:
+    # 인코딩 결과는 image_payload가 내용 해시 기준으로 캐시(재시도/보충 호출 시 재인코딩 없음)
+    data_uri, detail = image_payload.image_data_uri(image_bytes, model=model)
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "input_text", "text": text_prompt},
+                {"type": "input_image", "image_url": data_uri, "detail": detail},
+            ],
+        }
+    ]
+
+
+def _cacheable(resp: Any) -> bool:
+    """잘린(incomplete) 응답은 캐시하지 않는다(재시도 시 같은 결과가 재생되지 않도록)."""
+    return getattr(resp, "status", None) != "incomplete"
+
+
+def _cache_key(model: str, prompt: str, image_bytes: Optional[bytes], *, max_tokens: int,
+               temperature: Optional[float], top_p: Optional[float], force_json: bool,
+               json_schema: Optional[Dict[str, Any]], previous_response_id: Optional[str]) -> str:
+    extra = {k: v for k, v in (("json_schema", json_schema), ("previous_response_id", previous_response_id)) if v}
+    return response_cache.make_key(model, prompt, image_bytes=image_bytes, max_tokens=max_tokens,
+                                   temperature=temperature, top_p=top_p, force_json=force_json,
+                                   extra=extra)
+
+
+def incomplete_reason(resp: Any) -> Optional[str]:
+    """
+    응답이 완료되지 않았으면 그 이유("max_output_tokens", "content_filter" 등)를, 완료됐으면 None을 반환.
+    이유가 비어 있으면 "incomplete".
+    """
+    if _field(resp, "status") != "incomplete":
+        return None
+    return _field(_field(resp, "incomplete_details"), "reason") or "incomplete"
+
+
+def is_truncated(resp: Any) -> bool:
+    """max_output_tokens에 걸려 출력이 잘린 응답인지(캐시 히트로 resp가 None이면 False)."""
+    return incomplete_reason(resp) in ("incomplete", "max_output_tokens")
+
+
+def output_tokens(resp: Any) -> int:
+    """응답 usage의 출력 토큰 수(없으면 0)."""
+    usage = getattr(resp, "usage", None)
+    return int(getattr(usage, "output_tokens", 0) or 0)
+
+
+def new_call_meta(resp: Any, *, cached: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    문구 생성 응답 메타데이터(첫 호출 기준). 보충(top-up) 호출은 add_topup_meta로 누적.
+    cached를 주지 않으면 resp가 None(캐시 히트)인지로 판단.
+    """
+    return {
+        "attempts": 1,
+        "topups": 0,
+        "cached": (resp is None) if cached is None else cached,
+        "truncated_calls": int(is_truncated(resp)),
+        "output_tokens": output_tokens(resp),
+        "extra_output_tokens": 0,
+        "incomplete_reason": incomplete_reason(resp),
+    }
+
+
+def add_topup_meta(meta: Dict[str, Any], resp: Any) -> None:
+    tok = output_tokens(resp)
+    meta["attempts"] += 1
+    meta["topups"] += 1
+    meta["truncated_calls"] += int(is_truncated(resp))
+    meta["output_tokens"] += tok
+    meta["extra_output_tokens"] += tok
+    meta["incomplete_reason"] = incomplete_reason(resp) or meta.get("incomplete_reason")
+
+
 def call_openai_model(
     model: str,
     prompt: str,
@@ -175,22 +348,38 @@ def call_openai_model(
     temperature: Optional[float] = 0.8,
     top_p: Optional[float] = 1.0,
     force_json: bool = False,
+    json_schema: Optional[Dict[str, Any]] = None,
+    previous_response_id: Optional[str] = None,
+    use_cache: bool = True,
 ) -> Tuple[str, Any]:
+    """
+    Responses API 텍스트 호출. use_cache=False면 캐시를 건너뛰고 항상 새로 생성한다.
+    - json_schema: {"name", "schema", "strict"} → Structured Outputs로 요청
+    - previous_response_id: 이전 응답의 대화 맥락(이미지 포함)을 이어서 호출
+    캐시 히트 시 응답 객체는 None.
+    """
+    key = _cache_key(model, prompt, None, max_tokens=max_tokens, temperature=temperature, top_p=top_p,
+                     force_json=force_json, json_schema=json_schema,
+                     previous_response_id=previous_response_id)
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, None
+    else:
+        response_cache.record_bypass()
+
+    est_tokens = rate_limiter.estimate_tokens(prompt, max_tokens)
     def _do():
-        req: Dict[str, Any] = {
-            "model": model,
-            "input": prompt,
-            "max_output_tokens": max_tokens,
-        }
-        if temperature is not None:
-            req["temperature"] = temperature
-        if top_p is not None:
-            req["top_p"] = top_p
-        if force_json:
-            req["response_format"] = {"type": "json_object"}
-        resp = _responses_create_compat(**req)
+        req = _build_request(model, prompt, max_tokens=max_tokens, temperature=temperature,
+                             top_p=top_p, force_json=force_json, json_schema=json_schema,
+                             previous_response_id=previous_response_id)
+        with limiter.slot(model, tokens=est_tokens):
+            resp = _responses_create_compat(**req)
         return _extract_text(resp), resp
-    return _retry(_do)
+    text, resp = _retry(_do, model=model)
+    if _cacheable(resp):
+        response_cache.put(key, text)
+    return text, resp
 
 
 def call_openai_with_image(
@@ -202,73 +391,216 @@ def call_openai_with_image(
     temperature: Optional[float] = 0.8,
     top_p: Optional[float] = 1.0,
     force_json: bool = False,
+    json_schema: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
 ) -> Tuple[str, Any]:
-    png_bytes = _img_to_png_bytes(image_bytes)
-    img_b64 = base64.b64encode(png_bytes).decode("utf-8")
-    input_content = [
-        {
-            "role": "user",
-            "content": [
-                {"type": "input_text", "text": text_prompt},
-                {"type": "input_image", "image_url": f"data:image/png;base64,{img_b64}"},
-            ],
-        }
-    ]
+    key = _cache_key(model, text_prompt, image_bytes, max_tokens=max_tokens, temperature=temperature,
+                     top_p=top_p, force_json=force_json, json_schema=json_schema,
+                     previous_response_id=None)
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, None
+    else:
+        response_cache.record_bypass()
+
+    input_content = _image_input(text_prompt, image_bytes, model)
+    est_tokens = rate_limiter.estimate_tokens(text_prompt, max_tokens) + _IMAGE_INPUT_TOKENS
     def _do():
-        req: Dict[str, Any] = {
-            "model": model,
-            "input": input_content,
-            "max_output_tokens": max_tokens,
-        }
-        if temperature is not None:
-            req["temperature"] = temperature
-        if top_p is not None:
-            req["top_p"] = top_p
-        if force_json:
-            req["response_format"] = {"type": "json_object"}
-        resp = _responses_create_compat(**req)
+        req = _build_request(model, input_content, max_tokens=max_tokens, temperature=temperature,
+                             top_p=top_p, force_json=force_json, json_schema=json_schema)
+        with limiter.slot(model, tokens=est_tokens):
+            resp = _responses_create_compat(**req)
         return _extract_text(resp), resp
-    return _retry(_do)
+    text, resp = _retry(_do, model=model)
+    if _cacheable(resp):
+        response_cache.put(key, text)
+    return text, resp
+
 
+# -------------------- OpenAI 호출 (async) --------------------
+async def acall_openai_model(
+    model: str,
+    prompt: str,
+    *,
+    max_tokens: int = 300,
+    temperature: Optional[float] = 0.8,
+    top_p: Optional[float] = 1.0,
+    force_json: bool = False,
+    json_schema: Optional[Dict[str, Any]] = None,
+    previous_response_id: Optional[str] = None,
+    use_cache: bool = True,
+    hedge_route: Optional[str] = None,
+) -> Tuple[str, Any]:
+    """
+    call_openai_model의 awaitable 버전. 이벤트 루프를 블로킹하지 않는다.
+    hedge_route: 헤지 요청 예산/지연 분포를 나눌 라우트 이름(None이면 헤지 안 함)
+    """
+    key = _cache_key(model, prompt, None, max_tokens=max_tokens, temperature=temperature, top_p=top_p,
+                     force_json=force_json, json_schema=json_schema,
+                     previous_response_id=previous_response_id)
+    if use_cache:
+        cached = await asyncio.to_thread(response_cache.get, key)
+        if cached is not None:
+            return cached, None
+    else:
+        response_cache.record_bypass()
 
-# -------------------- 출력 파싱 --------------------
-def parse_copies(raw_output: str) -> List[str]:
-    if not raw_output:
-        return []
+    est_tokens = rate_limiter.estimate_tokens(prompt, max_tokens)
+    async def _do():
+        req = _build_request(model, prompt, max_tokens=max_tokens, temperature=temperature,
+                             top_p=top_p, force_json=force_json, json_schema=json_schema,
+                             previous_response_id=previous_response_id)
+        async with limiter.aslot(model, tokens=est_tokens):
+            resp = await _aresponses_create_compat(**req)
+        return _extract_text(resp), resp
+    text, resp = await hedging.run(lambda: _aretry(_do, model=model), route=hedge_route, model=model)
+    if _cacheable(resp):
+        await asyncio.to_thread(response_cache.put, key, text)
+    return text, resp
 
-    s = raw_output.strip()
 
-    # 1) ```json ... ``` 코드펜스 안 JSON 우선
-    m = re.search(r"```(?:json)?\s*(.*?)```", s, re.S | re.I)
-    if m:
-        candidate = m.group(1).strip()
-        try:
-            data = json.loads(candidate)
-            if isinstance(data, dict) and isinstance(data.get("copies"), list):
-                arr = [str(x).strip() for x in data["copies"] if isinstance(x, (str, int, float))]
-                arr = [x for x in arr if x]
-                if arr:
-                    return arr
-        except Exception:
-            pass
-
-    # 2) 본문 안의 가장 바깥 JSON 블록 추출 시도
-    if "{" in s and "}" in s:
-        i, j = s.find("{"), s.rfind("}")
-        if j > i:
-            candidate = s[i:j+1]
-            try:
-                data = json.loads(candidate)
-                if isinstance(data, dict) and isinstance(data.get("copies"), list):
-                    arr = [str(x).strip() for x in data["copies"] if isinstance(x, (str, int, float))]
-                    arr = [x for x in arr if x]
-                    if arr:
-                        return arr
-            except Exception:
-                pass
-
-    # 3) 원래의 폴백 규칙
-    parts = re.split(r"\n{2,}|\n+|•|–|-|\d+[.)]", s)
-    copies = [p.strip(" -•\t\"'") for p in parts if p and p.strip()]
-    copies = [c for c in copies if len(c) > 1 and not c.lower().startswith(("note:", "주의", "info:"))]
-    return copies
\ No newline at end of file
+async def acall_openai_with_image(
+    model: str,
+    text_prompt: str,
+    image_bytes: bytes,
+    *,
+    max_tokens: int = 400,
+    temperature: Optional[float] = 0.8,
+    top_p: Optional[float] = 1.0,
+    force_json: bool = False,
+    json_schema: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+) -> Tuple[str, Any]:
+    """call_openai_with_image의 awaitable 버전. 이미지 디코드/인코딩은 워커 스레드에서 수행."""
+    key = _cache_key(model, text_prompt, image_bytes, max_tokens=max_tokens, temperature=temperature,
+                     top_p=top_p, force_json=force_json, json_schema=json_schema,
+                     previous_response_id=None)
+    if use_cache:
+        cached = await asyncio.to_thread(response_cache.get, key)
+        if cached is not None:
+            return cached, None
+    else:
+        response_cache.record_bypass()
+
+    input_content = await asyncio.to_thread(_image_input, text_prompt, image_bytes, model)
+    est_tokens = rate_limiter.estimate_tokens(text_prompt, max_tokens) + _IMAGE_INPUT_TOKENS
+    async def _do():
+        req = _build_request(model, input_content, max_tokens=max_tokens, temperature=temperature,
+                             top_p=top_p, force_json=force_json, json_schema=json_schema)
+        async with limiter.aslot(model, tokens=est_tokens):
+            resp = await _aresponses_create_compat(**req)
+        return _extract_text(resp), resp
+    text, resp = await _aretry(_do, model=model)
+    if _cacheable(resp):
+        await asyncio.to_thread(response_cache.put, key, text)
+    return text, resp
+
+
+# -------------------- 스트리밍 (async) --------------------
+async def _astream(
+    model: str,
+    input_: Any,
+    key: str,
+    est_tokens: int,
+    *,
+    max_tokens: int,
+    temperature: Optional[float],
+    top_p: Optional[float],
+    force_json: bool,
+    json_schema: Optional[Dict[str, Any]],
+    use_cache: bool,
+    result: Optional[Dict[str, Any]],
+    image_bytes: Optional[bytes] = None,
+) -> AsyncIterator[str]:
+    # async 제너레이터는 값을 return할 수 없으므로 최종 응답/캐시 여부는 result dict에 채워 돌려준다
+    # image_bytes가 있으면 input_은 텍스트 프롬프트이고, 이미지 입력은 캐시 미스일 때만 만든다
+    if result is None:
+        result = {}
+    result.update(response=None, cached=False)
+    if use_cache:
+        cached = await asyncio.to_thread(response_cache.get, key)
+        if cached is not None:
+            result["cached"] = True
+            yield cached
+            return
+    else:
+        response_cache.record_bypass()
+
+    if image_bytes is not None:
+        input_ = await asyncio.to_thread(_image_input, input_, image_bytes, model)
+    req = _build_request(model, input_, max_tokens=max_tokens, temperature=temperature,
+                         top_p=top_p, force_json=force_json, json_schema=json_schema)
+    req["stream"] = True
+    parts: List[str] = []
+    status = None
+    async with limiter.aslot(model, tokens=est_tokens):
+        # 재시도는 첫 이벤트 수신 전(스트림 개설)까지만 가능
+        stream = await _aretry(lambda: _aresponses_create_compat(**req), model=model)
+        async for event in stream:
+            etype = getattr(event, "type", "")
+            if etype == "response.output_text.delta":
+                delta = getattr(event, "delta", "") or ""
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            elif etype in ("response.completed", "response.incomplete"):
+                result["response"] = getattr(event, "response", None)
+                status = getattr(result["response"], "status", None)
+
+    # 완료 이벤트를 받은 스트림만 캐시(잘림/실패/완료 이벤트 없이 끊긴 부분 결과가 재생되지 않도록)
+    text = "".join(parts).strip()
+    if status == "completed":
+        await asyncio.to_thread(response_cache.put, key, text)
+
+
+async def astream_openai_model(
+    model: str,
+    prompt: str,
+    *,
+    max_tokens: int = 300,
+    temperature: Optional[float] = 0.8,
+    top_p: Optional[float] = 1.0,
+    force_json: bool = False,
+    json_schema: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    result: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    Responses API 스트리밍 호출. 출력 텍스트 조각(delta)을 도착하는 대로 yield.
+    캐시 히트 시 전체 텍스트를 한 번에 yield. 완료된 전체 텍스트는 일반 호출과 같은 키로 캐시된다.
+    result(dict)를 주면 스트림이 끝난 뒤 result["response"](완료/잘림 이벤트의 응답 객체,
+    캐시 히트·비정상 종료면 None)와 result["cached"]가 채워진다 → new_call_meta / token_budget.record에 사용.
+    """
+    key = _cache_key(model, prompt, None, max_tokens=max_tokens, temperature=temperature, top_p=top_p,
+                     force_json=force_json, json_schema=json_schema, previous_response_id=None)
+    est_tokens = rate_limiter.estimate_tokens(prompt, max_tokens)
+    async for delta in _astream(model, prompt, key, est_tokens, max_tokens=max_tokens,
+                                temperature=temperature, top_p=top_p, force_json=force_json,
+                                json_schema=json_schema, use_cache=use_cache, result=result):
+        yield delta
+
+
+async def astream_openai_with_image(
+    model: str,
+    text_prompt: str,
+    image_bytes: bytes,
+    *,
+    max_tokens: int = 400,
+    temperature: Optional[float] = 0.8,
+    top_p: Optional[float] = 1.0,
+    force_json: bool = False,
+    json_schema: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+    result: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[str]:
+    """astream_openai_model의 이미지 입력 버전(result도 동일)."""
+    key = _cache_key(model, text_prompt, image_bytes, max_tokens=max_tokens, temperature=temperature,
+                     top_p=top_p, force_json=force_json, json_schema=json_schema,
+                     previous_response_id=None)
+    est_tokens = rate_limiter.estimate_tokens(text_prompt, max_tokens) + _IMAGE_INPUT_TOKENS
+    async for delta in _astream(model, text_prompt, key, est_tokens, max_tokens=max_tokens,
+                                temperature=temperature, top_p=top_p, force_json=force_json,
+                                json_schema=json_schema, use_cache=use_cache, result=result,
+                                image_bytes=image_bytes):
+        yield delta
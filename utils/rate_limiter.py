@@ -0,0 +1,243 @@
+# utils/rate_limiter.py
+# 모든 OpenAI 업스트림 호출이 공유하는 토큰 버킷 레이트 리미터 + 동시성 제한기.
+# - 모델별 RPM(분당 요청) / TPM(분당 토큰) / IPM(분당 이미지) 예산
+# - 429 수신 시 Retry-After 만큼 해당 모델 전체를 일시 정지
+# - 대기열 길이와 대기 시간을 stats()로 노출
+#
+# 설정(환경 변수):
+#   OPENAI_MAX_CONCURRENCY : 동시 업스트림 호출 수 (기본 16)
+#   OPENAI_RATE_LIMITS     : 모델별 예산 JSON 또는 JSON 파일 경로
+#                            예) {"default": {"rpm": 500, "tpm": 200000},
+#                                 "dall-e-3": {"rpm": 50, "ipm": 7}}
+import asyncio, json, os, threading, time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+
+MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+
+DEFAULT_LIMITS: Dict[str, Dict[str, float]] = {
+    "default": {"rpm": 500, "tpm": 200_000, "ipm": 50},
+    "dall-e-3": {"rpm": 50, "ipm": 7},
+}
+
+
+def _load_limits() -> Dict[str, Dict[str, float]]:
+    limits = {k: dict(v) for k, v in DEFAULT_LIMITS.items()}
+    raw = os.getenv("OPENAI_RATE_LIMITS", "").strip()
+    if not raw:
+        return limits
+    try:
+        if os.path.exists(raw):
+            with open(raw, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        else:
+            data = json.loads(raw)
+    except (OSError, ValueError):
+        return limits
+    if isinstance(data, dict):
+        for model, budget in data.items():
+            if isinstance(budget, dict):
+                limits.setdefault(model, {}).update({k: float(v) for k, v in budget.items()})
+    return limits
+
+
+class TokenBucket:
+    """분당 capacity만큼 채워지는 버킷. 잔량이 음수(빚)가 될 수 있어 먼저 온 요청부터 순서대로 대기한다."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """amount만큼 예약하고, 사용 가능해질 때까지 기다려야 하는 시간(초)을 반환."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # 한 번에 버킷 용량보다 큰 요청은 용량만큼만 차감(영원히 대기하지 않도록)
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    def __init__(self, limits: Dict[str, Dict[str, float]], max_concurrency: int):
+        self.limits = limits
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._buckets: Dict[tuple, TokenBucket] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._active = 0
+        self._waiting = 0
+        # 동시성 한도에 걸린 aslot 대기자 (loop, future). 슬롯이 반납될 때 하나씩 깨운다(폴링 없음)
+        self._async_waiters: deque = deque()
+        self._waits = deque(maxlen=500)
+        self._stats = {"acquired": 0, "throttled": 0, "rate_limited": 0, "total_wait_s": 0.0, "max_wait_s": 0.0}
+
+    # -------------------- 예산 --------------------
+    def _budget(self, model: str) -> Dict[str, float]:
+        budget = dict(self.limits.get("default", {}))
+        budget.update(self.limits.get(model, {}))
+        return budget
+
+    def _bucket(self, model: str, kind: str, per_minute: float) -> TokenBucket:
+        key = (model, kind)
+        b = self._buckets.get(key)
+        if b is None or b.capacity != per_minute:
+            b = self._buckets[key] = TokenBucket(per_minute)
+        return b
+
+    def _reserve(self, model: str, tokens: int, images: int) -> float:
+        # _lock 보유 상태에서 호출. 필요한 대기 시간(초) 반환
+        now = time.monotonic()
+        budget = self._budget(model)
+        wait = max(0.0, self._paused_until.get(model, 0.0) - now)
+        if budget.get("rpm"):
+            wait = max(wait, self._bucket(model, "rpm", budget["rpm"]).reserve(1, now))
+        if tokens and budget.get("tpm"):
+            wait = max(wait, self._bucket(model, "tpm", budget["tpm"]).reserve(tokens, now))
+        if images and budget.get("ipm"):
+            wait = max(wait, self._bucket(model, "ipm", budget["ipm"]).reserve(images, now))
+        return wait
+
+    def _release(self) -> None:
+        # _lock 보유 상태에서 호출. 슬롯 반납 → sync 대기자 하나 + async 대기자 하나에게 알림
+        self._active -= 1
+        self._cond.notify()
+        while self._async_waiters:
+            loop, fut = self._async_waiters.popleft()
+            if not fut.done():
+                loop.call_soon_threadsafe(_resolve, fut)
+                break
+
+    def _record_wait(self, waited: float) -> None:
+        # _lock 보유 상태에서 호출
+        self._stats["acquired"] += 1
+        if waited > 0.001:
+            self._stats["throttled"] += 1
+        self._stats["total_wait_s"] += waited
+        self._stats["max_wait_s"] = max(self._stats["max_wait_s"], waited)
+        self._waits.append(waited)
+
+    # -------------------- sync --------------------
+    @contextmanager
+    def slot(self, model: str, *, tokens: int = 0, images: int = 0):
+        """업스트림 호출 1회를 감싸는 컨텍스트. 예산과 동시성 한도가 허락할 때까지 블로킹 대기."""
+        start = time.monotonic()
+        with self._cond:
+            self._waiting += 1
+            wait = self._reserve(model, tokens, images)
+        try:
+            if wait > 0:
+                time.sleep(wait)
+            with self._cond:
+                while self._active >= self.max_concurrency:
+                    self._cond.wait()
+                self._active += 1
+                self._waiting -= 1
+                self._record_wait(time.monotonic() - start)
+        except BaseException:
+            with self._cond:
+                self._waiting -= 1
+            raise
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._release()
+
+    # -------------------- async --------------------
+    @asynccontextmanager
+    async def aslot(self, model: str, *, tokens: int = 0, images: int = 0):
+        """slot의 async 버전. 대기는 asyncio.sleep으로 하여 이벤트 루프를 막지 않는다."""
+        start = time.monotonic()
+        with self._lock:
+            self._waiting += 1
+            wait = self._reserve(model, tokens, images)
+        try:
+            if wait > 0:
+                await asyncio.sleep(wait)
+            while True:
+                with self._lock:
+                    if self._active < self.max_concurrency:
+                        self._active += 1
+                        self._waiting -= 1
+                        self._record_wait(time.monotonic() - start)
+                        break
+                    fut = asyncio.get_running_loop().create_future()
+                    self._async_waiters.append((asyncio.get_running_loop(), fut))
+                # 반납(_release)이 깨울 때까지 대기
+                await fut
+        except BaseException:
+            with self._lock:
+                self._waiting -= 1
+                # 깨워진 직후 취소됐다면 받은 알림을 다음 대기자에게 넘긴다
+                if self._active < self.max_concurrency and self._async_waiters:
+                    self._active += 1
+                    self._release()
+            raise
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._release()
+
+    # -------------------- 429 --------------------
+    def pause(self, model: str, seconds: float) -> None:
+        """429 + Retry-After 수신 시 해당 모델의 신규 요청을 seconds 동안 보류."""
+        if not model or seconds <= 0:
+            return
+        with self._lock:
+            self._stats["rate_limited"] += 1
+            until = time.monotonic() + seconds
+            self._paused_until[model] = max(self._paused_until.get(model, 0.0), until)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+            out["active"] = self._active
+            out["queue_depth"] = self._waiting
+            out["max_concurrency"] = self.max_concurrency
+            waits = sorted(self._waits)
+            now = time.monotonic()
+            out["paused_models"] = {m: round(t - now, 2) for m, t in self._paused_until.items() if t > now}
+        if waits:
+            out["wait_p50_s"] = round(waits[len(waits) // 2], 4)
+            out["wait_p95_s"] = round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 4)
+        out["total_wait_s"] = round(out["total_wait_s"], 3)
+        out["max_wait_s"] = round(out["max_wait_s"], 3)
+        return out
+
+
+def _resolve(fut: "asyncio.Future") -> None:
+    # 대기자의 이벤트 루프에서 실행(call_soon_threadsafe). 이미 취소된 future는 건너뜀
+    if not fut.done():
+        fut.set_result(None)
+
+
+def estimate_tokens(text: Any, max_output_tokens: int = 0) -> int:
+    """TPM 예산용 대략적인 토큰 추정. 한국어는 글자당 토큰이 많아 2자≈1토큰으로 잡는다."""
+    n = len(text) if isinstance(text, str) else len(json.dumps(text, ensure_ascii=False, default=str))
+    return n // 2 + int(max_output_tokens or 0)
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """OpenAI 예외의 응답 헤더에서 Retry-After(초)를 읽는다. 없으면 None."""
+    resp = getattr(exc, "response", None)
+    headers = getattr(resp, "headers", None)
+    if not headers:
+        return None
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms is not None:
+            return float(ms) / 1000.0
+        sec = headers.get("retry-after")
+        if sec is not None:
+            return float(sec)
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+limiter = RateLimiter(_load_limits(), MAX_CONCURRENCY)
@@ -0,0 +1,184 @@
+# utils/response_cache.py
+# OpenAI 응답 텍스트 캐시: 프로세스 내 LRU(1차) + SQLite 디스크(2차).
+# 같은 상품/톤/길이로 "생성"을 다시 누르거나 Streamlit 재실행으로 같은 payload가 오면
+# 유료 왕복 호출 없이 이전 결과를 돌려준다.
+import hashlib, json, os, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+CACHE_DB_PATH = os.getenv("OPENAI_CACHE_PATH", os.path.join("data", "cache", "openai_cache.db"))
+CACHE_TTL = int(os.getenv("OPENAI_CACHE_TTL", str(24 * 3600)))          # 초
+MEMORY_MAX_ENTRIES = int(os.getenv("OPENAI_CACHE_MEMORY_ENTRIES", "256"))
+DISK_MAX_ENTRIES = int(os.getenv("OPENAI_CACHE_DISK_ENTRIES", "5000"))
+CACHE_ENABLED = os.getenv("OPENAI_CACHE_ENABLED", "1") not in ("0", "false", "False")
+
+_lock = threading.Lock()
+_memory: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (expires_at, text)
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "bypass": 0, "evictions": 0}
+
+
+# -------------------- 키 --------------------
+def make_key(
+    model: str,
+    prompt: str,
+    *,
+    image_bytes: Optional[bytes] = None,
+    max_tokens: int,
+    temperature: Optional[float],
+    top_p: Optional[float],
+    force_json: bool,
+    extra: Optional[Dict[str, Any]] = None,
+) -> str:
+    """(model, prompt, 이미지 해시, max_tokens, temperature, top_p, force_json[, extra]) → sha256 키."""
+    parts = {
+        "model": model,
+        "prompt": prompt,
+        "image": hashlib.sha256(image_bytes).hexdigest() if image_bytes is not None else None,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "top_p": top_p,
+        "force_json": bool(force_json),
+    }
+    if extra:
+        parts["extra"] = extra
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# -------------------- 디스크(SQLite) --------------------
+def _db():
+    os.makedirs(os.path.dirname(CACHE_DB_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(CACHE_DB_PATH, timeout=5)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+    """)
+    return conn
+
+
+def _disk_get(key: str, now: float) -> Optional[str]:
+    conn = _db()
+    try:
+        row = conn.execute("SELECT text, expires_at FROM response_cache WHERE key=?", (key,)).fetchone()
+        if not row:
+            return None
+        if row[1] < now:
+            conn.execute("DELETE FROM response_cache WHERE key=?", (key,))
+            conn.commit()
+            return None
+        conn.execute("UPDATE response_cache SET accessed_at=? WHERE key=?", (now, key))
+        conn.commit()
+        return row[0]
+    finally:
+        conn.close()
+
+
+def _disk_put(key: str, text: str, expires_at: float, now: float) -> None:
+    conn = _db()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, text, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, text, expires_at, now),
+        )
+        # 만료 항목 정리 후, 최대 개수를 넘으면 가장 오래 접근하지 않은 항목부터 제거
+        conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+        count = conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        if count > DISK_MAX_ENTRIES:
+            over = count - DISK_MAX_ENTRIES
+            conn.execute(
+                "DELETE FROM response_cache WHERE key IN "
+                "(SELECT key FROM response_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (over,),
+            )
+            with _lock:
+                _stats["evictions"] += over
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# -------------------- 공개 API --------------------
+def get(key: str) -> Optional[str]:
+    """캐시된 텍스트를 반환. 메모리 → 디스크 순으로 조회하며, 디스크 히트는 메모리로 승격."""
+    if not CACHE_ENABLED:
+        return None
+    now = time.time()
+    with _lock:
+        hit = _memory.get(key)
+        if hit is not None:
+            if hit[0] >= now:
+                _memory.move_to_end(key)
+                _stats["memory_hits"] += 1
+                return hit[1]
+            _memory.pop(key, None)
+
+    try:
+        text = _disk_get(key, now)
+    except sqlite3.Error:
+        text = None
+
+    with _lock:
+        if text is None:
+            _stats["misses"] += 1
+            return None
+        _stats["disk_hits"] += 1
+        _memory_put(key, text, now + CACHE_TTL)
+    return text
+
+
+def put(key: str, text: str) -> None:
+    """응답 텍스트를 두 계층 모두에 저장. 빈 응답은 저장하지 않는다."""
+    if not CACHE_ENABLED or not isinstance(text, str) or not text.strip():
+        return
+    now = time.time()
+    expires_at = now + CACHE_TTL
+    with _lock:
+        _memory_put(key, text, expires_at)
+        _stats["stores"] += 1
+    try:
+        _disk_put(key, text, expires_at, now)
+    except sqlite3.Error:
+        pass
+
+
+def _memory_put(key: str, text: str, expires_at: float) -> None:
+    # _lock 보유 상태에서 호출
+    _memory[key] = (expires_at, text)
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_MAX_ENTRIES:
+        _memory.popitem(last=False)
+        _stats["evictions"] += 1
+
+
+def record_bypass() -> None:
+    with _lock:
+        _stats["bypass"] += 1
+
+
+def stats() -> Dict[str, Any]:
+    """히트/미스 카운터와 현재 메모리 항목 수."""
+    with _lock:
+        out = dict(_stats)
+        out["memory_entries"] = len(_memory)
+    lookups = out["memory_hits"] + out["disk_hits"] + out["misses"]
+    out["hit_rate"] = round((out["memory_hits"] + out["disk_hits"]) / lookups, 4) if lookups else 0.0
+    return out
+
+
+def clear() -> None:
+    """메모리/디스크 캐시를 모두 비운다."""
+    with _lock:
+        _memory.clear()
+    try:
+        conn = _db()
+        try:
+            conn.execute("DELETE FROM response_cache")
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        pass
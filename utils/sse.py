@@ -0,0 +1,20 @@
+# utils/sse.py
+# 스트리밍 응답 공통: SSE 이벤트 형식과 응답 헤더를 한곳에서 정의한다.
+# (/adcopy, /cardnews 스트림의 프레이밍/캐시 헤더가 따로 바뀌지 않도록)
+import json
+from typing import Any, AsyncIterator, Iterator, Union
+
+from fastapi.responses import StreamingResponse
+
+# 스트리밍 응답(SSE / NDJSON) 공통 헤더: 캐시 금지 + 프록시(nginx) 버퍼링 끄기
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def event(name: str, data: Any) -> str:
+    """SSE 이벤트 한 개: event 이름 + JSON data(한글 그대로) + 빈 줄."""
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def response(events: Union[AsyncIterator[str], Iterator[str]]) -> StreamingResponse:
+    """SSE 문자열 스트림 → text/event-stream 응답."""
+    return StreamingResponse(events, media_type="text/event-stream", headers=STREAM_HEADERS)
@@ -0,0 +1,195 @@
+# utils/text_layout.py
+# 포스터/카드뉴스 공용 텍스트 배치 엔진.
+# - 폰트: (경로, 크기)별 FreeTypeFont를 LRU로 보관 → 요청마다 truetype()으로 파일을 다시 읽지 않음
+# - 글자 폭: 폰트별 글자 advance를 캐시해 줄 폭을 누적 합으로 계산(줄 전체를 매번 다시 재지 않음)
+# - 줄바꿈(greedy):
+#     1) 띄어쓰기(어절) 단위로 채우고
+#     2) 한 어절이 한 줄보다 길면(띄어쓰기 없는 한글 제목 등) 음절(글자) 단위로 끊는다
+#     3) 닫는 문장부호(. , ! ? ) 」 등)는 줄 머리에 오지 않게 앞 줄에 붙인다
+#   break_mode="break-all"이면 한글/CJK는 어절과 관계없이 음절 단위로 채운다.
+# 커닝 때문에 글자 폭 합과 실제 폭이 조금 다를 수 있어, 한계에 가까운 줄만 확정할 때 실제 폭으로 확인한다.
+#
+# 설정(환경 변수):
+#   TEXT_LAYOUT_FONT_CACHE : 보관할 폰트 개수 (기본 32)
+import os, threading, weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+from PIL import ImageFont
+
+FONT_CACHE_MAX = int(os.getenv("TEXT_LAYOUT_FONT_CACHE", "32"))
+
+# 줄 머리에 오면 안 되는 문자(앞 줄 끝에 붙임)
+_NO_LINE_START = set(".,!?;:%)]}>·…~」』】〉》’”、。，！？")
+
+_lock = threading.Lock()
+_fonts: "OrderedDict[Tuple[str, int], Any]" = OrderedDict()
+_advances: "weakref.WeakKeyDictionary[Any, Dict[str, float]]" = weakref.WeakKeyDictionary()
+_stats = {"font_hits": 0, "font_misses": 0}
+
+
+# -------------------- 폰트 --------------------
+def get_font(path: str, size: int):
+    """(path, size)의 FreeTypeFont. 처음 한 번만 파일에서 읽고 이후엔 캐시를 반환."""
+    key = (path, int(size))
+    with _lock:
+        font = _fonts.get(key)
+        if font is not None:
+            _fonts.move_to_end(key)
+            _stats["font_hits"] += 1
+            return font
+    font = ImageFont.truetype(path, int(size))
+    with _lock:
+        _stats["font_misses"] += 1
+        _fonts[key] = font
+        _fonts.move_to_end(key)
+        while len(_fonts) > FONT_CACHE_MAX:
+            _fonts.popitem(last=False)
+    return font
+
+
+def _advance_table(font) -> Dict[str, float]:
+    with _lock:
+        table = _advances.get(font)
+        if table is None:
+            table = _advances[font] = {}
+        return table
+
+
+def text_width(text: str, font) -> float:
+    """글자 advance 합으로 잰 폭(커닝 미반영, 캐시 사용)."""
+    table = _advance_table(font)
+    w = 0.0
+    for ch in text:
+        a = table.get(ch)
+        if a is None:
+            a = table[ch] = font.getlength(ch)
+        w += a
+    return w
+
+
+# -------------------- 줄바꿈 --------------------
+def _is_cjk(ch: str) -> bool:
+    o = ord(ch)
+    return (
+        0xAC00 <= o <= 0xD7A3      # 한글 음절
+        or 0x1100 <= o <= 0x11FF   # 한글 자모
+        or 0x3130 <= o <= 0x318F   # 호환 자모
+        or 0x3040 <= o <= 0x30FF   # 가나
+        or 0x4E00 <= o <= 0x9FFF   # 한자
+    )
+
+
+def _tokens(paragraph: str, break_mode: str) -> List[Tuple[str, bool]]:
+    """
+    문단을 (조각, 앞에 공백 있음) 목록으로 나눈다.
+    keep-all: 어절 단위 / break-all: 한글·CJK는 음절 단위, 그 외는 어절 단위
+    닫는 문장부호는 바로 앞 조각에 붙여 줄 머리에 오지 않게 한다.
+    """
+    out: List[Tuple[str, bool]] = []
+    for i, word in enumerate(paragraph.split()):
+        if break_mode != "break-all":
+            out.append((word, i > 0))
+            continue
+        start = len(out)
+        buf = ""
+        for ch in word:
+            if _is_cjk(ch):
+                if buf:
+                    out.append((buf, i > 0 and len(out) == start))
+                    buf = ""
+                out.append((ch, i > 0 and len(out) == start))
+            elif ch in _NO_LINE_START and not buf and len(out) > start:
+                out[-1] = (out[-1][0] + ch, out[-1][1])
+            else:
+                buf += ch
+        if buf:
+            out.append((buf, i > 0 and len(out) == start))
+    return out
+
+
+def _fits(line: str, font, max_width: float) -> bool:
+    return font.getlength(line) <= max_width
+
+
+def _split_long(word: str, font, max_width: float, table: Dict[str, float]) -> List[str]:
+    """한 줄보다 긴 어절을 글자(음절) 단위로 나눈다. 닫는 부호는 앞 조각에 붙인다."""
+    pieces, cur, w = [], "", 0.0
+    for ch in word:
+        a = table.get(ch)
+        if a is None:
+            a = table[ch] = font.getlength(ch)
+        if cur and w + a > max_width and ch not in _NO_LINE_START:
+            pieces.append(cur)
+            cur, w = "", 0.0
+        cur += ch
+        w += a
+    if cur:
+        pieces.append(cur)
+    return pieces
+
+
+def wrap_text(text: str, font, max_width: float, *, break_mode: str = "keep-all") -> List[str]:
+    """
+    text를 max_width(px) 안에 들어가는 줄 목록으로 나눈다(greedy).
+    줄바꿈 문자(\\n)는 문단 구분으로 유지한다.
+    """
+    table = _advance_table(font)
+    space = table.get(" ")
+    if space is None:
+        space = table[" "] = font.getlength(" ")
+
+    lines: List[Tuple[str, float]] = []
+    for paragraph in (text or "").split("\n"):
+        cur, w = "", 0.0
+        for tok, spaced in _tokens(paragraph, break_mode):
+            tw = text_width(tok, font)
+            gap = space if (cur and spaced) else 0.0
+            if cur and w + gap + tw <= max_width:
+                cur += (" " if gap else "") + tok
+                w += gap + tw
+                continue
+            if cur:
+                lines.append((cur, w))
+            if tw <= max_width:
+                cur, w = tok, tw
+                continue
+            parts = _split_long(tok, font, max_width, table)
+            lines.extend((p, max_width) for p in parts[:-1])
+            cur = parts[-1]
+            w = text_width(cur, font)
+        lines.append((cur, w))
+
+    # 커닝 등으로 실제 폭이 넘칠 수 있는 줄(폭 합이 한계의 2% 이내)만 실제 폭으로 확인
+    fixed: List[str] = []
+    slack = max_width * 0.98
+    for line, w in lines:
+        if not line or w <= slack or _fits(line.rstrip("".join(_NO_LINE_START)) or line, font, max_width):
+            # 줄 끝에 붙인 닫는 부호만큼 넘치는 것은 허용
+            fixed.append(line)
+            continue
+        while line and not _fits(line, font, max_width):
+            cut = len(line) - 1
+            while cut > 1 and not _fits(line[:cut], font, max_width):
+                cut -= 1
+            fixed.append(line[:cut].rstrip())
+            line = line[cut:].lstrip()
+        if line:
+            fixed.append(line)
+    return fixed
+
+
+def measure(lines: List[str], font, line_height: float) -> Tuple[int, int]:
+    """줄 목록의 (최대 폭, 전체 높이). 높이는 줄 수 × line_height."""
+    if not lines:
+        return 0, 0
+    width = max(font.getlength(line) for line in lines)
+    return int(round(width)), int(round(line_height * len(lines)))
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out = dict(_stats)
+        out["fonts"] = len(_fonts)
+        out["glyph_tables"] = len(_advances)
+    return out
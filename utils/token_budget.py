@@ -0,0 +1,194 @@
+# utils/token_budget.py
+# 문구 생성 호출의 출력 토큰 예산(max_output_tokens) 계산 + 실제 usage로 보정.
+# - 사전 추정: 길이 규칙별 문구당 최대 글자 수 × 언어별 글자당 토큰 × 개수 + JSON 오버헤드
+#   (한국어는 글자당 토큰이 영어보다 훨씬 많다)
+# - 추론 모델(gpt-5/o 계열)은 reasoning 토큰이 출력 예산을 같이 쓰므로 별도 오버헤드를 더한다
+# - 학습: (model, length)별 문구당 출력 토큰의 평균/편차를 이동 평균으로 갱신(평균 + K×편차를 예산으로),
+#   모델별 reasoning 토큰도 같은 방식. 잘린 응답은 "최소 이만큼 필요"라는 하한으로 반영해 예산을 키운다.
+# - 지표: 호출 수, 잘림 횟수/비율
+#
+# 설정(환경 변수):
+#   OPENAI_TOKEN_BUDGET_PATH     : 학습값 저장 파일 (기본 data/cache/token_budget.json)
+#   OPENAI_TOKEN_BUDGET_PERSIST  : 0이면 저장하지 않음 (기본 1)
+#   OPENAI_TOKEN_BUDGET_HEADROOM : 사전 추정 여유율 (기본 1.3)
+#   OPENAI_TOKEN_BUDGET_MAX      : 예산 상한 (기본 16000)
+import json, os, threading
+from typing import Any, Dict, Optional
+
+BUDGET_PATH = os.getenv("OPENAI_TOKEN_BUDGET_PATH", os.path.join("data", "cache", "token_budget.json"))
+PERSIST = os.getenv("OPENAI_TOKEN_BUDGET_PERSIST", "1") not in ("0", "false", "False")
+HEADROOM = float(os.getenv("OPENAI_TOKEN_BUDGET_HEADROOM", "1.3"))
+MAX_BUDGET = int(os.getenv("OPENAI_TOKEN_BUDGET_MAX", "16000"))
+MIN_BUDGET = 128
+
+# 길이 규칙(프롬프트의 "길이 규칙")별 문구당 최대 글자 수 추정
+_CHARS_PER_COPY = {"short": 45, "medium": 130, "long": 260}
+# 글자당 토큰(보수적으로 잡은 값): 한글은 대략 1자 ≈ 1토큰, 영어는 4자 ≈ 1토큰
+_TOKENS_PER_CHAR = {"ko": 1.0, "en": 0.3}
+_JSON_BASE = 12       # {"copies": [ ... ]}
+_JSON_PER_COPY = 4    # 따옴표/쉼표/이스케이프
+_REASONING_PRIOR = 1024
+_REASONING_PREFIXES = ("gpt-5", "o1", "o3", "o4")
+
+_ALPHA = 0.2          # 이동 평균 가중치
+_DEV_K = 3.0          # 예산 = 평균 + K × 편차
+_MIN_SAMPLES = 5      # 이 이상 표본이 쌓이면 사전 추정 대신 학습값만 사용
+_SAVE_EVERY = 20
+
+_lock = threading.Lock()
+_per_copy: Dict[str, Dict[str, float]] = {}    # "model|length" -> {"mean", "dev", "n"}
+_reasoning: Dict[str, Dict[str, float]] = {}   # model -> {"mean", "dev", "n"}
+_stats = {"calls": 0, "truncated": 0}
+_dirty = 0
+
+
+def _load() -> None:
+    try:
+        with open(BUDGET_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if not isinstance(data, dict):
+        return
+    for name, target in (("per_copy", _per_copy), ("reasoning", _reasoning)):
+        for k, v in (data.get(name) or {}).items():
+            if isinstance(v, dict) and {"mean", "dev", "n"} <= set(v):
+                target[str(k)] = {"mean": float(v["mean"]), "dev": float(v["dev"]), "n": int(v["n"])}
+
+
+def _save() -> None:
+    # _lock 보유 상태에서 호출
+    if not PERSIST:
+        return
+    try:
+        os.makedirs(os.path.dirname(BUDGET_PATH) or ".", exist_ok=True)
+        tmp = BUDGET_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"per_copy": _per_copy, "reasoning": _reasoning}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, BUDGET_PATH)
+    except OSError:
+        pass
+
+
+_load()
+
+
+def _key(model: str, length: str) -> str:
+    return f"{model}|{length if length in _CHARS_PER_COPY else 'short'}"
+
+
+def is_reasoning_model(model: str) -> bool:
+    return (model or "").startswith(_REASONING_PREFIXES)
+
+
+def _update(est: Optional[Dict[str, float]], sample: float) -> Dict[str, float]:
+    # 평균/평균 절대 편차의 지수 이동 평균(TCP RTT 추정과 같은 방식)
+    if est is None:
+        return {"mean": sample, "dev": sample / 4.0, "n": 1}
+    err = sample - est["mean"]
+    return {
+        "mean": est["mean"] + _ALPHA * err,
+        "dev": est["dev"] + _ALPHA * (abs(err) - est["dev"]),
+        "n": est["n"] + 1,
+    }
+
+
+def _upper(est: Optional[Dict[str, float]]) -> float:
+    return est["mean"] + _DEV_K * est["dev"] if est else 0.0
+
+
+def _field(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+# -------------------- 공개 API --------------------
+def prior_per_copy(length: str, lang: str = "ko") -> float:
+    """학습 전 문구당 출력 토큰 사전 추정."""
+    chars = _CHARS_PER_COPY.get(length, _CHARS_PER_COPY["short"])
+    return chars * _TOKENS_PER_CHAR.get(lang, _TOKENS_PER_CHAR["ko"]) + _JSON_PER_COPY
+
+
+def output_budget(model: str, length: str, num_copies: int, *, lang: str = "ko") -> int:
+    """
+    문구 num_copies개를 한 번에 받기 위한 max_output_tokens.
+    학습값이 충분하면 (평균 + K×편차)를, 아니면 사전 추정과 학습값 중 큰 쪽을 쓴다.
+    """
+    n = max(1, int(num_copies))
+    prior = prior_per_copy(length, lang) * HEADROOM
+    with _lock:
+        est = _per_copy.get(_key(model, length))
+        r_est = _reasoning.get(model)
+    learned = _upper(est)
+    if est and est["n"] >= _MIN_SAMPLES:
+        # 예산이 남는 비용(리미터 토큰 예약)보다 잘리는 비용(재호출)이 크므로 사전 추정의 절반 밑으로는 줄이지 않음
+        per_copy = max(prior * 0.5, learned)
+    else:
+        per_copy = max(prior, learned)
+
+    reasoning = 0.0
+    if is_reasoning_model(model):
+        r_learned = _upper(r_est)
+        reasoning = r_learned if r_est and r_est["n"] >= _MIN_SAMPLES else max(_REASONING_PRIOR, r_learned)
+
+    budget = _JSON_BASE + per_copy * n + reasoning
+    return int(min(MAX_BUDGET, max(MIN_BUDGET, budget)))
+
+
+def record(model: str, length: str, num_copies: int, resp: Any) -> None:
+    """
+    응답의 usage로 추정치를 보정. resp는 SDK 응답 객체 또는 dict(배치 결과 본문).
+    캐시 히트(resp=None)나 usage가 없는 응답은 무시.
+    """
+    global _dirty
+    usage = _field(resp, "usage")
+    out_tok = int(_field(usage, "output_tokens") or 0)
+    if not out_tok:
+        return
+    reasoning = int(_field(_field(usage, "output_tokens_details"), "reasoning_tokens") or 0)
+    truncated = _field(resp, "status") == "incomplete" and \
+        (_field(_field(resp, "incomplete_details"), "reason") or "max_output_tokens") == "max_output_tokens"
+    per_copy = max(0, out_tok - reasoning - _JSON_BASE) / max(1, int(num_copies))
+
+    with _lock:
+        _stats["calls"] += 1
+        k = _key(model, length)
+        est = _per_copy.get(k)
+        if truncated:
+            _stats["truncated"] += 1
+            # 잘린 응답의 실제 필요량은 관측값보다 크다 → 하한으로 보고 평균을 그 위로 끌어올림
+            floor = per_copy * 1.5
+            if est is None or est["mean"] < floor:
+                _per_copy[k] = _update(est, floor)
+        else:
+            _per_copy[k] = _update(est, per_copy)
+        if reasoning or is_reasoning_model(model):
+            _reasoning[model] = _update(_reasoning.get(model), reasoning)
+        _dirty += 1
+        if _dirty >= _SAVE_EVERY:
+            _dirty = 0
+            _save()
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        per_copy = {k: {"mean": round(v["mean"], 1), "budget": round(_upper(v), 1), "n": v["n"]}
+                    for k, v in _per_copy.items()}
+        reasoning = {k: {"mean": round(v["mean"], 1), "budget": round(_upper(v), 1), "n": v["n"]}
+                     for k, v in _reasoning.items()}
+    out["truncation_rate"] = round(out["truncated"] / out["calls"], 4) if out["calls"] else 0.0
+    out["per_copy_tokens"] = per_copy
+    out["reasoning_tokens"] = reasoning
+    return out
+
+
+def reset() -> None:
+    """학습값/지표 초기화(저장 파일은 건드리지 않음)."""
+    with _lock:
+        _per_copy.clear()
+        _reasoning.clear()
+        _stats.update(calls=0, truncated=0)